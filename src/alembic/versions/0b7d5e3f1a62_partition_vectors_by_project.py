@@ -0,0 +1,93 @@
+"""partition vectors by project
+
+Revision ID: 0b7d5e3f1a62
+Revises: e8f3a2b6c910
+Create Date: 2026-10-17 13:31:52.640177
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import pgvector.sqlalchemy
+
+# revision identifiers, used by Alembic.
+revision: str = '0b7d5e3f1a62'
+down_revision: Union[str, Sequence[str], None] = 'e8f3a2b6c910'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = "id, project_id, document_id, chunk_id, embedding, generation"
+
+
+def _ann_index(table: str) -> str:
+    return f"CREATE INDEX {table}_ann ON {table} USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)"
+
+
+def _vector_columns():
+    return [
+        sa.Column('id', sa.Integer(), server_default=sa.text("nextval('vector_embeddings_id_seq')"), nullable=False),
+        sa.Column('project_id', sa.UUID(), nullable=False),
+        sa.Column('document_id', sa.UUID(), nullable=False),
+        sa.Column('chunk_id', sa.UUID(), nullable=False),
+        sa.Column('embedding', pgvector.sqlalchemy.vector.VECTOR(dim=768), nullable=False),
+        sa.Column('generation', sa.BigInteger(), server_default='0', nullable=False),
+        sa.ForeignKeyConstraint(['chunk_id'], ['chunks.id'], name=op.f('fk_vector_embeddings_chunk_id_chunks'), ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['document_id'], ['documents.id'], name=op.f('fk_vector_embeddings_document_id_documents'), ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], name=op.f('fk_vector_embeddings_project_id_projects'), ondelete='CASCADE'),
+        sa.UniqueConstraint('project_id', 'document_id', 'chunk_id', name='uq_project_document_chunk'),
+    ]
+
+
+def _swap_out_old_table():
+    # Free the constraint/index names for the new table. The id sequence is kept:
+    # it is re-owned before the old table (which owns it) is dropped.
+    op.rename_table('vector_embeddings', 'vector_embeddings_old')
+    op.execute("DROP INDEX IF EXISTS idx_vectors_embedding")
+    op.drop_constraint('pk_vector_embeddings', 'vector_embeddings_old', type_='primary')
+    op.drop_constraint('uq_project_document_chunk', 'vector_embeddings_old', type_='unique')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _swap_out_old_table()
+    op.create_table(
+        'vector_embeddings',
+        *_vector_columns(),
+        sa.PrimaryKeyConstraint('id', 'project_id', name=op.f('pk_vector_embeddings')),
+        postgresql_partition_by='LIST (project_id)',
+    )
+    op.execute("ALTER SEQUENCE vector_embeddings_id_seq OWNED BY vector_embeddings.id")
+
+    # One partition per existing project, plus a default for anything else
+    project_ids = [row[0] for row in op.get_bind().execute(sa.text("SELECT id FROM projects"))]
+    tables = ["vector_embeddings_default"]
+    op.execute("CREATE TABLE vector_embeddings_default PARTITION OF vector_embeddings DEFAULT")
+    for project_id in project_ids:
+        table = f"vector_embeddings_{project_id.hex}"
+        op.execute(f"CREATE TABLE {table} PARTITION OF vector_embeddings FOR VALUES IN ('{project_id}')")
+        tables.append(table)
+
+    op.execute(f"INSERT INTO vector_embeddings ({COLUMNS}) SELECT {COLUMNS} FROM vector_embeddings_old")
+    op.drop_table('vector_embeddings_old')
+
+    # ANN indexes are built after the copy, so they index real data
+    for table in tables:
+        op.execute(_ann_index(table))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _swap_out_old_table()
+    op.create_table(
+        'vector_embeddings',
+        *_vector_columns(),
+        sa.PrimaryKeyConstraint('id', name=op.f('pk_vector_embeddings')),
+    )
+    op.execute("ALTER SEQUENCE vector_embeddings_id_seq OWNED BY vector_embeddings.id")
+    op.execute(f"INSERT INTO vector_embeddings ({COLUMNS}) SELECT {COLUMNS} FROM vector_embeddings_old")
+    # Dropping the partitioned table drops every partition and its index
+    op.drop_table('vector_embeddings_old')
+    op.create_index('idx_vectors_embedding', 'vector_embeddings', ['embedding'], unique=False,
+                    postgresql_using='hnsw', postgresql_with={'m': '16', 'ef_construction': '64'},
+                    postgresql_ops={'embedding': 'vector_cosine_ops'})
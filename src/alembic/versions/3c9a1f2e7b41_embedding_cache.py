@@ -0,0 +1,34 @@
+"""embedding cache
+
+Revision ID: 3c9a1f2e7b41
+Revises: 91fd60c6876e
+Create Date: 2026-10-17 09:12:31.402118
+
+"""
+from typing import Sequence, Union
+import pgvector
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c9a1f2e7b41'
+down_revision: Union[str, Sequence[str], None] = '91fd60c6876e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('embedding_cache',
+    sa.Column('model_name', sa.String(length=255), nullable=False),
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('embedding', pgvector.sqlalchemy.vector.VECTOR(dim=768), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('model_name', 'content_hash', name=op.f('pk_embedding_cache'))
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('embedding_cache')
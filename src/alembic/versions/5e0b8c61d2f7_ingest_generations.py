@@ -0,0 +1,43 @@
+"""ingest generations
+
+Revision ID: 5e0b8c61d2f7
+Revises: a7d24e90c5b3
+Create Date: 2026-10-17 11:20:41.506913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '5e0b8c61d2f7'
+down_revision: Union[str, Sequence[str], None] = 'a7d24e90c5b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(sa.schema.CreateSequence(sa.Sequence('ingest_generation_seq')))
+    # Existing rows all belong to generation 0, which is every document's active generation
+    op.add_column('documents', sa.Column('active_generation', sa.BigInteger(), server_default='0', nullable=False))
+    op.add_column('chunks', sa.Column('generation', sa.BigInteger(), server_default='0', nullable=False))
+    op.add_column('vector_embeddings', sa.Column('generation', sa.BigInteger(), server_default='0', nullable=False))
+    op.create_index('idx_chunks_document_generation', 'chunks', ['document_id', 'generation'], unique=False)
+    op.create_index('idx_vectors_document_generation', 'vector_embeddings', ['document_id', 'generation'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Drop staged or superseded rows so only the live version of each document survives
+    op.execute(
+        "DELETE FROM chunks c USING documents d "
+        "WHERE c.document_id = d.id AND c.generation <> d.active_generation"
+    )
+    op.drop_index('idx_vectors_document_generation', table_name='vector_embeddings')
+    op.drop_index('idx_chunks_document_generation', table_name='chunks')
+    op.drop_column('vector_embeddings', 'generation')
+    op.drop_column('chunks', 'generation')
+    op.drop_column('documents', 'active_generation')
+    op.execute(sa.schema.DropSequence(sa.Sequence('ingest_generation_seq')))
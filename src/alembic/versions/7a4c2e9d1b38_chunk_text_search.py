@@ -0,0 +1,34 @@
+"""chunk text search
+
+Revision ID: 7a4c2e9d1b38
+Revises: 0b7d5e3f1a62
+Create Date: 2026-10-17 16:05:41.902317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from models.postgres.tables_schema.tables import CHUNK_TEXT_SEARCH
+
+# revision identifiers, used by Alembic.
+revision: str = '7a4c2e9d1b38'
+down_revision: Union[str, Sequence[str], None] = '0b7d5e3f1a62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Stored generated column: computed for existing rows here, then on every insert/update
+    op.add_column('chunks', sa.Column('text_search', postgresql.TSVECTOR(),
+                                      sa.Computed(CHUNK_TEXT_SEARCH, persisted=True), nullable=True))
+    op.create_index('idx_chunks_text_search', 'chunks', ['text_search'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_chunks_text_search', table_name='chunks', postgresql_using='gin')
+    op.drop_column('chunks', 'text_search')
@@ -0,0 +1,76 @@
+"""append-only history messages
+
+Revision ID: b5e9c2d7a410
+Revises: f6a1c3e8b547
+Create Date: 2026-10-17 19:12:36.402118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e9c2d7a410'
+down_revision: Union[str, Sequence[str], None] = 'f6a1c3e8b547'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('history_messages',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('seq', sa.BigInteger(), sa.Identity(always=False), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('project_id', sa.UUID(), nullable=False),
+    sa.Column('role', sa.String(length=16), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], name=op.f('fk_history_messages_project_id_projects'), ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], name=op.f('fk_history_messages_user_id_users'), ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_history_messages'))
+    )
+    op.create_index('ix_history_messages_user_project_seq', 'history_messages', ['user_id', 'project_id', 'seq'], unique=False)
+
+    # One row per message of the stored JSONB histories, in their order
+    op.execute(
+        """
+        INSERT INTO history_messages (id, user_id, project_id, role, content, created_at)
+        SELECT gen_random_uuid(), h.user_id, h.project_id, m.message->>'role', m.message->>'content', h.updated_at
+        FROM user_history h
+        CROSS JOIN LATERAL jsonb_array_elements(h.history) WITH ORDINALITY AS m(message, position)
+        ORDER BY h.user_id, h.project_id, m.position
+        """
+    )
+    op.drop_index('ix_user_history_user_project', table_name='user_history')
+    op.drop_table('user_history')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_table('user_history',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('project_id', sa.UUID(), nullable=False),
+    sa.Column('history', postgresql.JSONB(astext_type=sa.Text()), server_default=sa.text("'[]'::jsonb"), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], name=op.f('fk_user_history_project_id_projects'), ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], name=op.f('fk_user_history_user_id_users'), ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_user_history')),
+    sa.UniqueConstraint('user_id', 'project_id', name='uq_user_project_history')
+    )
+    op.create_index('ix_user_history_user_project', 'user_history', ['user_id', 'project_id'], unique=False)
+    op.execute(
+        """
+        INSERT INTO user_history (id, user_id, project_id, history, updated_at)
+        SELECT gen_random_uuid(), user_id, project_id,
+               jsonb_agg(jsonb_build_object('role', role, 'content', content) ORDER BY seq), max(created_at)
+        FROM history_messages
+        GROUP BY user_id, project_id
+        """
+    )
+    op.drop_index('ix_history_messages_user_project_seq', table_name='history_messages')
+    op.drop_table('history_messages')
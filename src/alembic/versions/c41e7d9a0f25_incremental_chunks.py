@@ -0,0 +1,60 @@
+"""incremental chunks
+
+Revision ID: c41e7d9a0f25
+Revises: 5e0b8c61d2f7
+Create Date: 2026-10-17 12:02:17.330615
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41e7d9a0f25'
+down_revision: Union[str, Sequence[str], None] = '5e0b8c61d2f7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('documents', sa.Column('staging_generation', sa.BigInteger(), server_default='0', nullable=False))
+    op.add_column('chunks', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.add_column('chunks', sa.Column('chunk_order', sa.Integer(), nullable=True))
+    op.add_column('chunks', sa.Column('retired_generation', sa.BigInteger(), nullable=True))
+    op.execute("UPDATE documents SET staging_generation = active_generation")
+    # Best-effort backfill so existing documents can be diffed on their next run;
+    # a hash that differs from the Python one only costs that chunk a re-embed.
+    op.execute(
+        "UPDATE chunks SET "
+        "chunk_order = (metadata_json->>'chunk_order')::int, "
+        "content_hash = encode(sha256(convert_to("
+        "btrim(regexp_replace(normalize(text, NFKC), '\\s+', ' ', 'g')), 'UTF8')), 'hex')"
+    )
+    # Chunks no longer live at their document's active generation
+    op.execute(
+        "DELETE FROM chunks c USING documents d "
+        "WHERE c.document_id = d.id AND c.generation <> d.active_generation"
+    )
+    # Visibility is decided on chunks now; vectors are never updated
+    op.drop_index('idx_vectors_document_generation', table_name='vector_embeddings')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(
+        "DELETE FROM chunks c USING documents d WHERE c.document_id = d.id AND ("
+        "c.generation > d.active_generation OR c.retired_generation <= d.active_generation)"
+    )
+    op.execute(
+        "UPDATE chunks c SET generation = d.active_generation FROM documents d WHERE c.document_id = d.id"
+    )
+    op.execute(
+        "UPDATE vector_embeddings v SET generation = c.generation FROM chunks c WHERE v.chunk_id = c.id"
+    )
+    op.create_index('idx_vectors_document_generation', 'vector_embeddings', ['document_id', 'generation'], unique=False)
+    op.drop_column('chunks', 'retired_generation')
+    op.drop_column('chunks', 'chunk_order')
+    op.drop_column('chunks', 'content_hash')
+    op.drop_column('documents', 'staging_generation')
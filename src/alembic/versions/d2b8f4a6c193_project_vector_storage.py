@@ -0,0 +1,35 @@
+"""project vector storage
+
+Revision ID: d2b8f4a6c193
+Revises: 7a4c2e9d1b38
+Create Date: 2026-10-17 17:21:08.554120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2b8f4a6c193'
+down_revision: Union[str, Sequence[str], None] = '7a4c2e9d1b38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing partitions keep their full-precision ANN index
+    op.add_column('projects', sa.Column('vector_storage', sa.String(length=16), server_default='full', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Quantized partition indexes go back to full precision before the column goes
+    projects = op.get_bind().execute(sa.text("SELECT id FROM projects WHERE vector_storage <> 'full'")).scalars().all()
+    for project_id in projects:
+        table = f"vector_embeddings_{project_id.hex}"
+        op.execute(f"DROP INDEX IF EXISTS {table}_ann")
+        op.execute(f"CREATE INDEX {table}_ann ON {table} USING hnsw "
+                   f"(embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)")
+    op.drop_column('projects', 'vector_storage')
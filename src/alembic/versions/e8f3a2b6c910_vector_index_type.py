@@ -0,0 +1,37 @@
+"""vector index type
+
+Revision ID: e8f3a2b6c910
+Revises: c41e7d9a0f25
+Create Date: 2026-10-17 12:48:05.271904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8f3a2b6c910'
+down_revision: Union[str, Sequence[str], None] = 'c41e7d9a0f25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('projects', sa.Column('recall_target', sa.Float(), nullable=True))
+    # The init migration built ivfflat on an empty table, so its centroids are meaningless.
+    # Rebuild as HNSW with the default HNSW_M / HNSW_EF_CONSTRUCTION, which needs no training data.
+    op.drop_index('idx_vectors_embedding', table_name='vector_embeddings')
+    op.create_index('idx_vectors_embedding', 'vector_embeddings', ['embedding'], unique=False,
+                    postgresql_using='hnsw', postgresql_with={'m': '16', 'ef_construction': '64'},
+                    postgresql_ops={'embedding': 'vector_cosine_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_vectors_embedding', table_name='vector_embeddings')
+    op.create_index('idx_vectors_embedding', 'vector_embeddings', ['embedding'], unique=False,
+                    postgresql_using='ivfflat', postgresql_with={'lists': '100'},
+                    postgresql_ops={'embedding': 'vector_cosine_ops'})
+    op.drop_column('projects', 'recall_target')
@@ -0,0 +1,28 @@
+"""project retrieval backend
+
+Revision ID: f6a1c3e8b547
+Revises: d2b8f4a6c193
+Create Date: 2026-10-17 18:02:47.130562
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6a1c3e8b547'
+down_revision: Union[str, Sequence[str], None] = 'd2b8f4a6c193'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('projects', sa.Column('retrieval_backend', sa.String(length=16), server_default='postgres', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('projects', 'retrieval_backend')
@@ -0,0 +1,115 @@
+"""
+Authentication overhead benchmark: database work AuthMiddleware adds per request.
+
+Drives the app in-process (httpx ASGITransport, no server needed) with a
+scratch user and sends `--requests` authenticated requests, `--concurrency`
+at a time, to `/health` (no database work of its own) and `GET /projects`
+(one query of its own). Each runs under three identity sources:
+  * db lookup    - token with `sub` only and the user cache off (the old path:
+                   one users query per request)
+  * user cache   - token with `sub` only, AUTH_USER_CACHE_TTL_SECONDS cache
+  * token claims - token signed with username and role (AUTH_TOKEN_CLAIMS,
+                   switched on for this run)
+and reports database statements and pool checkouts per request with p50/p95
+latency. Finally it changes the user's role and shows that the next request
+goes back to the database once. The scratch user is deleted afterwards.
+
+    python benchmarks/auth_queries.py --requests 2000 --concurrency 32
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import routes  # noqa: F401,E402  (resolves the models <-> routes import cycle)
+from sqlalchemy import delete, event  # noqa: E402
+
+from helpers.config import settings  # noqa: E402
+from helpers.db_connection import async_session, engine  # noqa: E402
+from helpers.security import create_access_token, user_claims  # noqa: E402
+from helpers.user_cache import user_cache  # noqa: E402
+from main import app  # noqa: E402
+from models.postgres.AuthModel import AuthModel  # noqa: E402
+from models.postgres.tables_schema.tables import User  # noqa: E402
+
+counters = {"statements": 0, "checkouts": 0}
+
+
+def _count(name):
+    def listener(*_):
+        counters[name] += 1
+    return listener
+
+
+async def measure(client, label, method, url, token, args):
+    headers = {"Authorization": f"Bearer {token}"}
+    body = {"offset": 0, "limit": 10} if url == "/projects" else None
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            res = await client.request(method, url, headers=headers, json=body)
+            latencies.append(time.perf_counter() - start)
+            if res.status_code != 200:
+                raise RuntimeError(f"{url} -> {res.status_code}: {res.text}")
+
+    counters.update(statements=0, checkouts=0)
+    await asyncio.gather(*(one() for _ in range(args.requests)))
+    latencies.sort()
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"  {label:<13} db statements/request={counters['statements'] / args.requests:5.2f} "
+          f"pool checkouts/request={counters['checkouts'] / args.requests:5.2f} "
+          f"p50={statistics.median(latencies) * 1000:7.2f}ms p95={p95 * 1000:7.2f}ms")
+
+
+async def main(args):
+    settings.AUTH_TOKEN_CLAIMS = True
+    event.listen(engine.sync_engine, "before_cursor_execute", _count("statements"))
+    event.listen(engine.sync_engine.pool, "checkout", _count("checkouts"))
+    auth_model = AuthModel()
+    async with async_session() as db:
+        user = await auth_model.create_user(db, f"bench_auth_{uuid.uuid4().hex[:8]}", "bench-password")
+
+    sub_token = create_access_token({"sub": str(user.id)})
+    ttl = user_cache.ttl
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            for method, url in (("GET", "/health"), ("GET", "/projects")):
+                print(f"{method} {url} ({args.requests} requests, concurrency {args.concurrency})")
+                user_cache.ttl = 0
+                user_cache.entries.clear()
+                await measure(client, "db lookup", method, url, sub_token, args)
+                user_cache.ttl = ttl
+                await measure(client, "user cache", method, url, sub_token, args)
+                await measure(client, "token claims", method, url, create_access_token(user_claims(user)), args)
+
+            claims_token = create_access_token(user_claims(user))
+            async with async_session() as db:
+                await auth_model.update_user_role(db, user.id, user.role)
+            counters.update(statements=0)
+            await client.get("/health", headers={"Authorization": f"Bearer {claims_token}"})
+            first = counters["statements"]
+            await client.get("/health", headers={"Authorization": f"Bearer {claims_token}"})
+            print(f"after a role change: {first} statement(s) on the next request, "
+                  f"{counters['statements'] - first} on the one after")
+    finally:
+        async with async_session() as db:
+            await db.execute(delete(User).where(User.id == user.id))
+            await db.commit()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,154 @@
+"""
+Per-document ingest benchmark: commit count and wall time.
+
+Loads synthetic chunks and random 768-d vectors for one scratch document,
+`--runs` times per path, against the database configured in `.env`:
+  * legacy  - the previous ORM path: delete chunks, insert chunks in batches of
+              100 (commit + refresh each), insert vectors in batches of 100
+              (commit each), then mark the document processed
+  * staged  - BulkLoadModel into an empty document: COPY under a staging
+              generation, swap, drop retired
+  * edit    - BulkLoadModel re-run after one page (4 chunks) changed; only
+              the difference is written
+  * insert  - BulkLoadModel re-run after a page was inserted (or removed)
+              near the start, which shifts the position of every later
+              chunk; those rows are only re-ordered, not re-inserted
+The edit and insert cases also print their diff (kept / moved / inserted /
+retired chunks). The scratch project is deleted afterwards.
+
+    python benchmarks/ingest_commits.py --chunks 2000 --runs 3
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import routes  # noqa: F401,E402  (resolves the models <-> routes import cycle)
+from sqlalchemy import delete, event  # noqa: E402
+
+from helpers.db_connection import async_session, engine  # noqa: E402
+from llm.EmbeddingCache import EmbeddingCache  # noqa: E402
+from models.postgres.BulkLoadModel import BulkLoadModel  # noqa: E402
+from models.postgres.ChunksModel import ChunksModel  # noqa: E402
+from models.postgres.DocumentsModel import DocumentsModel  # noqa: E402
+from models.postgres.VectorsModel import VectorModel  # noqa: E402
+from models.postgres.operations_schema import ChunkInsert, VectorInsertItems  # noqa: E402
+from models.postgres.tables_schema.tables import Chunk, Document, Project  # noqa: E402
+
+commits = 0
+
+
+def _count_commit(conn):
+    global commits
+    commits += 1
+
+
+async def legacy_load(db, project_id, document_id, chunks, vectors):
+    chunks_model = ChunksModel()
+    await chunks_model.delete_chunks_by_document_id(db, document_id)
+    inserted = await chunks_model.insert_chunks(db, chunks)
+    await VectorModel().insert_vectors(db, VectorInsertItems(
+        project_id=project_id, document_id=document_id,
+        chunk_id=[c.id for c in inserted], vectors=vectors,
+    ))
+    await DocumentsModel().update_document(db, document_id)
+
+
+async def staged_load(db, project_id, document_id, chunks, vectors):
+    _, changes = await BulkLoadModel().load_document(
+        db, project_id, document_id, chunks, {c.content_hash: v for c, v in zip(chunks, vectors)}
+    )
+    return changes
+
+
+async def clear_chunks(db, document_id):
+    await db.execute(delete(Chunk).where(Chunk.document_id == document_id))
+    await db.commit()
+
+
+async def measure(label, fn, project_id, document_id, chunks, vectors, runs, setup=None):
+    global commits
+    walls, counts, changes = [], [], []
+    for _ in range(runs):
+        async with async_session() as db:
+            if setup:
+                await setup(db)
+            commits = 0
+            start = time.perf_counter()
+            changes.append(await fn(db, project_id, document_id, chunks, vectors))
+            walls.append(time.perf_counter() - start)
+            counts.append(commits)
+    print(f"{label:<7} commits/doc={statistics.median(counts):5.0f} "
+          f"wall/doc={statistics.median(walls) * 1000:8.0f}ms (median of {runs})"
+          + (f" changes={changes[0]}" if changes[0] else ""))
+    return statistics.median(walls)
+
+
+async def main(args):
+    event.listen(engine.sync_engine, "commit", _count_commit)
+    rng = random.Random(0)
+
+    async with async_session() as db:
+        project = Project(name=f"bench_ingest_{uuid.uuid4().hex[:8]}", description="ingest benchmark")
+        db.add(project)
+        await db.flush()
+        document = Document(project_id=project.id, filename="synthetic.pdf")
+        db.add(document)
+        await db.commit()
+        project_id, document_id = project.id, document.id
+
+    def make_chunks(edited_page=None, inserted_page=None):
+        texts = [f"synthetic chunk {i}{' edited' if i // 4 == edited_page else ''} " * 40 for i in range(args.chunks)]
+        if inserted_page is not None:
+            texts[inserted_page * 4:inserted_page * 4] = [f"inserted chunk {i} " * 40 for i in range(4)]
+        return [
+            ChunkInsert(document_id=document_id, text=text, chunk_order=i,
+                        content_hash=EmbeddingCache.content_hash(text),
+                        metadata_json={"filename": "synthetic.pdf", "page_number": i // 4, "chunk_order": i})
+            for i, text in enumerate(texts)
+        ]
+
+    chunks = make_chunks()
+    vectors = [[rng.uniform(-1, 1) for _ in range(768)] for _ in range(args.chunks)]
+    print(f"document: {args.chunks} chunk(s), 768-d vectors")
+
+    try:
+        legacy = await measure("legacy", legacy_load, project_id, document_id, chunks, vectors, args.runs)
+        staged = await measure("staged", staged_load, project_id, document_id, chunks, vectors, args.runs,
+                               setup=lambda db: clear_chunks(db, document_id))
+        print(f"speedup x{legacy / staged:.2f}")
+
+        # Alternate between two versions that differ in one page
+        versions = [make_chunks(edited_page=1), chunks]
+        edits = iter(versions * args.runs)
+        async def edit_load(db, project_id, document_id, _chunks, vectors):
+            return await staged_load(db, project_id, document_id, next(edits), vectors)
+        await measure("edit", edit_load, project_id, document_id, chunks, vectors, args.runs)
+
+        # Alternate between inserting a page after the first one and removing it again
+        versions = [make_chunks(inserted_page=1), chunks]
+        inserts = iter(versions * args.runs)
+        page_vectors = [[rng.uniform(-1, 1) for _ in range(768)] for _ in range(4)]
+        async def insert_load(db, project_id, document_id, _chunks, vectors):
+            version = next(inserts)
+            by_hash = {c.content_hash: v for c, v in zip(chunks + versions[0][4:8], vectors + page_vectors)}
+            return await staged_load(db, project_id, document_id, version, [by_hash[c.content_hash] for c in version])
+        await measure("insert", insert_load, project_id, document_id, chunks, vectors, args.runs * 2)
+    finally:
+        async with async_session() as db:
+            await db.execute(delete(Project).where(Project.id == project_id))
+            await db.commit()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--runs", type=int, default=3)
+    asyncio.run(main(parser.parse_args()))
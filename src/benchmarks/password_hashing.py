@@ -0,0 +1,87 @@
+"""
+Login storm benchmark: event-loop responsiveness while argon2 runs.
+
+Verifies `--logins` passwords, `--concurrency` at a time, while a probe
+measures event-loop lag (how late a `--probe-interval` sleep wakes up, which
+is the delay every other request on the worker sees), in two modes:
+  * inline - argon2 on the event loop, as signup / login used to run it
+  * pool   - helpers.password_pool, PASSWORD_HASH_WORKERS threads and at most
+             PASSWORD_HASH_MAX_QUEUE waiting calls (the rest fail fast)
+For each mode it reports verifications per second, rejections and the
+loop-lag p50/p95/max, then the pool's hash latency and queue wait as served
+by GET /metrics. No database or server is needed.
+
+    python benchmarks/password_hashing.py --logins 200 --concurrency 50
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import routes  # noqa: F401,E402  (resolves the models <-> routes import cycle)
+from helpers.password_pool import (  # noqa: E402
+    password_pool_metrics, shutdown_password_pool, verify_password_async,
+)
+from helpers.security import hash_password, verify_password  # noqa: E402
+from routes.exceptions import ServiceBusy  # noqa: E402
+
+
+async def verify_inline(plain_password, hashed_password):
+    return verify_password(plain_password, hashed_password)
+
+
+async def storm(label, verify, hashed, args):
+    counts = {"ok": 0, "rejected": 0}
+    lags = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+    done = asyncio.Event()
+
+    async def login():
+        async with semaphore:
+            try:
+                await verify("bench-password", hashed)
+                counts["ok"] += 1
+            except ServiceBusy:
+                counts["rejected"] += 1
+
+    async def probe():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(args.probe_interval)
+            lags.append(time.perf_counter() - start - args.probe_interval)
+
+    probe_task = asyncio.create_task(probe())
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(args.logins)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await probe_task
+
+    lags.sort()
+    p95 = lags[min(len(lags) - 1, int(len(lags) * 0.95))]
+    print(f"  {label:<7} ok={counts['ok']} rejected={counts['rejected']} {counts['ok'] / elapsed:6.1f}/s | "
+          f"loop lag p50={statistics.median(lags) * 1000:7.2f}ms p95={p95 * 1000:7.2f}ms max={lags[-1] * 1000:7.2f}ms")
+
+
+async def main(args):
+    hashed = hash_password("bench-password")
+    print(f"{args.logins} logins, concurrency {args.concurrency}")
+    try:
+        await storm("inline", verify_inline, hashed, args)
+        await storm("pool", verify_password_async, hashed, args)
+        metrics = password_pool_metrics()
+        print(f"pool metrics: hash_ms={metrics['hash_ms']} queue_wait_ms={metrics['queue_wait_ms']}")
+    finally:
+        shutdown_password_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--probe-interval", type=float, default=0.01)
+    asyncio.run(main(parser.parse_args()))
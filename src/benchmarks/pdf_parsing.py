@@ -0,0 +1,129 @@
+"""
+PDF parsing/chunking benchmark: sequential (old in-handler path) vs process pool.
+
+Generates a corpus of synthetic multi-hundred-page PDFs, then times:
+  * sequential  - every file parsed one after another in this process
+  * pool        - all files parsed concurrently through helpers.process_pool
+It also reports the longest event-loop stall observed during each run.
+
+    python benchmarks/pdf_parsing.py --files 8 --pages 300 --workers 4
+"""
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from helpers.pdf_parser import load_and_chunk_pdf  # noqa: E402
+
+WORDS = ("retrieval augmented generation vector embedding chunk overlap token context "
+         "student lecture course exam chapter theorem proof example gradient matrix").split()
+
+
+def _escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_synthetic_pdf(path: Path, pages: int, lines_per_page: int = 45, seed: int = 0):
+    """Write a minimal but valid text PDF (Helvetica, one content stream per page)."""
+    rng = random.Random(seed)
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for _ in range(pages):
+        lines = [" ".join(rng.choice(WORDS) for _ in range(12)) for _ in range(lines_per_page)]
+        ops = ["BT", "/F1 10 Tf", "12 TL", "40 800 Td"] + [f"({_escape(line)}) '" for line in lines] + ["ET"]
+        stream = "\n".join(ops).encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % i for i in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % pages
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % off for off in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    path.write_bytes(bytes(out))
+
+
+async def measure_stall(stop: asyncio.Event) -> float:
+    """Longest gap between event-loop ticks scheduled every 10 ms."""
+    worst, last = 0.0, time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(0.01)
+        now = time.perf_counter()
+        worst = max(worst, now - last - 0.01)
+        last = now
+    return worst
+
+
+async def run_sequential(paths, chunk_size, chunk_overlap):
+    # The previous handler called the parser inline, blocking the loop
+    return [load_and_chunk_pdf(str(p), chunk_size, chunk_overlap) for p in paths]
+
+
+async def run_pool(paths, chunk_size, chunk_overlap):
+    from helpers.process_pool import get_process_pool
+    loop = asyncio.get_running_loop()
+    pool = get_process_pool()
+    return await asyncio.gather(*(
+        loop.run_in_executor(pool, load_and_chunk_pdf, str(p), chunk_size, chunk_overlap) for p in paths
+    ))
+
+
+async def timed(label, fn, *args):
+    stop = asyncio.Event()
+    stall_task = asyncio.create_task(measure_stall(stop))
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    results = await fn(*args)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    stall = await stall_task
+    chunks = sum(len(r) for r in results)
+    print(f"{label:<11} wall={elapsed:7.2f}s chunks={chunks} max_loop_stall={stall * 1000:8.0f}ms")
+    return elapsed
+
+
+async def main(args):
+    from helpers.config import settings
+    settings.PDF_PARSE_WORKERS = args.workers
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(args.files):
+            path = Path(tmp) / f"synthetic_{i}.pdf"
+            write_synthetic_pdf(path, args.pages, seed=i)
+            paths.append(path)
+        size_mb = sum(p.stat().st_size for p in paths) / 1024 / 1024
+        print(f"corpus: {args.files} file(s) x {args.pages} pages ({size_mb:.1f} MB)")
+
+        sequential = await timed("sequential", run_sequential, paths, args.chunk_size, args.chunk_overlap)
+        pooled = await timed("pool", run_pool, paths, args.chunk_size, args.chunk_overlap)
+        print(f"speedup x{sequential / pooled:.2f}")
+
+        from helpers.process_pool import shutdown_process_pool
+        shutdown_process_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=8)
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=0, help="0 = one per CPU core")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=150)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,105 @@
+"""
+Query preamble benchmark: project lookup, access check and history load.
+
+Creates a scratch user and project with access and a 12-message history,
+then runs `--iterations` preambles each way and reports p50/p95 latency and
+database statements per preamble:
+  * sequential - ProjectModel.search_by_name, ProjectUserModel.user_has_access,
+                 UserHistoryModel.get_history (three round trips)
+  * fused      - ProjectModel.get_query_context (one prepared statement)
+The difference in p50 is what each /query saves before it embeds anything.
+Scratch rows are deleted afterwards.
+
+    python benchmarks/query_preamble.py --iterations 2000
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import routes  # noqa: F401,E402  (resolves the models <-> routes import cycle)
+from sqlalchemy import delete, event  # noqa: E402
+
+from helpers.db_connection import async_session, engine  # noqa: E402
+from models.postgres.ProjectsModel import ProjectModel  # noqa: E402
+from models.postgres.ProjectUserModel import ProjectUserModel  # noqa: E402
+from models.postgres.UserHistoryModel import UserHistoryModel  # noqa: E402
+from models.postgres.operations_schema.projects import ProjectSearch  # noqa: E402
+from models.postgres.tables_schema.tables import HistoryMessage, Project, ProjectUser, User  # noqa: E402
+
+statements = 0
+
+
+def _count_statement(*_):
+    global statements
+    statements += 1
+
+
+async def measure(label, preamble, iterations):
+    global statements
+    latencies = []
+    async with async_session() as db:
+        result = await preamble(db)
+        statements = 0
+        for _ in range(iterations):
+            start = time.perf_counter()
+            await preamble(db)
+            latencies.append(time.perf_counter() - start)
+        per_call = statements / iterations
+    latencies.sort()
+    p50 = statistics.median(latencies)
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"  {label:<10} p50={p50 * 1000:7.3f}ms p95={p95 * 1000:7.3f}ms db statements={per_call:.1f}")
+    return p50, result
+
+
+async def main(args):
+    event.listen(engine.sync_engine, "before_cursor_execute", _count_statement)
+    project_model, project_user_model, history_model = ProjectModel(), ProjectUserModel(), UserHistoryModel()
+    suffix = uuid.uuid4().hex[:8]
+    history = [{"role": "user" if i % 2 == 0 else "assistant", "content": f"message {i} " * 40} for i in range(12)]
+    async with async_session() as db:
+        user = User(username=f"bench_preamble_{suffix}", hashed_password="-")
+        project = Project(name=f"bench_preamble_{suffix}", description="query preamble benchmark")
+        db.add_all([user, project])
+        await db.flush()
+        db.add(ProjectUser(project_id=project.id, user_id=user.id))
+        await db.flush()
+        for message in history:
+            db.add(HistoryMessage(project_id=project.id, user_id=user.id, **message))
+            await db.flush()
+        await db.commit()
+        user_id, project_name = user.id, project.name
+
+    async def sequential(db):
+        found = await project_model.search_by_name(db, ProjectSearch(name=project_name))
+        allowed = await project_user_model.user_has_access(db, user_id=user_id, project_id=found.id)
+        return found, allowed, await history_model.get_history(db=db, user_id=user_id, project_id=found.id)
+
+    async def fused(db):
+        context = await project_model.get_query_context(db, name=project_name, user_id=user_id)
+        history = [{"role": m["role"], "content": m["content"]} for m in context.history]
+        return context.project, context.has_access, history
+
+    try:
+        print(f"{args.iterations} preambles, history of {len(history)} messages")
+        before, expected = await measure("sequential", sequential, args.iterations)
+        after, found = await measure("fused", fused, args.iterations)
+        print(f"p50 saved per query: {(before - after) * 1000:.3f}ms; same result: {expected == found}")
+    finally:
+        async with async_session() as db:
+            await db.execute(delete(Project).where(Project.id == project.id))
+            await db.execute(delete(User).where(User.id == user_id))
+            await db.commit()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    asyncio.run(main(parser.parse_args()))
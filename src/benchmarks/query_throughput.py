@@ -0,0 +1,69 @@
+"""
+Concurrent /query throughput benchmark.
+
+Fires `--requests` queries at a running server with `--concurrency` in flight
+and reports throughput and latency percentiles. Run it once against the
+previous build and once against the current one to compare:
+
+    python benchmarks/query_throughput.py --username root --password secret \
+        --project my_project --query "Explain RAG workflow" --concurrency 32
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+async def login(client: httpx.AsyncClient, username: str, password: str) -> str:
+    res = await client.post("/auth/login", json={"username": username, "password": password})
+    res.raise_for_status()
+    return res.json()["data"]["access_token"]
+
+
+async def run(args):
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout) as client:
+        token = await login(client, args.username, args.password)
+        headers = {"Authorization": f"Bearer {token}"}
+        payload = {"project_name": args.project, "query": args.query, "k": args.k}
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+        latencies, failures = [], 0
+
+        async def one():
+            nonlocal failures
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    res = await client.post(args.endpoint, json=payload, headers=headers)
+                    res.raise_for_status()
+                    latencies.append(time.perf_counter() - start)
+                except httpx.HTTPError:
+                    failures += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(args.requests)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"requests={args.requests} concurrency={args.concurrency} failures={failures}")
+    print(f"wall={elapsed:.2f}s throughput={len(latencies) / elapsed:.2f} req/s")
+    if latencies:
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(f"p50={statistics.median(latencies) * 1000:.0f}ms p95={p95 * 1000:.0f}ms max={latencies[-1] * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:5000")
+    parser.add_argument("--endpoint", default="/query")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--project", required=True)
+    parser.add_argument("--query", default="Explain RAG workflow")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    asyncio.run(run(parser.parse_args()))
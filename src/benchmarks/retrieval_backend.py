@@ -0,0 +1,117 @@
+"""
+Retrieval backend benchmark: Postgres vector search vs the in-process memmap matrix.
+
+Loads `--vectors` random 768-d vectors into a scratch project (BulkLoadModel,
+spread over documents of 500 chunks), then runs `--queries` top-k searches
+through each backend and reports p50/p95 latency, the number of database
+statements per query and whether both return the same chunks:
+  * postgres - VectorModel.search (exact scan or ANN index, as configured)
+  * memmap   - MemmapIndexModel.search on a MEMMAP_DTYPE matrix; its staleness
+               check costs one statement per MEMMAP_FINGERPRINT_CACHE_SECONDS,
+               so short runs report close to 0 statements per query
+The scratch project and its matrix are deleted afterwards.
+
+    python benchmarks/retrieval_backend.py --vectors 5000 --queries 200
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import routes  # noqa: F401,E402  (resolves the models <-> routes import cycle)
+from sqlalchemy import delete, event  # noqa: E402
+
+from helpers.db_connection import async_session, engine  # noqa: E402
+from llm.EmbeddingCache import EmbeddingCache  # noqa: E402
+from models.memmap.MemmapIndexModel import MemmapIndexModel  # noqa: E402
+from models.postgres.BulkLoadModel import BulkLoadModel  # noqa: E402
+from models.postgres.VectorsModel import VectorModel  # noqa: E402
+from models.postgres.operations_schema import ChunkInsert  # noqa: E402
+from models.postgres.tables_schema.tables import Document, Project  # noqa: E402
+
+DOC_CHUNKS = 500
+statements = 0
+
+
+def _count_statement(*_):
+    global statements
+    statements += 1
+
+
+async def measure(label, search, queries):
+    global statements
+    latencies, counts, found = [], [], []
+    async with async_session() as db:
+        for query in queries:
+            statements = 0
+            start = time.perf_counter()
+            result = await search(db, query)
+            latencies.append(time.perf_counter() - start)
+            counts.append(statements)
+            found.append([r.text for r in result.results])
+    latencies.sort()
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"{label:<9} p50={statistics.median(latencies) * 1000:8.3f}ms p95={p95 * 1000:8.3f}ms "
+          f"db statements/query={statistics.mean(counts):.1f}")
+    return found
+
+
+async def main(args):
+    event.listen(engine.sync_engine, "before_cursor_execute", _count_statement)
+    rng = random.Random(0)
+    vector_model, memmap_index = VectorModel(), MemmapIndexModel()
+
+    async with async_session() as db:
+        project = Project(name=f"bench_backend_{uuid.uuid4().hex[:8]}", description="retrieval backend benchmark")
+        db.add(project)
+        await db.commit()
+        project_id = project.id
+        await vector_model.create_partition(db, project_id)
+
+    try:
+        async with async_session() as db:
+            for start in range(0, args.vectors, DOC_CHUNKS):
+                document = Document(project_id=project_id, filename=f"synthetic_{start}.pdf")
+                db.add(document)
+                await db.commit()
+                chunks = [
+                    ChunkInsert(document_id=document.id, text=f"chunk {i}", chunk_order=i - start,
+                                content_hash=EmbeddingCache.content_hash(f"chunk {i}"), metadata_json={})
+                    for i in range(start, min(start + DOC_CHUNKS, args.vectors))
+                ]
+                vectors = {c.content_hash: [rng.uniform(-1, 1) for _ in range(768)] for c in chunks}
+                await BulkLoadModel().load_document(db, project_id, document.id, chunks, vectors)
+            started = time.perf_counter()
+            manifest = await memmap_index.refresh(db, project_id, force=True)
+            print(f"{args.vectors} vectors; memmap build {time.perf_counter() - started:.2f}s ({manifest['dtype']})")
+
+        queries = [[rng.uniform(-1, 1) for _ in range(768)] for _ in range(args.queries)]
+        postgres = await measure(
+            "postgres", lambda db, q: vector_model.search(db, q, project_id, args.k), queries
+        )
+        memmap = await measure(
+            "memmap", lambda db, q: memmap_index.search(db, project_id, q, args.k), queries
+        )
+        same = sum(p == m for p, m in zip(postgres, memmap))
+        print(f"identical top-{args.k}: {same}/{len(queries)}")
+    finally:
+        memmap_index.drop(project_id)
+        async with async_session() as db:
+            await vector_model.drop_partition(db, project_id)
+            await db.execute(delete(Project).where(Project.id == project_id))
+            await db.commit()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,167 @@
+"""
+ANN index benchmark: IVFFlat vs HNSW latency and recall@k.
+
+For each size, fills a scratch UNLOGGED table with clustered, normalized
+synthetic 768-d vectors (streamed in blocks, so exact top-k ground truth is
+computed in numpy along the way), then for each index type:
+  * builds the index (IVFFlat lists follow pgvector's rows/1000 - sqrt(rows)
+    guidance; HNSW uses HNSW_M / HNSW_EF_CONSTRUCTION)
+  * runs the queries at each recall target with the per-query settings
+    VectorModel would apply, reporting p50/p95 latency and recall@k
+The scratch table is dropped afterwards. Large sizes need a lot of disk and
+`--maintenance-work-mem` for reasonable build times:
+
+    python benchmarks/vector_index.py --sizes 100000,1000000,5000000 --queries 200
+"""
+import argparse
+import asyncio
+import math
+import statistics
+import struct
+import sys
+import time
+from pathlib import Path
+
+import asyncpg
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import routes  # noqa: F401,E402  (resolves the models <-> routes import cycle)
+from helpers.config import settings  # noqa: E402
+from models.postgres.VectorsModel import search_params  # noqa: E402
+
+BLOCK = 50_000
+
+
+def ivfflat_lists(rows: int) -> int:
+    return max(10, rows // 1000) if rows <= 1_000_000 else int(math.sqrt(rows))
+
+
+def encode_vector(v) -> bytes:
+    # pgvector binary format: uint16 dim, uint16 unused, dim x float32 (big-endian)
+    return struct.pack(">HH", len(v), 0) + np.asarray(v, dtype=">f4").tobytes()
+
+
+def decode_vector(data: bytes):
+    dim, _ = struct.unpack_from(">HH", data)
+    return np.frombuffer(data, dtype=">f4", count=dim, offset=4)
+
+
+class Corpus:
+    """Gaussian clusters on the unit sphere, generated deterministically block by block."""
+
+    def __init__(self, dim: int, clusters: int, spread: float = 1.0, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        self.dim = dim
+        self.spread = spread
+        self.centers = self._normalize(rng.standard_normal((clusters, dim)).astype(np.float32))
+        self.seed = seed
+
+    @staticmethod
+    def _normalize(x):
+        return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+    def sample(self, n: int, rng) -> np.ndarray:
+        centers = self.centers[rng.integers(0, len(self.centers), n)]
+        # Noise of norm ~`spread` around each center
+        noise = rng.standard_normal((n, self.dim)).astype(np.float32) * (self.spread / math.sqrt(self.dim))
+        return self._normalize(centers + noise)
+
+    def blocks(self, rows: int):
+        rng = np.random.default_rng(self.seed + 1)
+        for start in range(0, rows, BLOCK):
+            yield start, self.sample(min(BLOCK, rows - start), rng)
+
+
+async def load(conn, table: str, corpus: Corpus, rows: int, queries: np.ndarray, k: int):
+    """COPY the corpus into `table`, returning the exact top-k ids per query."""
+    await conn.execute(f"DROP TABLE IF EXISTS {table}")
+    await conn.execute(f"CREATE UNLOGGED TABLE {table} (id int PRIMARY KEY, embedding vector({corpus.dim}))")
+    best_ids = np.zeros((len(queries), 0), dtype=np.int64)
+    best_sims = np.zeros((len(queries), 0), dtype=np.float32)
+    started = time.perf_counter()
+    for start, block in corpus.blocks(rows):
+        await conn.copy_records_to_table(
+            table, columns=["id", "embedding"],
+            records=[(start + i, v) for i, v in enumerate(block)],
+        )
+        sims = queries @ block.T
+        ids = np.broadcast_to(np.arange(start, start + len(block)), sims.shape)
+        all_sims = np.concatenate([best_sims, sims], axis=1)
+        all_ids = np.concatenate([best_ids, ids], axis=1)
+        top = np.argsort(-all_sims, axis=1)[:, :k]
+        best_sims = np.take_along_axis(all_sims, top, axis=1)
+        best_ids = np.take_along_axis(all_ids, top, axis=1)
+    await conn.execute(f"ANALYZE {table}")
+    print(f"  loaded {rows} vectors in {time.perf_counter() - started:.1f}s")
+    return [set(row) for row in best_ids.tolist()]
+
+
+async def run_index(conn, table: str, index_type: str, rows: int, queries, truth, k: int, recall_targets):
+    settings.VECTOR_INDEX_TYPE = index_type
+    if index_type == "hnsw":
+        with_clause = f"m = {settings.HNSW_M}, ef_construction = {settings.HNSW_EF_CONSTRUCTION}"
+    else:
+        settings.IVFFLAT_LISTS = ivfflat_lists(rows)
+        with_clause = f"lists = {settings.IVFFLAT_LISTS}"
+
+    started = time.perf_counter()
+    await conn.execute(
+        f"CREATE INDEX {table}_ann ON {table} USING {index_type} (embedding vector_cosine_ops) WITH ({with_clause})"
+    )
+    print(f"  {index_type:<7} ({with_clause}) built in {time.perf_counter() - started:.1f}s")
+
+    for target in recall_targets:
+        params = search_params(target, k)
+        latencies, recalls = [], []
+        async with conn.transaction():
+            for name, value in params.items():
+                await conn.execute("SELECT set_config($1, $2, true)", name, str(value))
+            for query, expected in zip(queries, truth):
+                start = time.perf_counter()
+                found = await conn.fetch(
+                    f"SELECT id FROM {table} ORDER BY embedding <=> $1 LIMIT {k}", query
+                )
+                latencies.append(time.perf_counter() - start)
+                recalls.append(len(expected & {r["id"] for r in found}) / k)
+        latencies.sort()
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(f"    target={target:<5} {params}  p50={statistics.median(latencies) * 1000:7.2f}ms "
+              f"p95={p95 * 1000:7.2f}ms recall@{k}={statistics.mean(recalls):.3f}")
+
+    await conn.execute(f"DROP INDEX {table}_ann")
+
+
+async def main(args):
+    conn = await asyncpg.connect(
+        user=settings.POSTGRES_USER, password=settings.POSTGRES_PASSWORD, database=settings.POSTGRES_DB,
+        host=settings.POSTGRES_HOST, port=settings.POSTGRES_PORT,
+    )
+    await conn.set_type_codec("vector", schema="public", encoder=encode_vector, decoder=decode_vector, format="binary")
+    await conn.execute(f"SET maintenance_work_mem = '{args.maintenance_work_mem}'")
+    corpus = Corpus(args.dim, args.clusters)
+    queries = corpus.sample(args.queries, np.random.default_rng(12345))
+    recall_targets = [float(t) for t in args.recall_targets.split(",")]
+    table = "bench_vector_index"
+    try:
+        for rows in (int(s) for s in args.sizes.split(",")):
+            print(f"size={rows}")
+            truth = await load(conn, table, corpus, rows, queries, args.k)
+            for index_type in ("ivfflat", "hnsw"):
+                await run_index(conn, table, index_type, rows, queries, truth, args.k, recall_targets)
+    finally:
+        await conn.execute(f"DROP TABLE IF EXISTS {table}")
+        await conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100000,1000000,5000000")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--clusters", type=int, default=1000)
+    parser.add_argument("--recall-targets", default="0.9,0.95,0.99")
+    parser.add_argument("--maintenance-work-mem", default="1GB")
+    asyncio.run(main(parser.parse_args()))
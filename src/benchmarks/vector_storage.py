@@ -0,0 +1,122 @@
+"""
+Vector storage benchmark: full vs halfvec vs binary ANN indexes.
+
+Loads the same clustered synthetic corpus as vector_index.py into a scratch
+UNLOGGED table (exact top-k ground truth computed in numpy), then for each
+storage mode of VECTOR_STORAGES:
+  * builds the partition-style ANN index over that representation
+    (VECTOR_INDEX_TYPE, with the HNSW / IVFFlat settings)
+  * reports build time and index size next to the table size and
+    shared_buffers
+  * runs the queries the way VectorModel does, so quantized modes fetch
+    k * VECTOR_RESCORE_FACTOR_* candidates and re-rank them by full-precision
+    distance, reporting p50/p95 latency and recall@k
+halfvec and binary need pgvector >= 0.7 and are skipped on older versions.
+The scratch table is dropped afterwards.
+
+    python benchmarks/vector_storage.py --rows 1000000 --queries 200
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import asyncpg
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import routes  # noqa: F401,E402  (resolves the models <-> routes import cycle)
+from helpers.config import settings  # noqa: E402
+from models.postgres.tables_schema.tables import VECTOR_STORAGES, vector_index_options  # noqa: E402
+from models.postgres.VectorsModel import (  # noqa: E402
+    QUANTIZED_STORAGE_MIN_VERSION, rescore_candidates, search_params,
+)
+from vector_index import Corpus, decode_vector, encode_vector, ivfflat_lists, load  # noqa: E402
+
+
+def query_sql(table: str, storage: str, dim: int, k: int) -> str:
+    if storage == "full":
+        return f"SELECT id FROM {table} ORDER BY embedding <=> $1 LIMIT {k}"
+    if storage == "halfvec":
+        order = f"embedding::halfvec({dim}) <=> $1::vector::halfvec({dim})"
+    else:
+        order = f"binary_quantize(embedding)::bit({dim}) <~> binary_quantize($1::vector)"
+    return (
+        f"SELECT id FROM (SELECT id, embedding FROM {table} ORDER BY {order} "
+        f"LIMIT {rescore_candidates(k, storage)}) candidates ORDER BY embedding <=> $1 LIMIT {k}"
+    )
+
+
+async def run_storage(conn, table: str, storage: str, queries, truth, k: int, recall_target: float, dim: int):
+    expression, opclass = VECTOR_STORAGES[storage]
+    options = vector_index_options()
+    params = ", ".join(f"{key} = {value}" for key, value in options["postgresql_with"].items())
+    started = time.perf_counter()
+    await conn.execute(
+        f"CREATE INDEX {table}_ann ON {table} USING {options['postgresql_using']} ({expression} {opclass}) WITH ({params})"
+    )
+    build = time.perf_counter() - started
+    index_size = await conn.fetchval(f"SELECT pg_size_pretty(pg_relation_size('{table}_ann'))")
+
+    sql = query_sql(table, storage, dim, k)
+    latencies, recalls = [], []
+    async with conn.transaction():
+        for name, value in search_params(recall_target, rescore_candidates(k, storage)).items():
+            await conn.execute("SELECT set_config($1, $2, true)", name, str(value))
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            found = await conn.fetch(sql, query)
+            latencies.append(time.perf_counter() - start)
+            recalls.append(len(expected & {r["id"] for r in found}) / k)
+    latencies.sort()
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"  {storage:<8} index={index_size:>9} build={build:6.1f}s  p50={statistics.median(latencies) * 1000:7.2f}ms "
+          f"p95={p95 * 1000:7.2f}ms recall@{k}={statistics.mean(recalls):.3f}")
+    await conn.execute(f"DROP INDEX {table}_ann")
+
+
+async def main(args):
+    conn = await asyncpg.connect(
+        user=settings.POSTGRES_USER, password=settings.POSTGRES_PASSWORD, database=settings.POSTGRES_DB,
+        host=settings.POSTGRES_HOST, port=settings.POSTGRES_PORT,
+    )
+    await conn.set_type_codec("vector", schema="public", encoder=encode_vector, decoder=decode_vector, format="binary")
+    await conn.execute(f"SET maintenance_work_mem = '{args.maintenance_work_mem}'")
+    version = await conn.fetchval("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+    storages = ["full"]
+    if tuple(int(part) for part in version.split(".")[:2]) >= QUANTIZED_STORAGE_MIN_VERSION:
+        storages += ["halfvec", "binary"]
+    else:
+        print(f"pgvector {version}: halfvec / binary need 0.7+, measuring full only")
+
+    if settings.VECTOR_INDEX_TYPE == "ivfflat":
+        settings.IVFFLAT_LISTS = ivfflat_lists(args.rows)
+    corpus = Corpus(args.dim, args.clusters)
+    queries = corpus.sample(args.queries, np.random.default_rng(12345))
+    table = "bench_vector_storage"
+    try:
+        print(f"rows={args.rows} index={settings.VECTOR_INDEX_TYPE} recall_target={args.recall_target}")
+        truth = await load(conn, table, corpus, args.rows, queries, args.k)
+        table_size = await conn.fetchval(f"SELECT pg_size_pretty(pg_table_size('{table}'))")
+        shared_buffers = await conn.fetchval("SHOW shared_buffers")
+        print(f"  table={table_size} shared_buffers={shared_buffers}")
+        for storage in storages:
+            await run_storage(conn, table, storage, queries, truth, args.k, args.recall_target, args.dim)
+    finally:
+        await conn.execute(f"DROP TABLE IF EXISTS {table}")
+        await conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--clusters", type=int, default=1000)
+    parser.add_argument("--recall-target", type=float, default=settings.VECTOR_RECALL_TARGET)
+    parser.add_argument("--maintenance-work-mem", default="1GB")
+    asyncio.run(main(parser.parse_args()))
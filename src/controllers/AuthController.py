@@ -1,6 +1,8 @@
 from datetime import datetime, timezone
 from sqlalchemy import select
-from helpers.security import verify_password, create_access_token, create_refresh_token, decode_token
+from helpers.password_pool import verify_password_async
+from helpers.security import create_access_token, create_refresh_token, decode_token, user_claims
+from helpers.user_cache import user_cache
 from models.postgres.AuthModel import AuthModel
 from models.postgres.ProjectsModel import ProjectModel
 from models.postgres.operations_schema.projects import ProjectSearch
@@ -29,13 +31,13 @@ class AuthController:
     async def login(self, db, user):
         logger.info(f"Login attempt for username={user.username}")
         db_user = await auth_model.get_user_by_username(db, user.username)
-        if not db_user or not verify_password(user.password, db_user.hashed_password):
+        if not db_user or not await verify_password_async(user.password, db_user.hashed_password):
             logger.warning(f"Invalid login for username={user.username}")
             raise InvalidCredentials()
 
         await auth_model.remove_token(db, db_user.id)
 
-        access_token = create_access_token({"sub": str(db_user.id)})
+        access_token = create_access_token(user_claims(db_user))
         refresh_token = create_refresh_token(db_user.id)
         await auth_model.store_refresh_token(db, db_user.id, refresh_token)
 
@@ -57,13 +59,19 @@ class AuthController:
             logger.warning("Expired or revoked refresh token")
             raise TokenError("Expired or revoked refresh token")
 
-        new_access = create_access_token({"sub": token_data.get("sub")})
+        user = await auth_model.get_user_by_id(db, token_data.get("sub"))
+        if not user:
+            logger.warning("Refresh token for unknown user")
+            raise TokenError("Invalid refresh token")
+
+        new_access = create_access_token(user_claims(user))
         logger.info("Access token refreshed successfully")
         return {"data": {"access_token": new_access, "token_type": "bearer"}, "message": "Token refreshed successfully"}
 
     async def logout(self, db, current_user):
         logger.info(f"Logout attempt user_id={current_user['id']}")
         await auth_model.remove_token(db, current_user["id"])
+        user_cache.invalidate(current_user["id"])
         logger.info(f"User {current_user['id']} logged out successfully")
         return {"data": None, "message": "Logged out successfully"}
 
@@ -1,56 +1,113 @@
+import asyncio
 import hashlib
 import magic
+import os
 import re
+import tempfile
+import time
 from pathlib import Path
-from typing import List
+from typing import Awaitable, Callable, List, Optional
 from uuid import UUID
 
 from fastapi import UploadFile
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from .BaseController import BaseController
 from models.postgres.operations_schema.projects import ProjectSearch
 from models.postgres.DocumentsModel import DocumentsModel
-from models.postgres.VectorsModel import VectorModel
 from models.postgres.ProjectsModel import ProjectModel
+from models.postgres.BulkLoadModel import BulkLoadModel
 from models.postgres.ChunksModel import ChunksModel
-from models.postgres.operations_schema import VectorInsertItems
+from models.postgres.VectorsModel import VectorModel
 from models.postgres.operations_schema.documents import DocumentInsert, DocumentInsertBulk, DocumentSearch, DocumentDelete
 from models.postgres.operations_schema.chunks import ChunkInsert
+from models.memmap.MemmapIndexModel import MemmapIndexModel
 from routes.schemes.documents import DocumentDelRequest
+from llm.EmbeddingCache import EmbeddingCache
+from llm.EmbeddingBatcher import EmbeddingBatcher
 from helpers import settings
+from helpers.db_connection import async_session
 from helpers.logger import get_logger
+from helpers.pdf_parser import load_and_chunk_pdf
+from helpers.process_pool import get_process_pool
 
 logger = get_logger("DocumentsController")
 
+# progress(file_name, update) hook used by ingestion jobs
+ProgressCallback = Callable[[str, dict], Awaitable[None]]
+
+# Process-wide so the LRU front survives across requests
+embedding_cache = EmbeddingCache()
+memmap_index = MemmapIndexModel()
+
 
 class DocumentsController(BaseController):
     def __init__(self):
         super().__init__()
         self.max_file_size_bytes = settings.MAX_FILE_SIZE_MB * 1024 * 1024
         self.allowed_mime_types = settings.ALLOWED_MIME_TYPES
+        self.upload_block_size = settings.UPLOAD_BLOCK_SIZE_KB * 1024
+        self.mime = magic.Magic(mime=True)
         self.ASSETS_DIR = Path("assets")
 
     # ------------------------- Helpers -------------------------
-    def validate_content_type(self, file: UploadFile) -> str:
-        mime = magic.Magic(mime=True)
-        content_type = mime.from_buffer(file.file.read(1024))
-        file.file.seek(0)
-
-        if content_type not in self.allowed_mime_types:
-            raise ValueError(f"[FAIL] File '{file.filename}' type '{content_type}' not allowed.")
-        return content_type
-
-    def validate_file_size(self, file: UploadFile) -> int:
-        file_size = 0
-        while chunk := file.file.read(1024):
-            file_size += len(chunk)
-            if file_size > self.max_file_size_bytes:
-                raise ValueError(f"[FAIL] '{file.filename}' exceeds {settings.MAX_FILE_SIZE_MB} MB limit.")
-        file.file.seek(0)
-        return file_size
+    async def _refresh_memmap(self, db: AsyncSession, project):
+        """
+        Bring a memmap-backed project's matrix in line with its live vectors
+        (no-op if unchanged). A failure is only logged: the change itself is
+        stored, and the next search rebuilds the stale matrix.
+        """
+        if project.retrieval_backend != "memmap":
+            return
+        try:
+            await memmap_index.refresh(db, project.id)
+        except Exception as e:
+            await db.rollback()
+            logger.exception(f"Memmap refresh failed for project '{project.name}': {e}")
+
+    async def _index_partition(self, db: AsyncSession, project):
+        """Build the project's deferred ANN index once it has enough vectors; retried on the next load if it fails."""
+        try:
+            await VectorModel().ensure_partition_index(db, project.id, project.vector_storage)
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Deferred ANN index for project '{project.name}' not built: {e}")
+
+    async def stream_to_disk(self, file: UploadFile, project_path: Path, name: str) -> dict:
+        """
+        Single streaming pass over an upload: sniff the MIME type from the
+        first block, enforce the size limit, hash incrementally and write to a
+        temp file next to the destination (writes run off the event loop).
+        Memory use is one block regardless of file size.
+
+        Returns the temp path plus size/type/sha256; the caller moves the temp
+        file into place with `os.replace` once the document row exists.
+        """
+        sha256 = hashlib.sha256()
+        size, content_type = 0, None
+        fd, tmp_name = tempfile.mkstemp(dir=project_path, prefix=f".{name}.", suffix=".part")
+        tmp_path = Path(tmp_name)
+        fp = os.fdopen(fd, "wb")
+        try:
+            while block := await file.read(self.upload_block_size):
+                if content_type is None:
+                    content_type = self.mime.from_buffer(block[:2048])
+                    if content_type not in self.allowed_mime_types:
+                        raise ValueError(f"[FAIL] File '{file.filename}' type '{content_type}' not allowed.")
+                size += len(block)
+                if size > self.max_file_size_bytes:
+                    raise ValueError(f"[FAIL] '{file.filename}' exceeds {settings.MAX_FILE_SIZE_MB} MB limit.")
+                sha256.update(block)
+                await asyncio.to_thread(fp.write, block)
+            if content_type is None:
+                raise ValueError(f"[FAIL] File '{file.filename}' is empty.")
+            await asyncio.to_thread(fp.close)
+        except BaseException:
+            fp.close()
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+        return {"tmp_path": tmp_path, "size": size, "type": content_type, "sha256": sha256.hexdigest()}
 
     def validate_filename(self, filename: str) -> str:
         name = Path(filename).name
@@ -58,30 +115,23 @@ class DocumentsController(BaseController):
             raise ValueError(f"[FAIL] Invalid filename '{filename}'. Only letters, digits, underscores allowed.")
         return name
     
-    def load_and_chunk_pdf(self, project_name: str, file_name: str, chunk_size: int = 1000, chunk_overlap: int = 150):
+    def _pdf_path(self, project_name: str, file_name: str) -> Path:
         pdf_path =  self.ASSETS_DIR/project_name/file_name
         if not pdf_path.exists():
             raise FileNotFoundError(f"File not found: {file_name} in project {project_name}")
+        return pdf_path
 
-        loader = PyPDFLoader(str(pdf_path))
-        docs = loader.load()
-
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap)
-        chunks = splitter.split_documents(docs)
-
-        chunked_data = []
-        for idx, chunk in enumerate(chunks):
-            page_number = chunk.metadata.get("page", 0) + 1 
-
-            chunked_data.append({
-                "chunk_order": idx,
-                "page_number": page_number,
-                "text": chunk.page_content.strip()
-            })
+    def load_and_chunk_pdf(self, project_name: str, file_name: str, chunk_size: int = 1000, chunk_overlap: int = 150):
+        return load_and_chunk_pdf(str(self._pdf_path(project_name, file_name)), chunk_size, chunk_overlap)
 
-        return chunked_data
+    async def aload_and_chunk_pdf(self, project_name: str, file_name: str, chunk_size: int = 1000, chunk_overlap: int = 150):
+        """
+        Same as `load_and_chunk_pdf`, but runs in the shared process pool so
+        parsing never blocks the event loop and several files use several cores.
+        """
+        pdf_path = str(self._pdf_path(project_name, file_name))
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_process_pool(), load_and_chunk_pdf, pdf_path, chunk_size, chunk_overlap)
 
     # ------------------------- Upload Documents -------------------------
     async def upload_docs(self, db: AsyncSession, project_name: str, files: List[UploadFile]):
@@ -90,38 +140,61 @@ class DocumentsController(BaseController):
         if not project:
             raise ValueError(f"Project '{project_name}' does not exist")
 
-        names, sizes, types = [], [], []
-        duplicates = []
+        timings = {}
+        names = [self.validate_filename(f.filename) for f in files]
 
-        for f in files:
-            sizes.append(self.validate_file_size(f))
-            types.append(self.validate_content_type(f))
-            name = self.validate_filename(f.filename)
+        # 1️⃣ One lookup for every name instead of a query per file
+        started = time.perf_counter()
+        existing = await DocumentsModel().find_existing_filenames(db, project.id, names)
+        timings["lookup"] = round(time.perf_counter() - started, 3)
 
-            # check duplicate
-            exists = await DocumentsModel().search_document(db, DocumentSearch(project_id=project.id, filename=name))
-            if exists:
+        duplicates, uploads = [], {}
+        for name, f in zip(names, files):
+            if name in existing or name in uploads:
                 duplicates.append(name)
             else:
-                names.append(name)
+                uploads[name] = f
 
-        if not names:
+        if not uploads:
             raise ValueError(f"All uploaded files already exist: {', '.join(duplicates)}")
 
         project_path = self.ASSETS_DIR / project_name
         project_path.mkdir(parents=True, exist_ok=True)
 
-        for i, name in enumerate(names):
-            file_path = project_path / name
-            with file_path.open("wb") as fp:
-                fp.write(await files[i].read())
+        staged = {}
+        try:
+            # 2️⃣ Stream each new file to a temp file
+            started = time.perf_counter()
+            for name, f in uploads.items():
+                staged[name] = await self.stream_to_disk(f, project_path, name)
+            timings["streaming"] = round(time.perf_counter() - started, 3)
+
+            # 3️⃣ Insert all rows; conflicts (concurrent uploads of the same name) come back as missing rows
+            started = time.perf_counter()
+            docs = [
+                DocumentInsert(filename=name, metadata={"size": info["size"], "type": info["type"], "sha256": info["sha256"]})
+                for name, info in staged.items()
+            ]
+            bulk_docs = DocumentInsertBulk(project_id=project.id, documents=docs)
+            inserted_docs = await DocumentsModel().insert_documents_bulk(db, bulk_docs)
+            timings["insert"] = round(time.perf_counter() - started, 3)
 
-        docs = [
-            DocumentInsert(filename=name, metadata={"size": sizes[i], "type": types[i]})
-            for i, name in enumerate(names)
-        ]
-        bulk_docs = DocumentInsertBulk(project_id=project.id, documents=docs)
-        inserted_docs = await DocumentsModel().insert_documents_bulk(db, bulk_docs)
+            inserted_names = {doc.filename for doc in inserted_docs}
+            duplicates.extend(name for name in staged if name not in inserted_names)
+
+            # 4️⃣ Atomic publish: the file only appears under its final name once fully written and recorded
+            started = time.perf_counter()
+            for name in inserted_names:
+                os.replace(staged[name]["tmp_path"], project_path / name)
+            timings["publish"] = round(time.perf_counter() - started, 3)
+        finally:
+            for info in staged.values():
+                info["tmp_path"].unlink(missing_ok=True)
+
+        logger.info(f"Upload to '{project_name}': {len(inserted_docs)} new, {len(duplicates)} duplicate(s), timings={timings}")
+
+        if not inserted_docs:
+            raise ValueError(f"All uploaded files already exist: {', '.join(duplicates)}")
 
         msg = f"Uploaded {len(inserted_docs)} file(s) successfully"
         if duplicates:
@@ -131,53 +204,236 @@ class DocumentsController(BaseController):
 
 
     # ------------------------- Process Documents -------------------------
-    async def process_docs(self, db: AsyncSession, client, project_name: str, file_names: List[str], chunk_size: int = 1000, chunk_overlap: int = 150):
+    async def process_docs(self, db: AsyncSession, client, project_name: str, file_names: List[str], chunk_size: int = 1000, chunk_overlap: int = 150,
+                           progress: Optional[ProgressCallback] = None, continue_on_error: bool = False,
+                           concurrency: Optional[int] = None):
+        """
+        Parse, chunk, embed and store each file.
+
+        `progress(file_name, update)` is awaited whenever a file changes stage,
+        finishes or fails. With `continue_on_error`, a failing file is reported
+        and skipped instead of aborting the whole batch.
+
+        With `concurrency` > 1 (default `PROCESS_CONCURRENCY`) files go through
+        a pipeline: parsing, embedding and storing run as separate stages joined
+        by bounded queues, each with `concurrency` workers, so one file can be
+        embedded while the next is parsed and the previous one stored.
+        """
         project_search = ProjectSearch(name=project_name)
         project = await ProjectModel().search_by_name(db, project_search)
         if not project:
             raise ValueError(f"Project '{project_name}' does not exist")
 
-        updated_docs = []
-
-        for file_name in file_names:
-            doc = await self.get_by_project_id_and_filename(db, project.id, file_name)
-            if not doc:
-                raise ValueError(f"File '{file_name}' not found")
-            if doc["data"].is_flushed:
-                raise ValueError(f"File '{file_name}' is flushed. Re-upload to process.")
-            if doc["data"].is_processed:
-                await ChunksModel().delete_chunks_by_document_id(db, doc["data"].id)
-
-            chunks = self.load_and_chunk_pdf(project_name, file_name, chunk_size, chunk_overlap)
-            insert_chunks = [
-                ChunkInsert(
-                    document_id=doc["data"].id,
-                    text=chunk["text"],
-                    metadata_json={
-                        "filename": file_name,
-                        "page_number": chunk["page_number"],
-                        "chunk_order": chunk["chunk_order"]
-                    },
-                )
-                for chunk in chunks
-            ]
-
-            await ChunksModel().delete_chunks_by_document_id(db, doc["data"].id)
-            done_chunks = await ChunksModel().insert_chunks(db, insert_chunks)
-
-            chunk_texts = [c.text for c in done_chunks]
-            chunk_ids = [c.id for c in done_chunks]
-
-            vectors = client.embed(chunk_texts)
-            vectors_data = VectorInsertItems(
-                project_id=project.id, document_id=doc["data"].id, chunk_id=chunk_ids, vectors=vectors
+        concurrency = concurrency or settings.PROCESS_CONCURRENCY
+        params = (project, project_name, chunk_size, chunk_overlap)
+        # Only reads so far; don't keep a connection idle in a transaction while files are processed
+        await db.commit()
+        try:
+            if concurrency > 1:
+                results, failed = await self._process_pipelined(client, params, file_names, progress, continue_on_error, concurrency)
+            else:
+                results, failed = await self._process_sequential(db, client, params, file_names, progress, continue_on_error)
+        finally:
+            # Files stored before a failure are live too; a session of its own in case `db` is unusable
+            async with async_session() as refresh_db:
+                await self._refresh_memmap(refresh_db, project)
+                await self._index_partition(refresh_db, project)
+
+        cache_stats = {"total": 0, "memory_hits": 0, "db_hits": 0, "misses": 0}
+        for item in results:
+            for key in cache_stats:
+                cache_stats[key] += item["stats"][key]
+        unique = cache_stats["memory_hits"] + cache_stats["db_hits"] + cache_stats["misses"]
+        cache_stats["hit_rate"] = round((unique - cache_stats["misses"]) / unique, 4) if unique else 0.0
+
+        data = {
+            "documents": [item["document"] for item in results],
+            "timings": {item["file_name"]: item["timings"] for item in results},
+            "changes": {item["file_name"]: item["changes"] for item in results},
+            "embedding_cache": cache_stats,
+        }
+        if continue_on_error:
+            data["failed"] = failed
+        return {"message": f"Processed {len(results)} file(s) successfully", "data": data}
+
+    async def _process_sequential(self, db: AsyncSession, client, params: tuple, file_names: List[str],
+                                  progress: Optional[ProgressCallback], continue_on_error: bool):
+        project, project_name, chunk_size, chunk_overlap = params
+        results, failed = [], []
+
+        # Parse every file up front in the process pool; each file's DB and
+        # embedding work then only waits for its own parse to finish.
+        parsing = {
+            name: asyncio.ensure_future(self.aload_and_chunk_pdf(project_name, name, chunk_size, chunk_overlap))
+            for name in dict.fromkeys(file_names)
+        }
+        try:
+            for file_name in file_names:
+                item = {"file_name": file_name, "timings": {}}
+                try:
+                    await self._prepare_doc(db, project, item, lambda: parsing[file_name], progress)
+                    await self._embed_doc(db, client, item, progress)
+                    await self._store_doc(db, project, item, progress)
+                except Exception as e:
+                    await db.rollback()
+                    await self._report_failure(project_name, item, e, progress, failed, continue_on_error)
+                    continue
+                results.append(item)
+        finally:
+            for task in parsing.values():
+                task.cancel()
+            await asyncio.gather(*parsing.values(), return_exceptions=True)
+
+        return results, failed
+
+    async def _process_pipelined(self, client, params: tuple, file_names: List[str],
+                                 progress: Optional[ProgressCallback], continue_on_error: bool, concurrency: int):
+        project, project_name, chunk_size, chunk_overlap = params
+        results, failed = [], []
+
+        pending = asyncio.Queue()
+        for name in dict.fromkeys(file_names):
+            pending.put_nowait(name)
+        # Bounded, so a fast stage cannot run far ahead of a slow one
+        to_embed = asyncio.Queue(maxsize=concurrency)
+        to_store = asyncio.Queue(maxsize=concurrency)
+
+        # Stage workers run side by side, so each opens its own session per file.
+        # A session only holds a connection during its DB steps, not across the parse
+        # or the provider call, so idle workers don't tie up the pool shared with the API.
+        async def parse_worker():
+            while not pending.empty():
+                item = {"file_name": pending.get_nowait(), "timings": {}}
+                try:
+                    async with async_session() as db:
+                        await self._prepare_doc(db, project, item, lambda: self.aload_and_chunk_pdf(
+                            project_name, item["file_name"], chunk_size, chunk_overlap
+                        ), progress)
+                except Exception as e:
+                    await self._report_failure(project_name, item, e, progress, failed, continue_on_error)
+                    continue
+                await to_embed.put(item)
+
+        async def embed_worker():
+            while (item := await to_embed.get()) is not None:
+                try:
+                    async with async_session() as db:
+                        await self._embed_doc(db, client, item, progress)
+                except Exception as e:
+                    await self._report_failure(project_name, item, e, progress, failed, continue_on_error)
+                    continue
+                await to_store.put(item)
+
+        async def store_worker():
+            while (item := await to_store.get()) is not None:
+                try:
+                    async with async_session() as db:
+                        await self._store_doc(db, project, item, progress)
+                except Exception as e:
+                    await self._report_failure(project_name, item, e, progress, failed, continue_on_error)
+                    continue
+                results.append(item)
+
+        async def run_stage(workers: List[asyncio.Task], downstream: asyncio.Queue, downstream_workers: int):
+            # Once a stage drains, one sentinel per downstream worker shuts the next stage down
+            await asyncio.gather(*workers)
+            for _ in range(downstream_workers):
+                await downstream.put(None)
+
+        parsers = [asyncio.create_task(parse_worker()) for _ in range(concurrency)]
+        embedders = [asyncio.create_task(embed_worker()) for _ in range(concurrency)]
+        storers = [asyncio.create_task(store_worker()) for _ in range(concurrency)]
+        tasks = parsers + embedders + storers
+        try:
+            await asyncio.gather(
+                run_stage(parsers, to_embed, len(embedders)),
+                run_stage(embedders, to_store, len(storers)),
+                *storers,
             )
-            await VectorModel().insert_vectors(db, vectors_data)
-
-            updated_doc = await DocumentsModel().update_document(db, doc["data"].id)
-            updated_docs.append(updated_doc)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        # Keep the caller's file order in the response
+        order = {name: i for i, name in enumerate(file_names)}
+        results.sort(key=lambda item: order[item["file_name"]])
+        return results, failed
+
+    async def _report_failure(self, project_name: str, item: dict, error: Exception, progress: Optional[ProgressCallback],
+                              failed: list, continue_on_error: bool):
+        file_name = item["file_name"]
+        logger.error(f"Failed to process '{file_name}' in project '{project_name}': {error}")
+        if progress:
+            await progress(file_name, {"status": "failed", "error": str(error), "timings": item["timings"]})
+        if not continue_on_error:
+            raise error
+        failed.append({"filename": file_name, "error": str(error)})
+
+    async def _stage(self, item: dict, name: str, progress: Optional[ProgressCallback]):
+        if progress:
+            await progress(item["file_name"], {"status": "running", "stage": name, "timings": item["timings"]})
+
+    async def _prepare_doc(self, db: AsyncSession, project, item: dict, parse: Callable[[], Awaitable[list]],
+                           progress: Optional[ProgressCallback] = None):
+        file_name = item["file_name"]
+        doc = await self.get_by_project_id_and_filename(db, project.id, file_name)
+        if not doc["data"]:
+            raise ValueError(f"File '{file_name}' not found")
+        if doc["data"].is_flushed:
+            raise ValueError(f"File '{file_name}' is flushed. Re-upload to process.")
+
+        # The parse can take seconds; give the connection back to the pool meanwhile
+        await db.commit()
+        await self._stage(item, "parsing", progress)
+        started = time.perf_counter()
+        chunks = await parse()
+        item["timings"]["parsing"] = round(time.perf_counter() - started, 3)
+
+        item["document_id"] = doc["data"].id
+        item["chunks"] = [
+            ChunkInsert(
+                document_id=doc["data"].id,
+                text=chunk["text"],
+                metadata_json={
+                    "filename": file_name,
+                    "page_number": chunk["page_number"],
+                    "chunk_order": chunk["chunk_order"]
+                },
+                chunk_order=chunk["chunk_order"],
+                content_hash=EmbeddingCache.content_hash(chunk["text"]),
+            )
+            for chunk in chunks
+        ]
 
-        return {"message": f"Processed {len(updated_docs)} file(s) successfully", "data": updated_docs}
+    async def _embed_doc(self, db: AsyncSession, client, item: dict, progress: Optional[ProgressCallback] = None):
+        await self._stage(item, "embedding", progress)
+        started = time.perf_counter()
+        # Chunks the document already has keep their vectors; only new content is embedded
+        existing = await ChunksModel().get_latest_hashes(db, item["document_id"])
+        new_texts = {c.content_hash: c.text for c in item["chunks"] if c.content_hash not in existing}
+        # Cache misses are sent in token-bounded batches, several in flight at once
+        vectors, item["stats"] = await embedding_cache.embed(db, EmbeddingBatcher(client), list(new_texts.values()))
+        item["vectors"] = dict(zip(new_texts.keys(), vectors))
+        item["timings"]["embedding"] = round(time.perf_counter() - started, 3)
+
+    async def _store_doc(self, db: AsyncSession, project, item: dict, progress: Optional[ProgressCallback] = None):
+        # Only the difference is staged under a new generation, then swapped in atomically
+        await self._stage(item, "storing", progress)
+        started = time.perf_counter()
+        item["document"], item["changes"] = await BulkLoadModel().load_document(
+            db, project.id, item["document_id"], item["chunks"], item["vectors"]
+        )
+        item["timings"]["storing"] = round(time.perf_counter() - started, 3)
+
+        if progress:
+            await progress(item["file_name"], {
+                "status": "succeeded", "stage": "done", "timings": item["timings"],
+                "chunks": len(item["chunks"]), "changes": item["changes"],
+            })
+        # Chunks and vectors are not needed past this point
+        item.pop("chunks")
+        item.pop("vectors")
 
     # ------------------------- Get Document -------------------------
     async def get_by_project_id_and_filename(self, db: AsyncSession, project_id: UUID, filename: str):
@@ -217,6 +473,7 @@ class DocumentsController(BaseController):
             file_path.unlink()
 
         deleted_doc = await DocumentsModel().del_document(db, doc_data)
+        await self._refresh_memmap(db, project)
         return {"message": f"Deleted document '{del_data.filename}'", "data": deleted_doc}
 
     # ------------------------- Flush Documents -------------------------
@@ -235,5 +492,6 @@ class DocumentsController(BaseController):
             if doc["data"]:
                 updated_doc = await DocumentsModel().flush_document(db, doc["data"].id)
                 updated_docs.append(updated_doc)
+        await self._refresh_memmap(db, project)
 
         return {"message": f"Flushed {len(updated_docs)} document(s)", "data": updated_docs}
@@ -0,0 +1,47 @@
+from uuid import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.postgres.JobsModel import JobsModel
+from models.postgres.ProjectsModel import ProjectModel
+from models.postgres.operations_schema.jobs import JobInsert
+from models.postgres.operations_schema.projects import ProjectSearch
+from routes.schemes.documents import DocumentProcessRequest
+from routes.exceptions import JobNotFound, NotPermitted
+from helpers.logger import get_logger
+
+logger = get_logger("JobsController")
+jobs_model = JobsModel()
+project_model = ProjectModel()
+
+
+class JobsController:
+
+    async def create_process_job(self, db: AsyncSession, data: DocumentProcessRequest, current_user: dict):
+        logger.info(f"User {current_user['id']} queuing processing of {len(data.file_names)} file(s) in '{data.project_name}'")
+        project = await project_model.search_by_name(db, ProjectSearch(name=data.project_name))
+        if not project:
+            raise ValueError(f"Project '{data.project_name}' does not exist")
+        if not data.file_names:
+            raise ValueError("No files to process")
+
+        job = await jobs_model.create_job(db, JobInsert(
+            project_id=project.id,
+            user_id=current_user["id"],
+            params={
+                "project_name": data.project_name,
+                "file_names": data.file_names,
+                "chunk_size": data.chunk_size,
+                "chunk_overlap": data.chunk_overlap,
+                "concurrency": data.concurrency,
+            },
+            files={name: {"status": "queued", "stage": None, "timings": {}, "error": None} for name in data.file_names},
+        ))
+        return {"data": job, "message": f"Processing job {job.id} queued"}
+
+    async def get_job(self, db: AsyncSession, job_id: UUID, current_user: dict):
+        job = await jobs_model.get_job(db, job_id)
+        if not job:
+            raise JobNotFound(f"Job '{job_id}' not found")
+        if current_user["role"] != 0 and job.user_id != current_user["id"]:
+            logger.warning(f"User {current_user['id']} tried to read job {job_id}")
+            raise NotPermitted()
+        return {"data": job, "message": f"Job is {job.status}"}
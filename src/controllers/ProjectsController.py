@@ -1,5 +1,8 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from models.postgres.ProjectsModel import ProjectModel
+from models.postgres.VectorsModel import VectorModel
+from models.memmap.MemmapIndexModel import MemmapIndexModel
+from models.postgres.operations_schema.projects import ProjectDelete, ProjectSearch
 from routes.schemes.projects import ProjectCreateRequest, ProjectDeleteRequest, ProjectListRequest, ProjectSearchRequest, ProjectUpdateRequest
 from routes.exceptions import NotPermitted, ProjectNotFound, ProjectExists, DatabaseError
 from helpers.logger import get_logger
@@ -8,6 +11,8 @@ from pathlib import Path
 
 logger = get_logger("ProjectsController")
 project_model = ProjectModel()
+vector_model = VectorModel()
+memmap_index = MemmapIndexModel()
 
 class ProjectsController:
     ASSETS_DIR = Path("assets")  # Change if needed
@@ -18,6 +23,10 @@ class ProjectsController:
             logger.warning(f"Unauthorized create attempt by user {current_user['id']}")
             raise NotPermitted()
 
+        storage = data.vector_storage or "full"
+        if not await vector_model.supports_storage(db, storage):
+            raise ValueError(f"Vector storage '{storage}' needs pgvector 0.7 or newer")
+
         project_path = self.ASSETS_DIR / data.name
         if project_path.exists():
             logger.warning(f"Project already exists in filesystem: {data.name}")
@@ -26,12 +35,23 @@ class ProjectsController:
 
         try:
             project = await project_model.insert_project(db, data)
-            logger.info(f"Project '{data.name}' created successfully")
-            return {"data": project, "message": "Project created successfully"}
         except Exception as e:
             logger.error(f"Failed to create project '{data.name}': {e}")
+            shutil.rmtree(project_path, ignore_errors=True)
+            raise DatabaseError(str(e))
+
+        # Own vector partition + ANN index; undo the project if that fails
+        try:
+            await vector_model.create_partition(db, project.id, storage)
+        except Exception as e:
+            logger.error(f"Failed to create vector partition for project '{data.name}': {e}")
+            await project_model.del_project(db, ProjectDelete(name=data.name))
+            shutil.rmtree(project_path, ignore_errors=True)
             raise DatabaseError(str(e))
 
+        logger.info(f"Project '{data.name}' created successfully")
+        return {"data": project, "message": "Project created successfully"}
+
     async def list_projects(self, db: AsyncSession, data: ProjectListRequest):
         logger.info("Listing projects")
         try:
@@ -57,6 +77,17 @@ class ProjectsController:
             logger.warning(f"Unauthorized update attempt by user {current_user['id']}")
             raise NotPermitted()
 
+        if data.vector_storage and not await vector_model.supports_storage(db, data.vector_storage):
+            raise ValueError(f"Vector storage '{data.vector_storage}' needs pgvector 0.7 or newer")
+        previous = await project_model.search_by_name(db, ProjectSearch(name=data.old_name))
+
+        if previous and data.vector_storage and data.vector_storage != previous.vector_storage:
+            # Same stored vectors, new ANN index over the chosen representation. It is
+            # built before the column changes, so a failed build changes nothing.
+            # The concurrent build waits for open transactions, so end this one first.
+            await db.commit()
+            await vector_model.rebuild_partition_index(previous.id, data.vector_storage)
+
         if data.new_name and data.old_name != data.new_name:
             old_path = self.ASSETS_DIR / data.old_name
             new_path = self.ASSETS_DIR / data.new_name
@@ -69,6 +100,11 @@ class ProjectsController:
         if not project:
             logger.warning(f"Project '{data.old_name}' not found in database")
             raise ProjectNotFound(f"Project '{data.old_name}' not found")
+        if previous and project.retrieval_backend != previous.retrieval_backend:
+            if project.retrieval_backend == "memmap":
+                await memmap_index.refresh(db, project.id, force=True)
+            else:
+                memmap_index.drop(project.id)
         logger.info(f"Project '{data.old_name}' updated successfully")
         return {"data": project, "message": "Project updated successfully"}
 
@@ -84,6 +120,11 @@ class ProjectsController:
             logger.info(f"Filesystem for project '{data.name}' deleted")
 
         try:
+            # Dropping the partition first spares the cascade from deleting vectors row by row
+            project = await project_model.search_by_name(db, ProjectSearch(name=data.name))
+            if project:
+                await vector_model.drop_partition(db, project.id)
+                memmap_index.drop(project.id)
             deleted = await project_model.del_project(db, data)
             if not deleted:
                 logger.warning(f"Project '{data.name}' not found in database")
@@ -1,16 +1,22 @@
+import asyncio
 import base64
+import json
+import time
 from io import BytesIO
 import logging
 from uuid import UUID
-from typing import List
+from typing import AsyncIterator, List
 from gtts import gTTS
 from models.postgres.VectorsModel import VectorModel
+from models.memmap.MemmapIndexModel import MemmapIndexModel
 from models.postgres.ChunksModel import ChunksModel
 from models.postgres.ProjectsModel import ProjectModel
 from models.postgres.UserHistoryModel import UserHistoryModel
-from models.postgres.ProjectUserModel import ProjectUserModel
-from models.postgres.operations_schema.projects import ProjectSearch
 from routes.exceptions import NotPermitted
+from helpers.db_connection import async_session
+from helpers.config import settings
+from helpers.context_selection import select_context
+from llm.PromptBudget import PromptBudget
 from .BaseController import BaseController
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -19,8 +25,8 @@ logger = logging.getLogger("QueryController")
 chunk_model = ChunksModel()
 project_model = ProjectModel()
 vec_model = VectorModel()
+memmap_index = MemmapIndexModel()
 history_model = UserHistoryModel()
-project_user_model = ProjectUserModel()
 
 
 
@@ -45,6 +51,142 @@ class QueryController(BaseController):
         return 'ar' if arabic_chars > 0 else 'en'
 
 
+    @staticmethod
+    async def _timed(timings: dict, stage: str, awaitable):
+        """Await `awaitable`, recording its duration in ms as `timings[stage]`."""
+        started = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            timings[stage] = round((time.perf_counter() - started) * 1000, 3)
+
+    async def _prepare_messages(self, db: AsyncSession, user_id: UUID, embed_client, project_name: str, query: str, k: int,
+                                history_writer=None):
+        """
+        Resolve the project, check access, retrieve context and load history.
+        Returns the project, the stored history, the messages for the LLM
+        (fitted to the prompt token budget) and metadata on how the context
+        was retrieved, how many tokens each part of the prompt takes and how
+        long each stage took.
+        """
+        logger.info(f"User {user_id} querying project '{project_name}'")
+        timings = {}
+        started = time.perf_counter()
+        # Taken before reading, so a message flushed in between is seen (once) either way
+        unflushed = history_writer.unflushed(user_id) if history_writer else []
+
+        # 1️⃣ Embed the query while the project, access and history are resolved
+        # in one round trip; the embedding needs no database session. It is
+        # cancelled if the project is missing or not accessible.
+        embedding_task = asyncio.create_task(self._timed(timings, "embedding_ms", embed_client.embed([query])))
+        try:
+            await asyncio.sleep(0)  # let the embedding request go out first
+            query_context = await self._timed(
+                timings, "preamble_ms", project_model.get_query_context(db, name=project_name, user_id=user_id)
+            )
+            if not query_context:
+                raise ValueError(f"Project '{project_name}' does not exist")
+            project = query_context.project
+            history = self._merge_history(query_context.history, unflushed, project.id)
+            logger.info(f"Project '{project_name}' found (ID={project.id})")
+
+            if not query_context.has_access:
+                logger.warning(f"Unauthorized access: User {user_id} tried to query project '{project_name}'")
+                raise NotPermitted(f"User {user_id} is not authorized to access project '{project_name}'")
+
+            embedding = (await embedding_task)[0]
+        except BaseException:
+            embedding_task.cancel()
+            raise
+        concurrent_ms = (time.perf_counter() - started) * 1000
+        timings["overlap_saved_ms"] = round(max(0.0, timings["embedding_ms"] + timings["preamble_ms"] - concurrent_ms), 3)
+
+        # 2️⃣ Retrieve top-k context
+        retrieval_started = time.perf_counter()
+        candidates = k * max(1, settings.CONTEXT_CANDIDATES)
+        search = None
+        if project.retrieval_backend == "memmap":
+            # In-process matrix: vector scoring only. None while a stale matrix is rebuilt; Postgres answers meanwhile
+            search = await memmap_index.search(
+                db=db, project_id=project.id, query_vector=embedding, top_k=candidates, with_embeddings=True,
+            )
+        if search is None and settings.RETRIEVAL_MODE == "hybrid":
+            search = await vec_model.hybrid_search(
+                db=db, project_id=project.id, query_text=query, query_vector=embedding, top_k=candidates,
+                recall_target=project.recall_target, with_embeddings=True, storage=project.vector_storage,
+            )
+        elif search is None:
+            search = await vec_model.search(
+                db=db, project_id=project.id, query_vector=embedding, top_k=candidates,
+                recall_target=project.recall_target, with_embeddings=True, storage=project.vector_storage,
+            )
+
+        timings["retrieval_ms"] = round((time.perf_counter() - retrieval_started) * 1000, 3)
+
+        # 3️⃣ Select context: distance cutoffs, then MMR without near-duplicates
+        selection_started = time.perf_counter()
+        context, selection = select_context(search.results, k)
+        context_texts = [c.text for c in context]
+        retrieval = {
+            # "mode" is what ran: memmap projects are vector-only even when "hybrid" is requested
+            "mode": search.mode,
+            "requested_mode": settings.RETRIEVAL_MODE,
+            "strategy": search.strategy,
+            "storage": search.storage,
+            "elapsed_ms": search.elapsed_ms,
+            "chunks": len(context_texts),
+            "context": selection,
+            # How each context chunk was scored, in context order
+            "scores": [c.model_dump(exclude={"text"}, exclude_none=True) for c in context],
+        }
+        logger.info(
+            f"Selected {len(context_texts)}/{len(search.results)} context chunks for project '{project_name}' "
+            f"({search.mode}, {search.strategy}); ~{selection['tokens']} prompt tokens, "
+            f"~{selection['tokens_saved']} saved vs plain top-{k}"
+        )
+
+        # 4️⃣ Construct messages for LLM within the token budget
+        messages, prompt = PromptBudget().assemble(history, context_texts, query)
+        logger.info(f"Prompt for project '{project_name}': {prompt}")
+        timings["selection_ms"] = round((time.perf_counter() - selection_started) * 1000, 3)
+        timings["prepare_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        logger.info(f"Stage timings for project '{project_name}': {timings}")
+
+        return project, history, messages, {"retrieval": retrieval, "prompt": prompt, "timings": timings}
+
+    @staticmethod
+    def _merge_history(stored: list, unflushed: list, project_id: UUID) -> list:
+        """
+        The conversation as the LLM sees it: stored messages followed by those
+        still in the write-behind buffer, newest HISTORY_MAX_MESSAGES only.
+        """
+        stored_ids = {message["id"] for message in stored}
+        history = [{"role": m["role"], "content": m["content"]} for m in stored]
+        history += [
+            {"role": m["role"], "content": m["content"]}
+            for m in unflushed if m["project_id"] == project_id and str(m["id"]) not in stored_ids
+        ]
+        return history[-settings.HISTORY_MAX_MESSAGES:]
+
+    async def _save_turn(self, db: AsyncSession, history_writer, user_id: UUID, project_id: UUID, query: str, answer: str):
+        """
+        Append the question and answer to the history: to the write-behind
+        buffer (HISTORY_WRITE_MODE=write_behind), or straight to the database,
+        leaving the trim to the writer when there is one.
+        """
+        messages = [
+            history_model.new_message(user_id, project_id, "user", query),
+            history_model.new_message(user_id, project_id, "assistant", answer),
+        ]
+        if history_writer and settings.HISTORY_WRITE_MODE == "write_behind":
+            await history_writer.append(messages)
+            return
+        await history_model.append_messages(db, messages, synchronous_commit=settings.HISTORY_SYNCHRONOUS_COMMIT)
+        if history_writer:
+            history_writer.schedule_trim(user_id, project_id)
+        else:
+            await history_model.trim(db, [(user_id, project_id)])
+
     async def get_top_k(
         self,
         db: AsyncSession,
@@ -55,54 +197,24 @@ class QueryController(BaseController):
         query: str,
         voice: int,
         k: int,
+        history_writer=None,
     ):
         try:
-            logger.info(f"User {user_id} querying project '{project_name}'")
-
-            # 1️⃣ Find project
-            project_search = ProjectSearch(name=project_name)
-            project = await project_model.search_by_name(db=db, data=project_search)
-            if not project:
-                raise ValueError(f"Project '{project_name}' does not exist")
-            logger.info(f"Project '{project_name}' found (ID={project.id})")
-
-            if not await project_user_model.user_has_access(db, user_id=user_id, project_id=project.id):
-                logger.warning(f"Unauthorized access: User {user_id} tried to query project '{project_name}'")
-                raise NotPermitted(f"User {user_id} is not authorized to access project '{project_name}'")
-
-
-            # 2️⃣ Embed query and retrieve top-k context
-            embedding = embed_client.embed([query])[0]
-            results = await vec_model.top_k_similar_vector_text(
-                db=db, project_id=project.id, query_vector=embedding, top_k=k
+            project, history, messages, metadata = await self._prepare_messages(
+                db, user_id, embed_client, project_name, query, k, history_writer
             )
-            context_texts = [c.text for c in results]
-            logger.info(f"Retrieved {len(context_texts)} context chunks for project '{project_name}'")
-
-            # 3️⃣ Fetch user history
-            history = await history_model.get_history(db=db, user_id=user_id, project_id=project.id)
 
-            # 4️⃣ Construct messages for LLM
-            # messages = [{"role": "system", "content": "You are a helpful assistant. Answer the user's questions based on context. If the context does not provide enough info, respond with 'I don't know.'"}]
-            messages = []
-            messages.extend(history)
-            if context_texts:
-                context_prompt = "\n---\n".join(context_texts)
-                messages.append({"role": "system", "content": f"Context:\n{context_prompt}"})
-            messages.append({"role": "user", "content": query})
+            timings = metadata["timings"]
 
-            # 5️⃣ Get LLM response
-            answer = gen_client.response(messages)
-            
+            # 6️⃣ Get LLM response
+            answer = await self._timed(timings, "generation_ms", gen_client.response(messages))
 
             logger.info(f"Generated answer for user {user_id} in project '{project_name}'")
 
-            # 6️⃣ Update history
-            history.append({"role": "user", "content": query})
-            history.append({"role": "assistant", "content": answer})
-            history = history[-12:]  # keep last 12 messages
-
-            await history_model.update_history(db=db, user_id=user_id, project_id=project.id, history=history)
+            # 7️⃣ Update history
+            await self._timed(
+                timings, "history_ms", self._save_turn(db, history_writer, user_id, project.id, query, answer)
+            )
             logger.info(f"Updated user {user_id} history for project '{project_name}'")
 
             lang = self.detect_language(answer)
@@ -116,11 +228,70 @@ class QueryController(BaseController):
 
                 return {
                     "answer": answer,
-                    "audio_base64": audio_base64
+                    "audio_base64": audio_base64,
+                    **metadata
                 }
 
-            return {"answer": answer}
+            return {"answer": answer, **metadata}
 
         except Exception as e:
             logger.error(f"Failed to get top-k answer for user {user_id}, project '{project_name}': {e}")
             raise
+
+    # ------------------------- Streaming -------------------------
+    def _sse(self, event: str, data: dict) -> str:
+        return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    async def stream_top_k(
+        self,
+        db: AsyncSession,
+        user_id: UUID,
+        embed_client,
+        gen_client,
+        project_name: str,
+        query: str,
+        k: int,
+        history_writer=None,
+    ) -> AsyncIterator[str]:
+        """
+        Run the query preamble eagerly (so access and lookup errors surface as
+        normal JSON errors) and return a Server-Sent Events generator that
+        emits tokens as the provider produces them.
+        """
+        try:
+            project, history, messages, metadata = await self._prepare_messages(
+                db, user_id, embed_client, project_name, query, k, history_writer
+            )
+        except Exception as e:
+            logger.error(f"Failed to prepare streamed answer for user {user_id}, project '{project_name}': {e}")
+            raise
+
+        return self._stream_answer(user_id, gen_client, history_writer, project.id, project_name, messages, query, metadata)
+
+    async def _stream_answer(self, user_id: UUID, gen_client, history_writer, project_id: UUID, project_name: str,
+                             messages: list, query: str, metadata: dict) -> AsyncIterator[str]:
+        parts = []
+        generation_started = time.perf_counter()
+        try:
+            async for delta in gen_client.stream_response(messages):
+                parts.append(delta)
+                yield self._sse("token", {"token": delta})
+        except Exception as e:
+            logger.error(f"Stream failed for user {user_id}, project '{project_name}': {e}")
+            yield self._sse("error", {"message": "Unexpected error"})
+            return
+
+        answer = "".join(parts)
+        metadata["timings"]["generation_ms"] = round((time.perf_counter() - generation_started) * 1000, 3)
+        logger.info(f"Streamed answer for user {user_id} in project '{project_name}'")
+
+        # The request session may already be closed once the stream finishes,
+        # so the final answer is persisted through a session of its own.
+        try:
+            async with async_session() as db:
+                await self._save_turn(db, history_writer, user_id, project_id, query, answer)
+            logger.info(f"Updated user {user_id} history for project '{project_name}'")
+        except Exception as e:
+            logger.error(f"Failed to persist streamed answer for user {user_id}, project '{project_name}': {e}")
+
+        yield self._sse("done", {"answer": answer, **metadata})
@@ -1,5 +1,19 @@
 from .BaseController import BaseController
+from helpers.password_pool import password_pool_metrics
+from helpers.user_cache import user_cache
+from routes.exceptions import NotPermitted
 
 class SystemController(BaseController):
     def __init__(self):
-        pass
\ No newline at end of file
+        pass
+
+    async def get_metrics(self, current_user):
+        if current_user["role"] != 0:
+            raise NotPermitted()
+        return {
+            "data": {
+                "password_hashing": password_pool_metrics(),
+                "user_cache": {**user_cache.stats, "size": len(user_cache.entries)},
+            },
+            "message": "Metrics retrieved successfully",
+        }
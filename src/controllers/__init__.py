@@ -2,4 +2,5 @@ from .DataController import DataController
 from .ProjectsController import ProjectsController
 from .DocumentsController import DocumentsController
 from .QueryController import QueryController
-from .SystemController import SystemController
\ No newline at end of file
+from .SystemController import SystemController
+from .JobsController import JobsController
\ No newline at end of file
@@ -1,11 +1,13 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
+from typing import Literal
 
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
     MAX_FILE_SIZE_MB: int
     ALLOWED_MIME_TYPES: list[str]
+    UPLOAD_BLOCK_SIZE_KB: int = 1024
 
     POSTGRES_USER: str
     POSTGRES_PASSWORD : str
@@ -25,6 +27,75 @@ class Settings(BaseSettings):
     REFRESH_TOKEN_EXPIRE_DAYS: int
     SECRET_KEY: str
     ALGORITHM: str
+    AUTH_TOKEN_CLAIMS: bool = False  # trust username / role claims in access tokens; only safe with a single process
+    AUTH_USER_CACHE_TTL_SECONDS: int = 60  # 0 = no user cache
+    AUTH_USER_CACHE_SIZE: int = 10000
+    PASSWORD_HASH_WORKERS: int = 2  # threads running argon2 off the event loop
+    PASSWORD_HASH_MAX_QUEUE: int = 32  # hash calls allowed to wait for a thread; beyond this sign-ins get 503
+
+    LLM_MAX_CONNECTIONS: int = 100
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    LLM_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    LLM_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    LLM_TIMEOUT_SECONDS: float = 60.0
+    LLM_MAX_RETRIES: int = 2
+    GENERATION_TIMEOUT_SECONDS: float = 60.0
+    GENERATION_MAX_CONCURRENCY: int = 16
+    EMBEDDING_TIMEOUT_SECONDS: float = 30.0
+    EMBEDDING_MAX_CONCURRENCY: int = 32
+    EMBEDDING_BATCH_SIZE: int = 128
+    EMBEDDING_BATCH_MAX_TOKENS: int = 8192
+    EMBEDDING_BATCH_CONCURRENCY: int = 4
+    EMBEDDING_TOKENS_PER_MINUTE: int = 0  # ingestion embedding budget; 0 = no rate limit
+    QUERY_EMBEDDING_TOKENS_PER_MINUTE: int = 0  # /query embedding budget, separate from ingestion; 0 = no rate limit
+
+    EMBEDDING_CACHE_SIZE: int = 50000
+
+    INGESTION_RUN_IN_APP: bool = True
+    INGESTION_WORKERS: int = 2
+    INGESTION_POLL_SECONDS: float = 2.0
+    INGESTION_STALE_SECONDS: int = 900
+
+    PDF_PARSE_WORKERS: int = 0  # 0 = one per CPU core
+    PROCESS_CONCURRENCY: int = 4  # files in flight per pipeline stage; 1 = one file at a time
+
+    VECTOR_INDEX_TYPE: Literal["hnsw", "ivfflat"] = "hnsw"
+    HNSW_M: int = 16
+    HNSW_EF_CONSTRUCTION: int = 64
+    IVFFLAT_LISTS: int = 100
+    VECTOR_RECALL_TARGET: float = 0.95  # default for projects without their own recall_target
+    VECTOR_ITERATIVE_SCAN: Literal["off", "relaxed_order", "strict_order"] = "relaxed_order"  # pgvector >= 0.8
+    VECTOR_MAX_SCAN_TUPLES: int = 20000  # hnsw.max_scan_tuples for iterative scans
+    IVFFLAT_MAX_PROBES: int = 0  # ivfflat.max_probes for iterative scans; 0 = all lists
+    VECTOR_EXACT_SEARCH_MAX_ROWS: int = 10000  # projects up to this many vectors skip the ANN index
+    VECTOR_PARTITION_CACHE_SECONDS: int = 60  # how long a process trusts the index type and size it read for a partition
+    VECTOR_RESCORE_FACTOR_HALFVEC: int = 2  # halfvec-indexed projects re-score k * this many candidates
+    VECTOR_RESCORE_FACTOR_BINARY: int = 8  # binary-indexed projects re-score k * this many candidates
+    MEMMAP_INDEX_DIR: str = "memmap_index"  # per-project matrices of the memmap retrieval backend
+    MEMMAP_DTYPE: Literal["float32", "float16"] = "float32"
+    MEMMAP_FINGERPRINT_CACHE_SECONDS: float = 2  # how long a process trusts the live-vector fingerprint it read
+    RETRIEVAL_MODE: Literal["vector", "hybrid"] = "vector"  # hybrid = vector + full-text, fused with RRF
+    RRF_K: int = 60
+    HYBRID_CANDIDATES: int = 4  # each side of a hybrid search ranks top_k * this many chunks
+
+    CONTEXT_CANDIDATES: int = 2  # retrieve k * this many chunks for context selection to choose from
+    CONTEXT_MMR_LAMBDA: float = 0.7  # 1 = relevance only, 0 = diversity only
+    CONTEXT_DUPLICATE_SIMILARITY: float = 0.95  # skip chunks at least this similar to one already chosen
+    CONTEXT_MAX_DISTANCE: float = 0.0  # drop chunks farther than this cosine distance; 0 = off
+    CONTEXT_MAX_DISTANCE_GAP: float = 0.25  # drop chunks this much farther than the best one; 0 = off
+
+    PROMPT_MAX_TOKENS: int = 6000  # budget for the whole prompt; 0 = unlimited
+    PROMPT_HISTORY_SHARE: float = 0.3  # share of the budget (after instructions and query) reserved for history
+    PROMPT_SYSTEM_INSTRUCTIONS: str = ""  # optional system message sent first; never cut
+    PROMPT_TOKENIZER_ENCODING: str = "cl100k_base"  # tiktoken encoding; length estimate when unavailable
+
+    HISTORY_MAX_MESSAGES: int = 12  # messages per conversation kept and sent to the LLM
+    HISTORY_WRITE_MODE: Literal["sync", "write_behind"] = "write_behind"  # sync = saved before the answer returns
+    HISTORY_FLUSH_INTERVAL_SECONDS: float = 0.5  # write-behind: longest a message waits in memory
+    HISTORY_FLUSH_BATCH_SIZE: int = 256  # write-behind: flush early once this many messages are buffered
+    HISTORY_MAX_PENDING: int = 10000  # write-behind: beyond this many buffered messages, requests flush inline
+    HISTORY_SYNCHRONOUS_COMMIT: bool = True  # false = history commits skip the WAL flush wait (Postgres crash may lose the last moments)
+
 @lru_cache
 def get_settings() -> Settings:
     return Settings()
@@ -0,0 +1,96 @@
+# helpers/context_selection.py
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from llm.PromptBudget import count_tokens
+from models.postgres.operations_schema import VectorOut
+from .config import settings
+
+
+def _relevance(candidates: List[VectorOut]) -> np.ndarray:
+    """
+    Relevance used by MMR: cosine similarity to the query. Chunks found only by
+    full-text search (hybrid retrieval) rank by their fused score instead,
+    scaled against the most similar chunk.
+    """
+    similarity = np.array([1.0 - (c.distance if c.distance is not None else 1.0) for c in candidates],
+                          dtype=np.float32)
+    scores = [c.score for c in candidates if c.score is not None]
+    if scores:
+        best_similarity, best_score = float(similarity.max()), max(scores)
+        for i, c in enumerate(candidates):
+            if c.vector_rank is None and c.score is not None:
+                similarity[i] = best_similarity * c.score / best_score
+    return similarity
+
+
+def _within_cutoff(candidate: VectorOut, best_distance: float) -> bool:
+    """
+    Distance cutoffs: absolute (CONTEXT_MAX_DISTANCE) and relative to the best
+    candidate (CONTEXT_MAX_DISTANCE_GAP). Chunks found only by full-text search
+    are kept regardless, since an exact code or formula hit can sit far from
+    the query in vector space.
+    """
+    if candidate.distance is None or (candidate.lexical_rank is not None and candidate.vector_rank is None):
+        return True
+    if settings.CONTEXT_MAX_DISTANCE and candidate.distance > settings.CONTEXT_MAX_DISTANCE:
+        return False
+    if settings.CONTEXT_MAX_DISTANCE_GAP and candidate.distance - best_distance > settings.CONTEXT_MAX_DISTANCE_GAP:
+        return False
+    return True
+
+
+def select_context(candidates: Sequence[VectorOut], k: int) -> Tuple[List[VectorOut], dict]:
+    """
+    Choose up to `k` context chunks from retrieval candidates (best first):
+      1. drop candidates beyond the distance cutoffs
+      2. maximal marginal relevance over their embeddings: repeatedly take the
+         candidate maximising
+             CONTEXT_MMR_LAMBDA * relevance - (1 - CONTEXT_MMR_LAMBDA) * max similarity to those taken,
+         skipping near-duplicates (similarity >= CONTEXT_DUPLICATE_SIMILARITY),
+         such as chunks that mostly repeat their neighbour's overlap
+    Returns the chosen chunks and stats comparing them with the plain top `k`;
+    tokens are counted like `PromptBudget` counts them.
+    """
+    candidates = list(candidates)
+    baseline_tokens = sum(count_tokens(c.text) for c in candidates[:k])
+    stats = {"candidates": len(candidates), "dropped_distance": 0, "dropped_duplicate": 0}
+
+    if candidates:
+        best_distance = min((c.distance for c in candidates if c.distance is not None), default=0.0)
+        kept = [c for c in candidates if _within_cutoff(c, best_distance)]
+        stats["dropped_distance"] = len(candidates) - len(kept)
+        candidates = kept
+
+    selected: List[VectorOut] = []
+    if candidates and all(c.embedding is not None for c in candidates):
+        vectors = np.array([np.asarray(c.embedding, dtype=np.float32) for c in candidates])
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        similarity = vectors @ vectors.T
+        relevance = _relevance(candidates)
+        weight = settings.CONTEXT_MMR_LAMBDA
+
+        remaining = list(range(len(candidates)))
+        taken: List[int] = []
+        while remaining and len(taken) < k:
+            if taken:
+                redundancy = similarity[np.ix_(remaining, taken)].max(axis=1)
+            else:
+                redundancy = np.zeros(len(remaining), dtype=np.float32)
+            duplicate = redundancy >= settings.CONTEXT_DUPLICATE_SIMILARITY
+            stats["dropped_duplicate"] += int(duplicate.sum())
+            remaining = [i for i, dup in zip(remaining, duplicate) if not dup]
+            redundancy = redundancy[~duplicate]
+            if not remaining:
+                break
+            mmr = weight * relevance[remaining] - (1 - weight) * redundancy
+            best = remaining.pop(int(np.argmax(mmr)))
+            taken.append(best)
+        selected = [candidates[i] for i in taken]
+    else:
+        selected = candidates[:k]
+
+    tokens = sum(count_tokens(c.text) for c in selected)
+    stats.update(selected=len(selected), tokens=tokens, tokens_saved=max(0, baseline_tokens - tokens))
+    return selected, stats
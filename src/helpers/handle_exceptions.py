@@ -1,6 +1,6 @@
 from functools import wraps
 from fastapi.encoders import jsonable_encoder
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from helpers.logger import get_logger
 from middlewares.auth_middleware import current_user_id
 from routes.exceptions import *
@@ -16,6 +16,10 @@ def handle_exceptions(fn):
             result = await fn(*args, **kwargs)
             logger.info(f"Success: {fn.__name__} [user={user}]")
 
+            # Ready-made responses (e.g. event streams) are passed through untouched
+            if isinstance(result, Response):
+                return result
+
             # Standardize response
             return JSONResponse(
                 status_code=200,
@@ -55,6 +59,15 @@ def handle_exceptions(fn):
             logger.warning(f"ProjectExists: {fn.__name__} [user={user}] - {str(e)}")
             return JSONResponse(status_code=400, content={"success": False, "message": str(e), "data": None})
 
+        except JobNotFound as e:
+            logger.warning(f"JobNotFound: {fn.__name__} [user={user}] - {str(e)}")
+            return JSONResponse(status_code=404, content={"success": False, "message": str(e), "data": None})
+
+        except ServiceBusy as e:
+            logger.warning(f"ServiceBusy: {fn.__name__} [user={user}] - {str(e)}")
+            return JSONResponse(status_code=503, content={"success": False, "message": str(e), "data": None},
+                                headers={"Retry-After": "1"})
+
         except DatabaseError as e:
             logger.error(f"DatabaseError: {fn.__name__} [user={user}] - {str(e)}")
             return JSONResponse(status_code=500, content={"success": False, "message": "Internal server error", "data": None})
@@ -0,0 +1,19 @@
+# helpers/http_client.py
+import httpx
+from .config import settings
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """
+    Build the shared, bounded HTTP connection pool used by every LLM client.
+
+    The pool keeps connections alive between calls so embedding and generation
+    requests reuse TCP/TLS sessions instead of reconnecting each time.
+    """
+    limits = httpx.Limits(
+        max_connections=settings.LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY_SECONDS,
+    )
+    timeout = httpx.Timeout(settings.LLM_TIMEOUT_SECONDS, connect=settings.LLM_CONNECT_TIMEOUT_SECONDS)
+    return httpx.AsyncClient(limits=limits, timeout=timeout)
@@ -0,0 +1,119 @@
+# helpers/password_pool.py
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from routes.exceptions import ServiceBusy
+from .config import settings
+from .security import hash_password, verify_password
+
+# Latency samples kept for the metrics percentiles
+METRIC_SAMPLES = 1024
+
+_pool: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+_in_flight = 0
+_metrics = {
+    "completed": 0,
+    "rejected": 0,
+    "hash_ms": deque(maxlen=METRIC_SAMPLES),
+    "queue_wait_ms": deque(maxlen=METRIC_SAMPLES),
+}
+
+
+def get_password_pool() -> ThreadPoolExecutor:
+    """
+    Threads for argon2 hashing and verification, created on first use.
+    argon2 releases the GIL, so PASSWORD_HASH_WORKERS calls run in parallel
+    while the event loop keeps serving other requests.
+    """
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="argon2")
+    return _pool
+
+
+def shutdown_password_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+def _timed(fn, submitted: float, *args):
+    started = time.perf_counter()
+    try:
+        return fn(*args)
+    finally:
+        finished = time.perf_counter()
+        with _lock:
+            _metrics["completed"] += 1
+            _metrics["queue_wait_ms"].append((started - submitted) * 1000)
+            _metrics["hash_ms"].append((finished - started) * 1000)
+
+
+def _release(_future=None):
+    global _in_flight
+    with _lock:
+        _in_flight -= 1
+
+
+async def _run(fn, *args):
+    """
+    Run `fn` on the password pool. Raises ServiceBusy instead of queueing when
+    PASSWORD_HASH_MAX_QUEUE calls are already waiting for a thread.
+
+    The slot is released when the pool's future is done, not when the caller
+    stops waiting: a cancelled request whose call already runs keeps its slot
+    until the thread is free again.
+    """
+    global _in_flight
+    with _lock:
+        if _in_flight >= settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_MAX_QUEUE:
+            _metrics["rejected"] += 1
+            raise ServiceBusy("Too many concurrent sign-ins, please retry shortly")
+        _in_flight += 1
+    try:
+        future = get_password_pool().submit(_timed, fn, time.perf_counter(), *args)
+    except BaseException:
+        _release()
+        raise
+    future.add_done_callback(_release)
+    return await asyncio.wrap_future(future)
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run(verify_password, plain_password, hashed_password)
+
+
+def _summary(samples) -> dict:
+    values = sorted(samples)
+    if not values:
+        return {"p50": None, "p95": None, "max": None}
+    return {
+        "p50": round(values[len(values) // 2], 3),
+        "p95": round(values[min(len(values) - 1, int(len(values) * 0.95))], 3),
+        "max": round(values[-1], 3),
+    }
+
+
+def password_pool_metrics() -> dict:
+    """Pool occupancy, completed / rejected counts and latency percentiles (ms) over recent calls."""
+    with _lock:
+        return {
+            "workers": settings.PASSWORD_HASH_WORKERS,
+            "max_queue": settings.PASSWORD_HASH_MAX_QUEUE,
+            "in_flight": _in_flight,
+            "queued": max(0, _in_flight - settings.PASSWORD_HASH_WORKERS),
+            "completed": _metrics["completed"],
+            "rejected": _metrics["rejected"],
+            "hash_ms": _summary(_metrics["hash_ms"]),
+            "queue_wait_ms": _summary(_metrics["queue_wait_ms"]),
+        }
@@ -0,0 +1,31 @@
+# helpers/pdf_parser.py
+from langchain_community.document_loaders import PyPDFLoader
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+
+def load_and_chunk_pdf(pdf_path: str, chunk_size: int = 1000, chunk_overlap: int = 150) -> list[dict]:
+    """
+    Parse a PDF and split it into ordered chunks.
+
+    Kept at module level (and free of app state) so it can be shipped to a
+    `ProcessPoolExecutor` worker.
+    """
+    loader = PyPDFLoader(pdf_path)
+    docs = loader.load()
+
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap)
+    chunks = splitter.split_documents(docs)
+
+    chunked_data = []
+    for idx, chunk in enumerate(chunks):
+        page_number = chunk.metadata.get("page", 0) + 1
+
+        chunked_data.append({
+            "chunk_order": idx,
+            "page_number": page_number,
+            "text": chunk.page_content.strip()
+        })
+
+    return chunked_data
@@ -0,0 +1,24 @@
+# helpers/process_pool.py
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from .config import settings
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Shared pool for CPU-bound work (PDF parsing and splitting), created on first use.
+    """
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=settings.PDF_PARSE_WORKERS or os.cpu_count())
+    return _pool
+
+
+def shutdown_process_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
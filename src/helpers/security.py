@@ -23,10 +23,18 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 # --- Token creation ---
 def create_access_token(data: dict, expires_delta: Optional[int] = None):
     to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + timedelta(minutes=expires_delta or ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    now = datetime.now(timezone.utc)
+    expire = now + timedelta(minutes=expires_delta or ACCESS_TOKEN_EXPIRE_MINUTES)
+    to_encode.update({"exp": expire, "iat": now})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+def user_claims(user) -> dict:
+    """Access token claims for `user`; username and role are included when AUTH_TOKEN_CLAIMS is on."""
+    claims = {"sub": str(user.id)}
+    if settings.AUTH_TOKEN_CLAIMS:
+        claims.update({"username": user.username, "role": user.role})
+    return claims
+
 def create_refresh_token(user_id: uuid.UUID):
     expire = datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
     to_encode = {"sub": str(user_id), "exp": expire, "type": "refresh"}
@@ -0,0 +1,67 @@
+# helpers/user_cache.py
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from .config import settings
+
+
+class UserCache:
+    """
+    In-process cache of the identity AuthMiddleware puts in `scope["user"]`,
+    keyed by the token `sub`. Entries live for AUTH_USER_CACHE_TTL_SECONDS and
+    the least recently used ones are evicted past AUTH_USER_CACHE_SIZE.
+
+    `invalidate` drops a user's entry and records when it happened, so identity
+    claims carried by tokens issued before that moment are no longer trusted
+    (see `claims_valid`). Those records are kept for as long as such a token
+    could still be unexpired.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None, max_size: Optional[int] = None):
+        self.ttl = settings.AUTH_USER_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.max_size = settings.AUTH_USER_CACHE_SIZE if max_size is None else max_size
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.invalidated: "OrderedDict[str, float]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, uid: str) -> Optional[Dict]:
+        entry = self.entries.get(uid)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self.entries[uid]
+            self.stats["misses"] += 1
+            return None
+        self.entries.move_to_end(uid)
+        self.stats["hits"] += 1
+        return entry[1]
+
+    def put(self, uid: str, user: Dict):
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+        self.entries[uid] = (time.monotonic() + self.ttl, user)
+        self.entries.move_to_end(uid)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, uid):
+        uid = str(uid)
+        self.entries.pop(uid, None)
+        self.invalidated.pop(uid, None)
+        self.invalidated[uid] = time.time()
+        self.stats["invalidations"] += 1
+        # Tokens issued before the oldest records have expired by now
+        horizon = time.time() - settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        while self.invalidated and next(iter(self.invalidated.values())) < horizon:
+            self.invalidated.popitem(last=False)
+
+    def claims_valid(self, uid: str, issued_at) -> bool:
+        """Whether identity claims from a token issued at `issued_at` (unix time) are still current."""
+        invalidated_at = self.invalidated.get(uid)
+        if invalidated_at is None:
+            return True
+        # `iat` is truncated to the second, so this errs towards distrusting the claims
+        return issued_at is not None and issued_at >= invalidated_at
+
+
+user_cache = UserCache()
@@ -0,0 +1,58 @@
+import asyncio
+from typing import List
+
+from helpers.config import settings
+from helpers.logger import get_logger
+from llm.tokens import estimate_tokens
+
+logger = get_logger("EmbeddingBatcher")
+
+
+class EmbeddingBatcher:
+    """
+    Splits a large embedding request into provider-sized batches, bounded by
+    both input count and approximate token budget, and runs up to
+    `concurrency` of them at once. Vectors come back in input order.
+
+    It exposes the same `model_name` / `embed` surface as `LLMClient`, so it
+    can be passed anywhere an embedding client is expected.
+    """
+
+    def __init__(self, client, max_batch_size: int = None, max_batch_tokens: int = None, concurrency: int = None):
+        self.client = client
+        self.model_name = client.model_name
+        self.max_batch_size = max_batch_size or settings.EMBEDDING_BATCH_SIZE
+        self.max_batch_tokens = max_batch_tokens or settings.EMBEDDING_BATCH_MAX_TOKENS
+        self.concurrency = concurrency or settings.EMBEDDING_BATCH_CONCURRENCY
+
+    def split(self, texts: List[str]) -> List[List[str]]:
+        """
+        Greedily pack consecutive texts into batches. A single text over the
+        token budget still gets a batch of its own.
+        """
+        batches, current, current_tokens = [], [], 0
+        for text in texts:
+            tokens = estimate_tokens(text)
+            if current and (len(current) >= self.max_batch_size or current_tokens + tokens > self.max_batch_tokens):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(text)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        batches = self.split(texts)
+        if len(batches) <= 1:
+            return await self.client.embed(texts) if texts else []
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(batch: List[str]) -> List[List[float]]:
+            async with semaphore:
+                return await self.client.embed(batch)
+
+        logger.info(f"Embedding {len(texts)} text(s) in {len(batches)} batch(es), {self.concurrency} at a time")
+        results = await asyncio.gather(*(run(batch) for batch in batches))
+        return [vector for batch_vectors in results for vector in batch_vectors]
@@ -0,0 +1,99 @@
+import hashlib
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.postgres.EmbeddingCacheModel import EmbeddingCacheModel
+from helpers.config import settings
+from helpers.logger import get_logger
+
+logger = get_logger("EmbeddingCache")
+
+
+class EmbeddingCache:
+    """
+    Two-level embedding cache: an in-process LRU in front of the
+    `embedding_cache` table. Keys are (embedding model, sha256 of the
+    normalized text), so identical chunks are only ever embedded once per model.
+    """
+
+    def __init__(self, max_size: int = None):
+        self.max_size = max_size or settings.EMBEDDING_CACHE_SIZE
+        self.lru: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+        self.model = EmbeddingCacheModel()
+        self.stats = {"memory_hits": 0, "db_hits": 0, "misses": 0}
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return " ".join(unicodedata.normalize("NFKC", text).split())
+
+    @classmethod
+    def content_hash(cls, text: str) -> str:
+        return hashlib.sha256(cls.normalize(text).encode("utf-8")).hexdigest()
+
+    def _lru_get(self, key):
+        vector = self.lru.get(key)
+        if vector is not None:
+            self.lru.move_to_end(key)
+        return vector
+
+    def _lru_put(self, key, vector: List[float]):
+        self.lru[key] = vector
+        self.lru.move_to_end(key)
+        while len(self.lru) > self.max_size:
+            self.lru.popitem(last=False)
+
+    async def embed(self, db: AsyncSession, client, texts: List[str]) -> Tuple[List[List[float]], Dict]:
+        """
+        Embed `texts` through the cache, calling the provider only for misses.
+        Returns the vectors (in input order) and the hit/miss counts for this call.
+        """
+        model_name = client.model_name
+        hashes = [self.content_hash(t) for t in texts]
+        resolved: Dict[str, List[float]] = {}
+        call_stats = {"total": len(texts), "memory_hits": 0, "db_hits": 0, "misses": 0}
+
+        # 1️⃣ In-process LRU
+        for h in dict.fromkeys(hashes):
+            vector = self._lru_get((model_name, h))
+            if vector is not None:
+                resolved[h] = vector
+                call_stats["memory_hits"] += 1
+
+        # 2️⃣ Postgres
+        pending = [h for h in dict.fromkeys(hashes) if h not in resolved]
+        if pending:
+            found = await self.model.get_embeddings(db, model_name, pending)
+            for h, vector in found.items():
+                resolved[h] = vector
+                self._lru_put((model_name, h), vector)
+            call_stats["db_hits"] = len(found)
+
+        # 3️⃣ Provider, one text per unique missing hash
+        first_text = {}
+        for h, t in zip(hashes, texts):
+            if h not in resolved:
+                first_text.setdefault(h, t)
+        if first_text:
+            # Don't hold a connection idle in a transaction while the provider call is in flight
+            await db.commit()
+            vectors = await client.embed(list(first_text.values()))
+            new_items = dict(zip(first_text.keys(), vectors))
+            for h, vector in new_items.items():
+                resolved[h] = vector
+                self._lru_put((model_name, h), vector)
+            await self.model.put_embeddings(db, model_name, new_items)
+            call_stats["misses"] = len(new_items)
+
+        for key in ("memory_hits", "db_hits", "misses"):
+            self.stats[key] += call_stats[key]
+        unique = call_stats["memory_hits"] + call_stats["db_hits"] + call_stats["misses"]
+        call_stats["hit_rate"] = round((unique - call_stats["misses"]) / unique, 4) if unique else 0.0
+        logger.info(
+            f"Embedding cache [model={model_name}]: {call_stats['memory_hits']} memory hit(s), "
+            f"{call_stats['db_hits']} db hit(s), {call_stats['misses']} miss(es), hit_rate={call_stats['hit_rate']}"
+        )
+
+        return [resolved[h] for h in hashes], call_stats
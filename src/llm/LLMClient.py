@@ -1,17 +1,12 @@
+import asyncio
+import httpx
 import openai
-from typing import List
+from typing import AsyncIterator, List, Optional
 from helpers.config import settings
+from llm.TokenBucket import TokenBucket
+from llm.tokens import estimate_tokens
 
-class LLMClient:
-    def __init__(self, base_url, api_key, model_name):
-        self.client = openai.OpenAI(
-            base_url=base_url,
-            api_key=api_key
-        )
-        self.model_name = model_name
-
-    def response(self, prompt: str) -> str:
-        instructions ="""You are a Educational chatbot. Follow these EXACT rules:
+INSTRUCTIONS = """You are a Educational chatbot. Follow these EXACT rules:
 
 You are an Educational Chatbot. Follow these rules exactly:
 
@@ -35,18 +30,68 @@ You are an Educational Chatbot. Follow these rules exactly:
 7. Make your response short and clear and concise.
 
 """
-        response = self.client.responses.create(
-            model=self.model_name,
-            instructions= instructions,
-            input=prompt,
-            max_output_tokens=200,
-            
-         )
-        return response.output_text
 
-    def embed(self, text: List[str]):
-        embeddings = self.client.embeddings.create(
-            model=self.model_name,
-            input=text
+
+class LLMClient:
+    """
+    Async wrapper around an OpenAI-compatible provider.
+
+    All clients built in `main.lifespan` share one `httpx.AsyncClient`, so the
+    connection pool (and its keep-alive connections) is bounded process-wide.
+    `max_concurrency` caps in-flight calls per client; extra callers wait on
+    the semaphore instead of piling more requests onto the provider.
+    With `tokens_per_minute`, embedding calls also draw their estimated token
+    count from a per-provider token bucket before being sent.
+    """
+    def __init__(self, base_url, api_key, model_name, http_client: Optional[httpx.AsyncClient] = None,
+                 timeout: Optional[float] = None, max_concurrency: int = 16, tokens_per_minute: int = 0):
+        self.client = openai.AsyncOpenAI(
+            base_url=base_url,
+            api_key=api_key,
+            http_client=http_client,
+            max_retries=settings.LLM_MAX_RETRIES,
         )
+        self.model_name = model_name
+        self.timeout = timeout or settings.LLM_TIMEOUT_SECONDS
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.rate_limiter = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+    async def response(self, prompt: str) -> str:
+        async with self.semaphore:
+            response = await self.client.responses.create(
+                model=self.model_name,
+                instructions= INSTRUCTIONS,
+                input=prompt,
+                max_output_tokens=200,
+                timeout=self.timeout,
+             )
+        return response.output_text
+
+    async def stream_response(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Yield answer text deltas as the provider produces them.
+        The concurrency slot is held until the stream is fully consumed or closed.
+        """
+        async with self.semaphore:
+            stream = await self.client.responses.create(
+                model=self.model_name,
+                instructions=INSTRUCTIONS,
+                input=prompt,
+                max_output_tokens=200,
+                timeout=self.timeout,
+                stream=True,
+            )
+            async for event in stream:
+                if event.type == "response.output_text.delta":
+                    yield event.delta
+
+    async def embed(self, text: List[str]):
+        if self.rate_limiter:
+            await self.rate_limiter.acquire(sum(estimate_tokens(t) for t in text))
+        async with self.semaphore:
+            embeddings = await self.client.embeddings.create(
+                model=self.model_name,
+                input=text,
+                timeout=self.timeout,
+            )
         return [item.embedding for item in embeddings.data]
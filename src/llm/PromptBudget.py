@@ -0,0 +1,182 @@
+import logging
+from typing import List, Optional, Tuple
+
+from helpers.config import settings
+from .LLMClient import INSTRUCTIONS
+from .tokens import estimate_tokens
+
+try:
+    import tiktoken
+except ImportError:  # optional: fall back to the character estimate
+    tiktoken = None
+
+logger = logging.getLogger("PromptBudget")
+
+# Chat formats spend a few tokens per message on role and separators
+MESSAGE_OVERHEAD = 4
+# Context chunks cut below this many tokens are dropped instead
+MIN_CHUNK_TOKENS = 32
+CONTEXT_SEPARATOR = "\n---\n"
+CONTEXT_HEADER = "Context:\n"
+
+_encoding = None
+_encoding_failed = False
+
+
+def _get_encoding():
+    """tiktoken encoding (PROMPT_TOKENIZER_ENCODING), loaded once; None if unavailable."""
+    global _encoding, _encoding_failed
+    if _encoding is None and tiktoken is not None and not _encoding_failed:
+        try:
+            _encoding = tiktoken.get_encoding(settings.PROMPT_TOKENIZER_ENCODING)
+        except Exception as e:
+            # e.g. the BPE file cannot be downloaded on first use
+            _encoding_failed = True
+            logger.warning(f"tiktoken encoding unavailable, estimating tokens from length: {e}")
+    return _encoding
+
+
+def load_encoding() -> bool:
+    """
+    Load the encoding now, blocking (a first use downloads its BPE file unless
+    TIKTOKEN_CACHE_DIR already holds it). `main.lifespan` runs this in a
+    thread so requests never wait on it. Returns whether tiktoken is used.
+    """
+    return _get_encoding() is not None
+
+
+def tokenizer_name() -> str:
+    return f"tiktoken:{settings.PROMPT_TOKENIZER_ENCODING}" if _get_encoding() else "estimate"
+
+
+def count_tokens(text: str) -> int:
+    encoding = _get_encoding()
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Keep the first `max_tokens` tokens of `text`."""
+    if max_tokens <= 0:
+        return ""
+    encoding = _get_encoding()
+    if encoding is None:
+        return text[:max_tokens * 4]
+    tokens = encoding.encode(text, disallowed_special=())
+    return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+
+
+class PromptBudget:
+    """
+    Fits a chat prompt into PROMPT_MAX_TOKENS.
+
+    The system part and the query are always sent. The system part is the
+    `LLMClient.INSTRUCTIONS` the client passes as `instructions=` on every
+    call, plus the optional PROMPT_SYSTEM_INSTRUCTIONS message. The remaining budget is split between history
+    (PROMPT_HISTORY_SHARE) and context; whatever one side leaves unused goes to
+    the other. Within each side the lowest-ranked pieces go first:
+      * history keeps the newest messages; older ones are dropped, and the
+        oldest message kept may be cut short
+      * context keeps chunks in retrieval order; the first chunk that does
+        not fit is cut short (or dropped when little room is left), later
+        ones are dropped
+    """
+
+    def __init__(self, max_tokens: Optional[int] = None, history_share: Optional[float] = None,
+                 client_instructions: str = INSTRUCTIONS):
+        self.max_tokens = settings.PROMPT_MAX_TOKENS if max_tokens is None else max_tokens
+        self.history_share = settings.PROMPT_HISTORY_SHARE if history_share is None else history_share
+        # Sent by the client outside the messages, but part of the prompt all the same
+        self.client_instructions = client_instructions
+
+    @staticmethod
+    def _message_tokens(content: str) -> int:
+        return count_tokens(content) + MESSAGE_OVERHEAD
+
+    def _fit_history(self, history: List[dict], budget: int) -> Tuple[List[dict], int, int]:
+        """Newest-first fill. Returns (messages kept, tokens used, messages cut short)."""
+        kept, used, truncated = [], 0, 0
+        for message in reversed(history):
+            cost = self._message_tokens(message["content"])
+            if used + cost <= budget:
+                kept.append(message)
+                used += cost
+                continue
+            room = budget - used - MESSAGE_OVERHEAD
+            if room >= MIN_CHUNK_TOKENS:
+                content = truncate_tokens(message["content"], room)
+                kept.append({**message, "content": content})
+                used += self._message_tokens(content)
+                truncated += 1
+            break
+        kept.reverse()
+        return kept, used, truncated
+
+    def _fit_context(self, texts: List[str], budget: int) -> Tuple[List[str], int, int]:
+        """Rank-order fill. Returns (texts kept, tokens used, texts cut short)."""
+        budget -= MESSAGE_OVERHEAD + count_tokens(CONTEXT_HEADER)
+        separator = count_tokens(CONTEXT_SEPARATOR)
+        kept, used, truncated = [], 0, 0
+        for text in texts:
+            cost = count_tokens(text) + (separator if kept else 0)
+            if used + cost <= budget:
+                kept.append(text)
+                used += cost
+                continue
+            room = budget - used - (separator if kept else 0)
+            if room >= MIN_CHUNK_TOKENS:
+                kept.append(truncate_tokens(text, room))
+                used += room + (separator if len(kept) > 1 else 0)
+                truncated += 1
+            break
+        if not kept:
+            return [], 0, 0
+        return kept, used + MESSAGE_OVERHEAD + count_tokens(CONTEXT_HEADER), truncated
+
+    def assemble(self, history: List[dict], context_texts: List[str], query: str) -> Tuple[List[dict], dict]:
+        """
+        Build the messages: system instructions, history, context, query.
+        Returns them with the token counts per part and what was cut.
+        """
+        instructions = settings.PROMPT_SYSTEM_INSTRUCTIONS
+        system_tokens = self._message_tokens(instructions) if instructions else 0
+        if self.client_instructions:
+            system_tokens += self._message_tokens(self.client_instructions)
+        query_tokens = self._message_tokens(query)
+
+        if self.max_tokens:
+            available = max(0, self.max_tokens - system_tokens - query_tokens)
+            history_need = sum(self._message_tokens(m["content"]) for m in history)
+            history_budget = int(available * self.history_share)
+            context_budget = available - min(history_need, history_budget)
+            context, context_tokens, context_truncated = self._fit_context(context_texts, context_budget)
+            kept_history, history_tokens, history_truncated = self._fit_history(history, available - context_tokens)
+        else:
+            context, context_tokens, context_truncated = self._fit_context(context_texts, 1 << 30)
+            kept_history = list(history)
+            history_tokens = sum(self._message_tokens(m["content"]) for m in history)
+            history_truncated = 0
+
+        messages = []
+        if instructions:
+            messages.append({"role": "system", "content": instructions})
+        messages.extend(kept_history)
+        if context:
+            messages.append({"role": "system", "content": CONTEXT_HEADER + CONTEXT_SEPARATOR.join(context)})
+        messages.append({"role": "user", "content": query})
+
+        stats = {
+            "tokenizer": tokenizer_name(),
+            "budget": self.max_tokens,
+            "total": system_tokens + history_tokens + context_tokens + query_tokens,
+            "system": system_tokens,
+            "history": history_tokens,
+            "context": context_tokens,
+            "query": query_tokens,
+            "history_dropped": len(history) - len(kept_history),
+            "history_truncated": history_truncated,
+            "context_dropped": len(context_texts) - len(context),
+            "context_truncated": context_truncated,
+        }
+        return messages, stats
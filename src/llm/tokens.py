@@ -0,0 +1,3 @@
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token; close enough for budgeting requests
+    return max(1, len(text) // 4)
@@ -1,3 +1,5 @@
+import asyncio
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -5,7 +7,13 @@ from contextlib import asynccontextmanager
 from middlewares.auth_middleware import AuthMiddleware
 from routes import  documents_router, projects_router, query_router, system_router, auth_router
 from helpers import settings
+from helpers.http_client import create_http_client
+from helpers.process_pool import shutdown_process_pool
+from helpers.password_pool import shutdown_password_pool
 from llm.LLMClient import LLMClient
+from llm.PromptBudget import load_encoding
+from workers.ingestion_worker import IngestionWorkerPool
+from workers.history_writer import HistoryWriter
 
 
 @asynccontextmanager
@@ -13,20 +21,58 @@ async def lifespan(app: FastAPI):
     # --- Startup ---
     print("🚀 App is starting up! Initializing resources...")
 
+    # The tokenizer may download its BPE file on first use; do it off the event loop
+    await asyncio.to_thread(load_encoding)
+
+    # One bounded keep-alive pool shared by every provider client
+    app.state.http_client = create_http_client()
+
     app.state.generation_client = LLMClient(base_url = settings.GROQ_BASE_URL,
                                              api_key= settings.GROQ_API_KEY,
-                                             model_name = settings.GROQ_MODEL)
+                                             model_name = settings.GROQ_MODEL,
+                                             http_client = app.state.http_client,
+                                             timeout = settings.GENERATION_TIMEOUT_SECONDS,
+                                             max_concurrency = settings.GENERATION_MAX_CONCURRENCY)
     
+    # Queries and ingestion embed through separate clients, so /query never
+    # waits behind bulk ingestion for a concurrency slot or rate-limit tokens
     app.state.embedding_client = LLMClient(base_url = settings.OLLAMA_BASE_URL,
                                             api_key= settings.OLLAMA_API_KEY,
-                                            model_name = settings.OLLAMA_MODEL)
+                                            model_name = settings.OLLAMA_MODEL,
+                                            http_client = app.state.http_client,
+                                            timeout = settings.EMBEDDING_TIMEOUT_SECONDS,
+                                            max_concurrency = settings.EMBEDDING_MAX_CONCURRENCY,
+                                            tokens_per_minute = settings.QUERY_EMBEDDING_TOKENS_PER_MINUTE)
+
+    app.state.ingestion_embedding_client = LLMClient(base_url = settings.OLLAMA_BASE_URL,
+                                                      api_key= settings.OLLAMA_API_KEY,
+                                                      model_name = settings.OLLAMA_MODEL,
+                                                      http_client = app.state.http_client,
+                                                      timeout = settings.EMBEDDING_TIMEOUT_SECONDS,
+                                                      max_concurrency = settings.EMBEDDING_MAX_CONCURRENCY,
+                                                      tokens_per_minute = settings.EMBEDDING_TOKENS_PER_MINUTE)
+
+    # Background ingestion; set INGESTION_RUN_IN_APP=false to run `python -m workers.ingestion_worker` instead
+    app.state.ingestion_workers = None
+    if settings.INGESTION_RUN_IN_APP:
+        app.state.ingestion_workers = IngestionWorkerPool(app.state.ingestion_embedding_client)
+        await app.state.ingestion_workers.start()
 
+    # Write-behind chat history; also trims conversations when HISTORY_WRITE_MODE=sync
+    app.state.history_writer = HistoryWriter()
+    await app.state.history_writer.start()
 
     print("✅ Resources initialized successfully.")
 
     yield
 
     # --- Shutdown ---
+    if app.state.ingestion_workers:
+        await app.state.ingestion_workers.stop()
+    await app.state.history_writer.stop()
+    await app.state.http_client.aclose()
+    shutdown_process_pool()
+    shutdown_password_pool()
 
     print("👋 App shutdown complete. Goodbye!")
 
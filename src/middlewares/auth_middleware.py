@@ -1,17 +1,47 @@
 # middlewares/auth_middleware.py
+import uuid
 from starlette.types import ASGIApp, Receive, Scope, Send
 from fastapi import Request
 from helpers.security import decode_token
-from sqlalchemy import UUID, select
 from helpers.logger import current_user_id
 from helpers.config import settings
 from helpers.db_connection import async_session
+from helpers.user_cache import user_cache
+from sqlalchemy import select
 from models.postgres.tables_schema.tables import User
 
 class AuthMiddleware:
     def __init__(self, app: ASGIApp):
         self.app = app
 
+    @staticmethod
+    async def resolve_user(payload: dict):
+        """
+        Identity for a decoded access token, cheapest source first:
+          1. username / role claims signed into the token, unless the user was
+             invalidated (role change, logout) after it was issued
+          2. the in-process user cache
+          3. the users table, whose answer is then cached
+        Returns None for unknown users.
+        """
+        uid = payload.get("sub")
+        if not uid:
+            return None
+        if (settings.AUTH_TOKEN_CLAIMS and "role" in payload and "username" in payload
+                and user_cache.claims_valid(uid, payload.get("iat"))):
+            return {"id": uuid.UUID(uid), "username": payload["username"], "role": payload["role"]}
+
+        user_data = user_cache.get(uid)
+        if user_data is None:
+            async with async_session() as db:
+                result = await db.execute(select(User).where(User.id == uid))
+                user = result.scalar_one_or_none()
+            if not user:
+                return None
+            user_data = {"id": user.id, "username": user.username, "role": user.role}
+            user_cache.put(uid, user_data)
+        return user_data
+
     async def __call__(self, scope: Scope, receive: Receive, send: Send):
         if scope["type"] == "http":
             request = Request(scope, receive)
@@ -20,19 +50,9 @@ class AuthMiddleware:
             try:
                 auth_header = request.headers.get("Authorization")
                 if auth_header and auth_header.startswith("Bearer "):
-                    token = auth_header[7:]
-                    payload = decode_token(token)
-                    uid = payload.get("sub")
-                    if uid:
-                        async with async_session() as db:
-                            result = await db.execute(select(User).where(User.id == uid))
-                            user = result.scalar_one_or_none()
-                            if user:
-                                user_data = {
-                                    "id": user.id,
-                                    "username": user.username,
-                                    "role": user.role
-                                }
+                    payload = decode_token(auth_header[7:])
+                    if payload:
+                        user_data = await self.resolve_user(payload) or user_data
             except Exception:
                 pass
 
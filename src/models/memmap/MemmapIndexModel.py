@@ -0,0 +1,267 @@
+import asyncio
+import json
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.postgres.ChunksModel import live_at
+from models.postgres.tables_schema.tables import Chunk, Document, VectorEmbedding
+from models.postgres.operations_schema import VectorOut, VectorSearchResult
+from helpers.config import settings
+from helpers.db_connection import async_session
+from helpers.logger import get_logger
+
+logger = get_logger("MemmapIndexModel")
+
+# Rows upcast at a time when scoring a float16 matrix
+SCORE_BLOCK = 4096
+
+
+# Attempts at opening the manifest's files while concurrent rebuilds replace them
+LOAD_ATTEMPTS = 3
+
+# project_id -> (expires at, database fingerprint), per process
+_fingerprints: Dict[UUID, Tuple[float, List[int]]] = {}
+
+
+class _LoadedIndex:
+    def __init__(self, manifest_mtime: int, fingerprint: List[int], vectors: np.ndarray, chunk_texts: List[str]):
+        self.manifest_mtime = manifest_mtime
+        self.fingerprint = fingerprint
+        self.vectors = vectors
+        self.chunk_texts = chunk_texts
+
+
+class MemmapIndexModel:
+    """
+    In-process retrieval backend: a project's live vectors as one contiguous,
+    L2-normalised matrix (MEMMAP_DTYPE) in a memory-mapped .npy file, scored with
+    a single matrix-vector product and `argpartition`. Chunk texts are stored
+    next to it, so scoring needs no database; the only query is the staleness
+    check, at most once per MEMMAP_FINGERPRINT_CACHE_SECONDS per project.
+
+    Files live in MEMMAP_INDEX_DIR/<project id>/ and are replaced atomically: a
+    new version is written, then `manifest.json` is swapped to point at it.
+    Any process (API or ingestion worker) can rebuild; readers pick the new
+    version up when the manifest changes. A reader that finds the fingerprint
+    no longer matching the database rebuilds in the background and leaves the
+    query to Postgres meanwhile.
+    """
+
+    # Process-wide: project_id -> loaded index / running background rebuild
+    _loaded: Dict[UUID, _LoadedIndex] = {}
+    _rebuilds: Dict[UUID, asyncio.Task] = {}
+
+    def _dir(self, project_id: UUID) -> Path:
+        return Path(settings.MEMMAP_INDEX_DIR) / project_id.hex
+
+    def _read_manifest(self, project_id: UUID) -> Optional[dict]:
+        try:
+            return json.loads((self._dir(project_id) / "manifest.json").read_text())
+        except FileNotFoundError:
+            return None
+
+    async def _fingerprint(self, db: AsyncSession, project_id: UUID) -> List[int]:
+        """
+        Changes whenever the project's live vectors can have changed: generations
+        are globally increasing, so any swap or document delete moves it.
+        """
+        row = (await db.execute(
+            select(func.count(Document.id), func.coalesce(func.sum(Document.active_generation), 0))
+            .where(Document.project_id == project_id)
+        )).one()
+        fingerprint = [int(row[0]), int(row[1])]
+        _fingerprints[project_id] = (time.monotonic() + settings.MEMMAP_FINGERPRINT_CACHE_SECONDS, fingerprint)
+        return fingerprint
+
+    async def _cached_fingerprint(self, db: AsyncSession, project_id: UUID) -> List[int]:
+        """
+        `_fingerprint`, trusted for MEMMAP_FINGERPRINT_CACHE_SECONDS so searches
+        do not pay a round trip each. Changes made through this process refresh
+        it right away; changes made elsewhere are seen once it expires.
+        """
+        cached = _fingerprints.get(project_id)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        return await self._fingerprint(db, project_id)
+
+    # ------------------------- Build -------------------------
+    async def refresh(self, db: AsyncSession, project_id: UUID, force: bool = False) -> dict:
+        """
+        Rebuild the project's matrix from `vector_embeddings` unless it already
+        matches the database. Returns the manifest.
+        """
+        fingerprint = await self._fingerprint(db, project_id)
+        manifest = self._read_manifest(project_id)
+        if (manifest and not force and manifest["fingerprint"] == fingerprint and manifest["dtype"] == settings.MEMMAP_DTYPE
+                and (self._dir(project_id) / f"vectors-{manifest['version']}.npy").exists()):
+            return manifest
+
+        started = time.perf_counter()
+        rows = (await db.execute(
+            select(Chunk.text, VectorEmbedding.embedding)
+            .join(Chunk, Chunk.id == VectorEmbedding.chunk_id)
+            .join(Document, Document.id == VectorEmbedding.document_id)
+            .where(VectorEmbedding.project_id == project_id, live_at(Document.active_generation))
+        )).all()
+        manifest = await asyncio.to_thread(self._write, project_id, fingerprint, rows)
+        logger.info(
+            f"Built memmap index for project {project_id}: {manifest['count']} vectors "
+            f"({manifest['dtype']}) in {time.perf_counter() - started:.2f}s"
+        )
+        return manifest
+
+    def _write(self, project_id: UUID, fingerprint: List[int], rows) -> dict:
+        directory = self._dir(project_id)
+        directory.mkdir(parents=True, exist_ok=True)
+        version = uuid.uuid4().hex[:12]
+
+        dim = len(rows[0].embedding) if rows else 0
+        if rows:
+            vectors = np.lib.format.open_memmap(
+                directory / f"vectors-{version}.npy", mode="w+", dtype=settings.MEMMAP_DTYPE, shape=(len(rows), dim)
+            )
+            for i, row in enumerate(rows):
+                vector = np.asarray(row.embedding, dtype=np.float32)
+                vectors[i] = vector / max(float(np.linalg.norm(vector)), 1e-12)
+            vectors.flush()
+            del vectors
+        else:
+            # Empty arrays cannot be memory-mapped
+            np.save(directory / f"vectors-{version}.npy", np.zeros((0, 0), dtype=settings.MEMMAP_DTYPE))
+        (directory / f"chunks-{version}.json").write_text(
+            json.dumps([row.text for row in rows], ensure_ascii=False), encoding="utf-8"
+        )
+
+        manifest = {"version": version, "fingerprint": fingerprint, "count": len(rows), "dim": dim,
+                    "dtype": settings.MEMMAP_DTYPE}
+        tmp = directory / f"manifest.json.{version}"
+        tmp.write_text(json.dumps(manifest))
+        os.replace(tmp, directory / "manifest.json")
+
+        # Older versions stay readable by processes that still map them (unlinked files
+        # remain mapped); the manifest's version is kept if a concurrent rebuild just won
+        current = (self._read_manifest(project_id) or manifest)["version"]
+        for path in directory.iterdir():
+            if path.name.startswith(("vectors-", "chunks-")) and version not in path.name and current not in path.name:
+                path.unlink(missing_ok=True)
+        return manifest
+
+    def _rebuild_in_background(self, project_id: UUID):
+        """Start a rebuild in a session of its own, unless one is already running."""
+        running = self._rebuilds.get(project_id)
+        if running and not running.done():
+            return
+        self._rebuilds[project_id] = asyncio.create_task(self._rebuild(project_id))
+
+    async def _rebuild(self, project_id: UUID):
+        try:
+            async with async_session() as db:
+                await self.refresh(db, project_id)
+        except Exception as e:
+            logger.error(f"Background rebuild of the memmap index of project {project_id} failed: {e}")
+
+    def drop(self, project_id: UUID):
+        self._loaded.pop(project_id, None)
+        _fingerprints.pop(project_id, None)
+        shutil.rmtree(self._dir(project_id), ignore_errors=True)
+
+    # ------------------------- Search -------------------------
+    def _load(self, project_id: UUID) -> Optional[_LoadedIndex]:
+        """
+        Current version of the project's index, re-mapped when the manifest
+        changed. A rebuild in another process can delete the files of the
+        version just read from the manifest; the manifest is then read again,
+        and if that keeps failing the version already mapped is kept.
+        """
+        directory = self._dir(project_id)
+        for _ in range(LOAD_ATTEMPTS):
+            try:
+                mtime = (directory / "manifest.json").stat().st_mtime_ns
+            except FileNotFoundError:
+                self._loaded.pop(project_id, None)
+                return None
+            loaded = self._loaded.get(project_id)
+            if loaded and loaded.manifest_mtime == mtime:
+                return loaded
+
+            manifest = self._read_manifest(project_id)
+            if manifest is None:
+                continue
+            try:
+                vectors = np.load(directory / f"vectors-{manifest['version']}.npy",
+                                  mmap_mode="r" if manifest["count"] else None)
+                texts = json.loads((directory / f"chunks-{manifest['version']}.json").read_text(encoding="utf-8"))
+            except FileNotFoundError:
+                continue
+            loaded = self._loaded[project_id] = _LoadedIndex(mtime, manifest["fingerprint"], vectors, texts)
+            return loaded
+        logger.warning(f"Memmap index of project {project_id} changed while loading; keeping the mapped version")
+        return self._loaded.get(project_id)
+
+    @staticmethod
+    def _scores(vectors: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """Cosine similarity of every row to `query` (rows and query are normalised)."""
+        if vectors.dtype == np.float32:
+            return vectors @ query
+        # numpy has no BLAS path for float16: upcast block by block
+        scores = np.empty(len(vectors), dtype=np.float32)
+        for start in range(0, len(vectors), SCORE_BLOCK):
+            scores[start:start + SCORE_BLOCK] = vectors[start:start + SCORE_BLOCK].astype(np.float32) @ query
+        return scores
+
+    async def search(
+        self,
+        db: AsyncSession,
+        project_id: UUID,
+        query_vector: List[float],
+        top_k: int,
+        with_embeddings: bool = False,
+    ) -> Optional[VectorSearchResult]:
+        """
+        Exact top-k by cosine distance over the project's matrix.
+
+        The matrix's fingerprint is compared with the project's live vectors
+        (cached, see `_cached_fingerprint`). When it is missing or stale, e.g.
+        after a failed refresh, a rebuild is started in the background and
+        None is returned: the caller answers from Postgres instead of waiting
+        for the rebuild or being served outdated chunks.
+        """
+        started = time.perf_counter()
+        fingerprint = await self._cached_fingerprint(db, project_id)
+        index = self._load(project_id)
+        if index is not None and index.fingerprint != fingerprint:
+            # Another process may have built a matrix newer than the cached fingerprint
+            fingerprint = await self._fingerprint(db, project_id)
+        if index is None or index.fingerprint != fingerprint:
+            self._rebuild_in_background(project_id)
+            return None
+
+        results = []
+        if len(index.chunk_texts):
+            query = np.asarray(query_vector, dtype=np.float32)
+            query /= max(float(np.linalg.norm(query)), 1e-12)
+            scores = self._scores(index.vectors, query)
+            k = min(top_k, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            results = [
+                VectorOut(
+                    text=index.chunk_texts[i], distance=float(1.0 - scores[i]),
+                    embedding=np.asarray(index.vectors[i], dtype=np.float32) if with_embeddings else None,
+                )
+                for i in top
+            ]
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logger.info(f"Retrieved {len(results)}/{top_k} chunks for project {project_id} (memmap) in {elapsed_ms:.2f}ms")
+        return VectorSearchResult(results=results, mode="vector", strategy="memmap", elapsed_ms=round(elapsed_ms, 3),
+                                  params={"dtype": str(index.vectors.dtype)})
@@ -4,7 +4,8 @@ from sqlalchemy import select, delete, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 from models.postgres.tables_schema.tables import User, RefreshToken, ProjectUser
-from helpers.security import hash_password
+from helpers.password_pool import hash_password_async
+from helpers.user_cache import user_cache
 from routes.exceptions import DatabaseError
 from helpers.logger import get_logger
 
@@ -27,9 +28,17 @@ class AuthModel:
             logger.exception(f"DB error fetching user {username}: {e}")
             raise DatabaseError(str(e))
 
+    async def get_user_by_id(self, db: AsyncSession, user_id: str) -> User | None:
+        try:
+            result = await db.execute(select(User).where(User.id == user_id))
+            return result.scalar_one_or_none()
+        except SQLAlchemyError as e:
+            logger.exception(f"DB error fetching user {user_id}: {e}")
+            raise DatabaseError(str(e))
+
     async def create_user(self, db: AsyncSession, username: str, password: str) -> User:
         logger.info(f"Creating user: {username}")
-        new_user = User(username=username, hashed_password=hash_password(password))
+        new_user = User(username=username, hashed_password=await hash_password_async(password))
         db.add(new_user)
         try:
             await db.commit()
@@ -115,6 +124,7 @@ class AuthModel:
         try:
             await db.execute(update(User).where(User.id == user_id).values(role=new_role))
             await db.commit()
+            user_cache.invalidate(user_id)
             logger.info(f"User {user_id} role updated successfully to {new_role}")
         except SQLAlchemyError as e:
             await db.rollback()
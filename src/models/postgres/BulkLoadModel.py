@@ -0,0 +1,284 @@
+import json
+import struct
+import time
+import uuid
+from collections import defaultdict, deque
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .BaseModel import BaseModel
+from .ChunksModel import live_at
+from models.postgres.tables_schema.tables import Chunk, Document, VectorEmbedding, ingest_generation_seq
+from models.postgres.operations_schema import ChunkInsert, DocumentOut
+from routes.exceptions import DatabaseError
+from helpers.logger import get_logger
+
+logger = get_logger("BulkLoadModel")
+
+
+def _encode_vector(vector) -> bytes:
+    # pgvector binary format: uint16 dim, uint16 unused, dim x float32 (big-endian)
+    dim = len(vector)
+    return struct.pack(f">HH{dim}f", dim, 0, *vector)
+
+
+def _decode_vector(data: bytes) -> list:
+    dim, _ = struct.unpack_from(">HH", data)
+    return list(struct.unpack_from(f">{dim}f", data, 4))
+
+
+def diff_chunks(existing: list, chunks: List[ChunkInsert]) -> dict:
+    """
+    Match new chunks against the existing `(id, content_hash, chunk_order)` rows.
+
+    Rows matching on hash and order are kept as they are; rows matching on
+    hash only are moved to the new order; unmatched new chunks are inserted
+    and unmatched rows retired. A hash repeated more often than before is
+    inserted even though the document already has it.
+    """
+    exact, by_hash, used = {}, defaultdict(deque), set()
+    for row in sorted(existing, key=lambda r: (r.chunk_order is None, r.chunk_order)):
+        if row.content_hash is None:
+            continue
+        exact.setdefault((row.content_hash, row.chunk_order), row)
+        by_hash[row.content_hash].append(row)
+
+    kept, moved, inserted, unmatched = [], [], [], []
+    for chunk in chunks:
+        row = exact.get((chunk.content_hash, chunk.chunk_order))
+        if row is not None and row.id not in used:
+            used.add(row.id)
+            kept.append(row.id)
+        else:
+            unmatched.append(chunk)
+
+    for chunk in unmatched:
+        candidates = by_hash.get(chunk.content_hash)
+        while candidates and candidates[0].id in used:
+            candidates.popleft()
+        if candidates:
+            row = candidates.popleft()
+            used.add(row.id)
+            moved.append((row.id, chunk))
+        else:
+            inserted.append(chunk)
+
+    retired = [row.id for row in existing if row.id not in used]
+    return {"kept": kept, "moved": moved, "inserted": inserted, "retired": retired}
+
+
+class BulkLoadModel(BaseModel):
+    """
+    Incrementally loads a document's chunks and embeddings.
+
+    A run diffs the new chunks against the document's latest chunk set and
+    stages only the difference under a fresh ingest generation: new chunks
+    (and their vectors) are written through asyncpg binary COPY
+    (`copy_records_to_table`), dropped chunks are marked retired, unchanged
+    rows are not touched and rows that only moved get their new position in
+    the swap. Bumping `documents.active_generation` then swaps
+    the change in with one short transaction, so readers see either the
+    previous version of the document or the new one, never a mix.
+    """
+
+    def __init__(self):
+        super().__init__()
+
+    async def _driver_connection(self, db: AsyncSession):
+        conn = await db.connection()
+        raw = await conn.get_raw_connection()
+        return raw.driver_connection
+
+    # ------------------------- Stage -------------------------
+    async def stage_generation(
+        self,
+        db: AsyncSession,
+        project_id: UUID,
+        document_id: UUID,
+        chunks: List[ChunkInsert],
+        vectors: Dict[str, List[float]],
+    ) -> Tuple[int, dict, List[Tuple[UUID, ChunkInsert]]]:
+        """
+        Diff and stage the document's new chunk set under a new generation and
+        commit it; it stays invisible until `swap_generation`. Returns the
+        generation, the diff summary and the moved rows, whose new position
+        `swap_generation` applies.
+
+        `vectors` maps content hashes to embeddings and must cover every chunk
+        whose content is not already in the document; chunks repeating
+        existing content reuse that row's vector. Chunk UUIDs are generated
+        client-side so vectors can reference them without a round trip.
+        """
+        try:
+            # Regular statements first: they open the transaction the COPYs below join.
+            # The row lock serializes concurrent stagings of the same document.
+            base = (await db.execute(
+                select(Document.staging_generation).where(Document.id == document_id).with_for_update()
+            )).scalar_one()
+            generation = (await db.execute(select(ingest_generation_seq.next_value()))).scalar_one()
+            await db.execute(update(Document).where(Document.id == document_id).values(staging_generation=generation))
+
+            existing = (await db.execute(
+                select(Chunk.id, Chunk.content_hash, Chunk.chunk_order)
+                .where(Chunk.document_id == document_id, live_at(base))
+            )).fetchall()
+            diff = diff_chunks(existing, chunks)
+
+            # Moved rows stay in place: only their position changes, in the swap
+            retired, inserted = diff["retired"], diff["inserted"]
+
+            known = {c.content_hash for c in inserted} - vectors.keys()
+            if known:
+                vectors = {**vectors, **await self._existing_vectors(db, project_id, document_id, base, known)}
+            missing = known - vectors.keys()
+            if missing:
+                raise ValueError(f"{len(missing)} chunk(s) changed concurrently and have no embedding; retry")
+
+            if retired:
+                await db.execute(
+                    update(Chunk).where(Chunk.id.in_(retired)).values(retired_generation=generation)
+                )
+            if inserted:
+                await self._copy_chunks(db, project_id, document_id, inserted, vectors, generation)
+
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Staging failed for document {document_id}: {e}")
+            raise DatabaseError(f"Failed to stage document {document_id}: {str(e)}") from e
+
+        summary = {key: len(value) for key, value in diff.items()}
+        return generation, summary, diff["moved"]
+
+    async def _existing_vectors(self, db: AsyncSession, project_id: UUID, document_id: UUID,
+                                base: int, hashes: set) -> Dict[str, List[float]]:
+        """Vectors of the document's live chunks with the given content hashes, one per hash."""
+        rows = await db.execute(
+            select(Chunk.content_hash, VectorEmbedding.embedding)
+            .join(VectorEmbedding, VectorEmbedding.chunk_id == Chunk.id)
+            .where(
+                VectorEmbedding.project_id == project_id,
+                Chunk.document_id == document_id,
+                Chunk.content_hash.in_(hashes),
+                live_at(base),
+            )
+            .distinct(Chunk.content_hash)
+        )
+        return {row.content_hash: [float(x) for x in row.embedding] for row in rows}
+
+    async def _copy_chunks(self, db: AsyncSession, project_id: UUID, document_id: UUID,
+                           chunks: List[ChunkInsert], vectors: Dict[str, List[float]], generation: int):
+        chunk_ids = [uuid.uuid4() for _ in chunks]
+        conn = await self._driver_connection(db)
+        await conn.copy_records_to_table(
+            "chunks",
+            columns=["id", "document_id", "text", "metadata_json", "content_hash", "chunk_order", "generation"],
+            records=[
+                (chunk_id, chunk.document_id, chunk.text,
+                 json.dumps(chunk.metadata_json) if chunk.metadata_json is not None else None,
+                 chunk.content_hash, chunk.chunk_order, generation)
+                for chunk_id, chunk in zip(chunk_ids, chunks)
+            ],
+        )
+
+        # The binary vector codec is only registered for the COPY, so the
+        # ORM keeps using pgvector's text binding on this pooled connection.
+        await conn.set_type_codec(
+            "vector", schema="public", encoder=_encode_vector, decoder=_decode_vector, format="binary"
+        )
+        try:
+            await conn.copy_records_to_table(
+                "vector_embeddings",
+                columns=["project_id", "document_id", "chunk_id", "embedding", "generation"],
+                records=[
+                    (project_id, document_id, chunk_id, vectors[chunk.content_hash], generation)
+                    for chunk_id, chunk in zip(chunk_ids, chunks)
+                ],
+            )
+        finally:
+            await conn.reset_type_codec("vector", schema="public")
+
+    # ------------------------- Swap -------------------------
+    async def swap_generation(self, db: AsyncSession, document_id: UUID, generation: int,
+                              moved: List[Tuple[UUID, ChunkInsert]] = ()) -> Optional[DocumentOut]:
+        """
+        Make `generation` the document's live version, and give the `moved`
+        rows (from `stage_generation`) their new position in the same
+        transaction, so readers see the old order or the new one. Returns None
+        when a later run has staged on top of it since; that run's swap
+        publishes both, with the positions its own diff found.
+        """
+        stmt = (
+            update(Document)
+            .where(Document.id == document_id, Document.staging_generation == generation)
+            .values(active_generation=generation, is_processed=True)
+            .returning(Document)
+        )
+        try:
+            result = await db.execute(stmt)
+            document = result.scalar_one_or_none()
+            if document is not None and moved:
+                # Same text and vector, new position: only the chunk row changes
+                await db.execute(update(Chunk), [
+                    {"id": chunk_id, "chunk_order": chunk.chunk_order, "metadata_json": chunk.metadata_json}
+                    for chunk_id, chunk in moved
+                ])
+            await db.commit()
+            return DocumentOut.model_validate(document) if document else None
+        except SQLAlchemyError as e:
+            await db.rollback()
+            logger.error(f"Generation swap failed for document {document_id}: {e}")
+            raise DatabaseError(f"Failed to swap document {document_id}: {str(e)}") from e
+
+    # ------------------------- Garbage Collect -------------------------
+    async def drop_retired(self, db: AsyncSession, document_id: UUID, generation: int) -> int:
+        """
+        Delete chunks retired at or before `generation`; their vectors go with
+        them through the `chunk_id` cascade.
+        """
+        try:
+            result = await db.execute(
+                delete(Chunk).where(Chunk.document_id == document_id, Chunk.retired_generation <= generation)
+            )
+            await db.commit()
+            return result.rowcount or 0
+        except SQLAlchemyError as e:
+            await db.rollback()
+            logger.warning(f"Could not drop retired chunks of document {document_id}: {e}")
+            return 0
+
+    # ------------------------- Load -------------------------
+    async def load_document(
+        self,
+        db: AsyncSession,
+        project_id: UUID,
+        document_id: UUID,
+        chunks: List[ChunkInsert],
+        vectors: Dict[str, List[float]],
+    ) -> Tuple[DocumentOut, dict]:
+        """
+        Stage, swap, then drop retired chunks: three commits per document
+        regardless of its size. Returns the document and the diff summary
+        (kept / moved / inserted / retired chunk counts).
+        """
+        started = time.perf_counter()
+        generation, summary, moved = await self.stage_generation(db, project_id, document_id, chunks, vectors)
+
+        document = await self.swap_generation(db, document_id, generation, moved)
+        if document is None:
+            logger.info(f"Generation {generation} of document {document_id} was superseded before its swap")
+            current = (await db.execute(select(Document).where(Document.id == document_id))).scalar_one()
+            return DocumentOut.model_validate(current), summary
+
+        await self.drop_retired(db, document_id, generation)
+
+        logger.info(
+            f"Loaded document {document_id} as generation {generation}: {summary['inserted']} inserted, "
+            f"{summary['retired']} retired, {summary['kept']} kept, {summary['moved']} moved "
+            f"in {time.perf_counter() - started:.3f}s"
+        )
+        return document, summary
@@ -1,17 +1,28 @@
-from typing import List
+from typing import List, Set
 from uuid import UUID
 
-from sqlalchemy import delete, select
+from sqlalchemy import and_, delete, or_, select
 from sqlalchemy.exc import IntegrityError
 
 from .BaseModel import BaseModel
-from models.postgres.tables_schema.tables import Chunk
+from models.postgres.tables_schema.tables import Chunk, Document
 from models.postgres.operations_schema import ChunkInsert, ChunkOut
 from helpers.logger import get_logger
 
 logger = get_logger("ChunksModel")
 
 
+def live_at(generation):
+    """
+    Filter for chunks live at `generation` (a number or a column such as
+    `Document.active_generation`): born at or before it and not yet retired.
+    """
+    return and_(
+        Chunk.generation <= generation,
+        or_(Chunk.retired_generation.is_(None), Chunk.retired_generation > generation),
+    )
+
+
 class ChunksModel(BaseModel):
     def __init__(self):
         super().__init__()
@@ -79,3 +90,16 @@ class ChunksModel(BaseModel):
         else:
             logger.info(f"No chunks to delete for document_id={document_id}")
         return deleted
+
+    async def get_latest_hashes(self, db, document_id: UUID) -> Set[str]:
+        """
+        Content hashes of the document's latest chunk set (the most recently
+        staged generation, swapped in or not).
+        """
+        stmt = (
+            select(Chunk.content_hash)
+            .join(Document, Document.id == Chunk.document_id)
+            .where(Chunk.document_id == document_id, live_at(Document.staging_generation))
+        )
+        result = await db.execute(stmt)
+        return {row.content_hash for row in result.fetchall() if row.content_hash}
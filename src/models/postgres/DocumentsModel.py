@@ -2,7 +2,8 @@ from typing import Dict, Optional, List, Any
 from uuid import UUID
 import logging
 
-from sqlalchemy import select, delete, func, and_, update
+from sqlalchemy import select, delete, func, and_, update, any_, bindparam, String
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.sql.elements import ClauseElement
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -42,32 +43,53 @@ class DocumentsModel:
             raise ValueError(f"Document '{doc_data.filename}' already exists for project '{doc_data.project_id}'.")
 
     # ------------------------- Bulk Insert -------------------------
-    async def insert_documents_bulk(self, db: AsyncSession, bulk_data: DocumentInsertBulk, batch_size: int = 100) -> List[DocumentOut]:
+    async def insert_documents_bulk(self, db: AsyncSession, bulk_data: DocumentInsertBulk, batch_size: int = 500) -> List[DocumentOut]:
+        """
+        Insert documents with one `INSERT ... ON CONFLICT DO NOTHING RETURNING` per
+        batch and a single commit. Filenames that already exist for the project
+        are skipped; callers detect them as the names missing from the result.
+        """
         logger.info(f"[BULK INSERT] Bulk insert for project '{bulk_data.project_id}', total: {len(bulk_data.documents)}")
         inserted_docs = []
 
-        for i in range(0, len(bulk_data.documents), batch_size):
-            batch = bulk_data.documents[i:i + batch_size]
-            db_objects = []
-            for doc in batch:
-                d = Document(project_id=bulk_data.project_id, filename=doc.filename)
-                d.metadata_json = doc.metadata
-                db_objects.append(d)
-
-            db.add_all(db_objects)
-            try:
-                await db.commit()
-                for doc in db_objects:
-                    await db.refresh(doc)
-                inserted_docs.extend(db_objects)
-                logger.info(f"[BULK INSERT] Inserted batch of {len(db_objects)} documents")
-            except IntegrityError as e:
-                await db.rollback()
-                logger.error(f"[BULK INSERT] Failed batch: {e}")
-                raise ValueError("Some documents already exist for this project.")
+        try:
+            for i in range(0, len(bulk_data.documents), batch_size):
+                batch = bulk_data.documents[i:i + batch_size]
+                stmt = (
+                    pg_insert(Document)
+                    .values([
+                        {"project_id": bulk_data.project_id, "filename": doc.filename, "metadata_json": doc.metadata}
+                        for doc in batch
+                    ])
+                    .on_conflict_do_nothing(constraint="uq_project_filename")
+                    .returning(Document)
+                )
+                result = await db.execute(stmt)
+                rows = result.scalars().all()
+                inserted_docs.extend(rows)
+                logger.info(f"[BULK INSERT] Inserted {len(rows)}/{len(batch)} documents in batch")
+            await db.commit()
+        except IntegrityError as e:
+            await db.rollback()
+            logger.error(f"[BULK INSERT] Failed batch: {e}")
+            raise ValueError("Failed to insert documents for this project.")
 
         return [DocumentOut.model_validate(doc) for doc in inserted_docs]
 
+    # ------------------------- Existing Filenames -------------------------
+    async def find_existing_filenames(self, db: AsyncSession, project_id: UUID, filenames: List[str]) -> set[str]:
+        """
+        Return which of `filenames` already exist in the project, in one `filename = ANY(...)` query.
+        """
+        if not filenames:
+            return set()
+        stmt = select(Document.filename).where(
+            Document.project_id == project_id,
+            Document.filename == any_(bindparam("filenames", value=list(filenames), type_=ARRAY(String)))
+        )
+        result = await db.execute(stmt)
+        return set(result.scalars().all())
+
     # ------------------------- Delete Document -------------------------
     async def del_document(self, db: AsyncSession, doc_data: DocumentDelete) -> Optional[DocumentOut]:
         logger.info(f"[DELETE] Deleting document '{doc_data.filename}' for project '{doc_data.project_id}'")
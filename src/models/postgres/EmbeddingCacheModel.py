@@ -0,0 +1,66 @@
+from typing import Dict, List
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .BaseModel import BaseModel
+from models.postgres.tables_schema.tables import EmbeddingCache
+from routes.exceptions import DatabaseError
+from helpers.logger import get_logger
+
+logger = get_logger("EmbeddingCacheModel")
+
+
+class EmbeddingCacheModel(BaseModel):
+    """
+    Persistent embedding cache keyed by (model_name, content_hash).
+    """
+
+    def __init__(self):
+        super().__init__()
+
+    # ------------------------- Get Embeddings -------------------------
+    async def get_embeddings(self, db: AsyncSession, model_name: str, hashes: List[str]) -> Dict[str, List[float]]:
+        """
+        Return the cached embeddings for the given content hashes (missing hashes are omitted).
+        """
+        if not hashes:
+            return {}
+        try:
+            stmt = select(EmbeddingCache.content_hash, EmbeddingCache.embedding).where(
+                EmbeddingCache.model_name == model_name,
+                EmbeddingCache.content_hash.in_(hashes)
+            )
+            result = await db.execute(stmt)
+            found = {row.content_hash: [float(x) for x in row.embedding] for row in result.fetchall()}
+            logger.info(f"Embedding cache lookup: {len(found)}/{len(hashes)} found [model={model_name}]")
+            return found
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to read embedding cache [model={model_name}] - {str(e)}")
+            raise DatabaseError(f"Failed to read embedding cache: {str(e)}") from e
+
+    # ------------------------- Store Embeddings -------------------------
+    async def put_embeddings(self, db: AsyncSession, model_name: str, items: Dict[str, List[float]], batch_size: int = 1000):
+        """
+        Store embeddings, ignoring hashes that are already cached.
+        """
+        if not items:
+            return
+        rows = [
+            {"model_name": model_name, "content_hash": content_hash, "embedding": embedding}
+            for content_hash, embedding in items.items()
+        ]
+        try:
+            for i in range(0, len(rows), batch_size):
+                stmt = insert(EmbeddingCache).values(rows[i:i + batch_size]).on_conflict_do_nothing(
+                    index_elements=["model_name", "content_hash"]
+                )
+                await db.execute(stmt)
+            await db.commit()
+            logger.info(f"Stored {len(items)} embedding(s) in cache [model={model_name}]")
+        except SQLAlchemyError as e:
+            await db.rollback()
+            logger.error(f"Failed to write embedding cache [model={model_name}] - {str(e)}")
+            raise DatabaseError(f"Failed to write embedding cache: {str(e)}") from e
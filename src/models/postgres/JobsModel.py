@@ -0,0 +1,154 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import select, update, func, literal, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .BaseModel import BaseModel
+from models.postgres.tables_schema.tables import IngestionJob
+from models.postgres.operations_schema.jobs import JobInsert, JobOut
+from routes.exceptions import DatabaseError
+from helpers.logger import get_logger
+
+logger = get_logger("JobsModel")
+
+
+class JobsModel(BaseModel):
+    """
+    Persistence for ingestion jobs. Claiming uses `FOR UPDATE SKIP LOCKED`,
+    so any number of worker tasks or processes can share the same queue.
+    """
+
+    def __init__(self):
+        super().__init__()
+
+    # ------------------------- Create Job -------------------------
+    async def create_job(self, db: AsyncSession, data: JobInsert) -> JobOut:
+        logger.info(f"Creating ingestion job for project {data.project_id} ({len(data.files)} file(s))")
+        job = IngestionJob(project_id=data.project_id, user_id=data.user_id, params=data.params, files=data.files)
+        db.add(job)
+        try:
+            await db.commit()
+            await db.refresh(job)
+            logger.info(f"Ingestion job {job.id} queued")
+            return JobOut.model_validate(job)
+        except SQLAlchemyError as e:
+            await db.rollback()
+            logger.error(f"Failed to create ingestion job - {str(e)}")
+            raise DatabaseError(str(e))
+
+    # ------------------------- Get Job -------------------------
+    async def get_job(self, db: AsyncSession, job_id: UUID) -> Optional[JobOut]:
+        result = await db.execute(select(IngestionJob).where(IngestionJob.id == job_id))
+        job = result.scalar_one_or_none()
+        return JobOut.model_validate(job) if job else None
+
+    # ------------------------- Claim Next Job -------------------------
+    async def claim_next_job(self, db: AsyncSession) -> Optional[JobOut]:
+        """
+        Atomically move the oldest queued job to 'running' and return it.
+        """
+        next_id = (
+            select(IngestionJob.id)
+            .where(IngestionJob.status == "queued")
+            .order_by(IngestionJob.created_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        stmt = (
+            update(IngestionJob)
+            .where(IngestionJob.id == next_id)
+            .values(status="running", started_at=func.now(), attempts=IngestionJob.attempts + 1)
+            .returning(IngestionJob)
+        )
+        try:
+            result = await db.execute(stmt)
+            await db.commit()
+            job = result.scalar_one_or_none()
+            if job:
+                logger.info(f"Claimed ingestion job {job.id} (attempt {job.attempts})")
+            return JobOut.model_validate(job) if job else None
+        except SQLAlchemyError as e:
+            await db.rollback()
+            logger.error(f"Failed to claim ingestion job - {str(e)}")
+            raise DatabaseError(str(e))
+
+    # ------------------------- Update File Progress -------------------------
+    async def update_file_progress(self, db: AsyncSession, job_id: UUID, file_name: str, patch: dict):
+        """
+        Merge `patch` into `files[file_name]`; this also refreshes the job heartbeat (`updated_at`).
+        """
+        current = func.coalesce(IngestionJob.files[file_name], text("'{}'::jsonb"))
+        merged = func.jsonb_build_object(file_name, current.op("||")(literal(patch, JSONB)))
+        stmt = (
+            update(IngestionJob)
+            .where(IngestionJob.id == job_id)
+            .values(files=IngestionJob.files.op("||")(merged), updated_at=func.now())
+        )
+        try:
+            await db.execute(stmt)
+            await db.commit()
+        except SQLAlchemyError as e:
+            await db.rollback()
+            logger.error(f"Failed to update progress of job {job_id} for '{file_name}' - {str(e)}")
+            raise DatabaseError(str(e))
+
+    # ------------------------- Heartbeat -------------------------
+    async def heartbeat(self, db: AsyncSession, job_id: UUID):
+        """Refresh `updated_at` of a running job so it is not taken for stale."""
+        stmt = (
+            update(IngestionJob)
+            .where(IngestionJob.id == job_id, IngestionJob.status == "running")
+            .values(updated_at=func.now())
+        )
+        try:
+            await db.execute(stmt)
+            await db.commit()
+        except SQLAlchemyError as e:
+            await db.rollback()
+            logger.error(f"Failed to refresh heartbeat of job {job_id} - {str(e)}")
+            raise DatabaseError(str(e))
+
+    # ------------------------- Finish Job -------------------------
+    async def finish_job(self, db: AsyncSession, job_id: UUID, status: str, result: Optional[dict] = None, error: Optional[str] = None):
+        stmt = (
+            update(IngestionJob)
+            .where(IngestionJob.id == job_id)
+            .values(status=status, result=result, error=error, finished_at=func.now(), updated_at=func.now())
+        )
+        try:
+            await db.execute(stmt)
+            await db.commit()
+            logger.info(f"Ingestion job {job_id} finished with status '{status}'")
+        except SQLAlchemyError as e:
+            await db.rollback()
+            logger.error(f"Failed to finish job {job_id} - {str(e)}")
+            raise DatabaseError(str(e))
+
+    # ------------------------- Requeue Stale Jobs -------------------------
+    async def requeue_stale_jobs(self, db: AsyncSession, stale_after_seconds: int) -> int:
+        """
+        Put 'running' jobs whose heartbeat is older than `stale_after_seconds`
+        back in the queue; they belonged to a worker that died mid-job.
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=stale_after_seconds)
+        stmt = (
+            update(IngestionJob)
+            .where(IngestionJob.status == "running", IngestionJob.updated_at < cutoff)
+            .values(status="queued", updated_at=func.now())
+        )
+        try:
+            result = await db.execute(stmt)
+            await db.commit()
+            count = result.rowcount or 0
+            if count:
+                logger.warning(f"Requeued {count} stale ingestion job(s)")
+            return count
+        except SQLAlchemyError as e:
+            await db.rollback()
+            logger.error(f"Failed to requeue stale jobs - {str(e)}")
+            raise DatabaseError(str(e))
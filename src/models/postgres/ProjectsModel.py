@@ -1,18 +1,50 @@
-from sqlalchemy import select, update, delete, func
+import uuid
+from sqlalchemy import select, update, delete, func, exists, case, bindparam
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
-from models.postgres.tables_schema.tables import Project
-from models.postgres.operations_schema.projects import ProjectInsert, ProjectUpdate, ProjectDelete, ProjectList, ProjectSearch, ProjectOut
+from models.postgres.tables_schema.tables import Project, ProjectUser, HistoryMessage
+from models.postgres.operations_schema.projects import ProjectInsert, ProjectUpdate, ProjectDelete, ProjectList, ProjectSearch, ProjectOut, ProjectQueryContext
 from routes.exceptions import DatabaseError, ProjectNotFound
+from helpers.config import settings
 from helpers.logger import get_logger
 
 logger = get_logger("ProjectModel")
 
+# Everything a query needs before retrieval, in one statement: the project by
+# name, whether the user may query it and (only if so) their history. Built
+# once, so every call runs the same SQL text and reuses the compiled statement
+# and the connection's prepared statement.
+_HAS_ACCESS = exists().where(ProjectUser.project_id == Project.id, ProjectUser.user_id == bindparam("user_id"))
+_RECENT_MESSAGES = (
+    select(HistoryMessage.id, HistoryMessage.seq, HistoryMessage.role, HistoryMessage.content)
+    .where(HistoryMessage.project_id == Project.id, HistoryMessage.user_id == bindparam("user_id"))
+    .order_by(HistoryMessage.seq.desc())
+    .limit(settings.HISTORY_MAX_MESSAGES)
+    .correlate(Project)
+    .subquery()
+)
+_HISTORY = select(
+    func.jsonb_agg(aggregate_order_by(
+        func.jsonb_build_object(
+            "id", _RECENT_MESSAGES.c.id, "role", _RECENT_MESSAGES.c.role, "content", _RECENT_MESSAGES.c.content,
+        ),
+        _RECENT_MESSAGES.c.seq,
+    ))
+).scalar_subquery()
+QUERY_CONTEXT = select(
+    Project, _HAS_ACCESS.label("has_access"), case((_HAS_ACCESS, _HISTORY)).label("history")
+).where(Project.name == bindparam("name"))
+
 class ProjectModel:
 
     async def insert_project(self, db: AsyncSession, data: ProjectInsert) -> ProjectOut:
         logger.info(f"Inserting project '{data.name}'")
-        new_project = Project(name=data.name, description=data.description)
+        new_project = Project(
+            name=data.name, description=data.description, recall_target=data.recall_target,
+            vector_storage=data.vector_storage or "full",
+            retrieval_backend=data.retrieval_backend or "postgres",
+        )
         db.add(new_project)
         try:
             await db.commit()
@@ -58,6 +90,26 @@ class ProjectModel:
             logger.exception(f"Failed to search project '{data.name}': {e}")
             raise DatabaseError(str(e))
 
+    async def get_query_context(self, db: AsyncSession, name: str, user_id: uuid.UUID) -> ProjectQueryContext | None:
+        """
+        Resolve project `name`, check `user_id`'s access and load their history
+        in a single round trip. None if the project does not exist.
+        """
+        try:
+            result = await db.execute(QUERY_CONTEXT, {"name": name, "user_id": user_id})
+            row = result.one_or_none()
+            if row is None:
+                logger.warning(f"Project '{name}' not found")
+                return None
+            return ProjectQueryContext(
+                project=ProjectOut.model_validate(row.Project),
+                has_access=row.has_access,
+                history=row.history or [],
+            )
+        except Exception as e:
+            logger.exception(f"Failed to load query context for project '{name}': {e}")
+            raise DatabaseError(str(e))
+
     async def update_project(self, db: AsyncSession, data: ProjectUpdate) -> ProjectOut | None:
         logger.info(f"Updating project '{data.old_name}'")
         update_values = {}
@@ -65,6 +117,12 @@ class ProjectModel:
             update_values["name"] = data.new_name
         if data.description:
             update_values["description"] = data.description
+        if data.recall_target is not None:
+            update_values["recall_target"] = data.recall_target
+        if data.vector_storage is not None:
+            update_values["vector_storage"] = data.vector_storage
+        if data.retrieval_backend is not None:
+            update_values["retrieval_backend"] = data.retrieval_backend
 
         try:
             stmt = update(Project).where(Project.name == data.old_name).values(**update_values).returning(Project)
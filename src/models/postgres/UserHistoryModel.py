@@ -1,67 +1,106 @@
-from typing import Dict, List
+from typing import Dict, Iterable, List, Tuple
 import uuid
 import logging
-from sqlalchemy import select
-from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy import select, delete, insert, func, text, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from .BaseModel import BaseModel
-from models.postgres.tables_schema.tables import UserHistory
+from models.postgres.tables_schema.tables import HistoryMessage
+from helpers.config import settings
 from routes.exceptions import DatabaseError
 
 logger = logging.getLogger("UserHistoryModel")
 
 class UserHistoryModel(BaseModel):
     """
-    Provides access to user history per project.
+    Provides access to user history per project, stored as append-only
+    `history_messages` rows.
     """
 
     def __init__(self):
         super().__init__()
 
+    @staticmethod
+    def new_message(user_id: uuid.UUID, project_id: uuid.UUID, role: str, content: str) -> Dict:
+        """A `history_messages` row for `append_messages`, with its id assigned up front."""
+        return {"id": uuid.uuid4(), "user_id": user_id, "project_id": project_id, "role": role, "content": content}
+
     # ------------------------- Get History -------------------------
     async def get_history(self, db: AsyncSession, user_id: uuid.UUID, project_id: uuid.UUID) -> List[Dict]:
         """
-        Retrieve the chat history for a given user and project.
+        Retrieve the newest HISTORY_MAX_MESSAGES messages for a given user and
+        project, oldest first.
         """
         try:
             logger.info(f"Attempting to fetch history [user={user_id}, project={project_id}]")
-            stmt = select(UserHistory.history).where(
-                UserHistory.user_id == user_id,
-                UserHistory.project_id == project_id
+            stmt = (
+                select(HistoryMessage.role, HistoryMessage.content)
+                .where(HistoryMessage.user_id == user_id, HistoryMessage.project_id == project_id)
+                .order_by(HistoryMessage.seq.desc())
+                .limit(settings.HISTORY_MAX_MESSAGES)
             )
-            result = await db.execute(stmt)
-            history = result.scalar_one_or_none()
+            rows = (await db.execute(stmt)).all()
             logger.info(f"Successfully fetched history [user={user_id}, project={project_id}]")
-            return history or []
+            return [{"role": row.role, "content": row.content} for row in reversed(rows)]
 
         except Exception as e:
             logger.error(f"Failed to fetch history [user={user_id}, project={project_id}] - {str(e)}")
             raise DatabaseError(f"Failed to fetch history: {str(e)}") from e
 
-    # ------------------------- Update / Upsert History -------------------------
-    async def update_history(self, db: AsyncSession, user_id: uuid.UUID, project_id: uuid.UUID, history: List[Dict]):
+    # ------------------------- Append History -------------------------
+    async def append_messages(self, db: AsyncSession, messages: List[Dict], synchronous_commit: bool = True):
         """
-        Upsert the chat history for a given user and project.
+        Insert `messages` (rows from `new_message`, in order) in one statement.
+        With `synchronous_commit=False` the commit returns before its WAL is
+        flushed: a database crash can lose the last moments of history, but
+        never leaves it inconsistent.
         """
+        if not messages:
+            return
         try:
-            logger.info(f"Attempting to update history [user={user_id}, project={project_id}]")
-            stmt = insert(UserHistory).values(
-                user_id=user_id,
-                project_id=project_id,
-                history=history
-            ).on_conflict_do_update(
-                index_elements=['user_id', 'project_id'],
-                set_={'history': history}
-            ).returning(UserHistory)
+            if not synchronous_commit:
+                await db.execute(text("SET LOCAL synchronous_commit = off"))
+            await db.execute(insert(HistoryMessage), messages)
+            await db.commit()
+            logger.info(f"Appended {len(messages)} history message(s)")
+
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Failed to append {len(messages)} history message(s) - {str(e)}")
+            raise DatabaseError(f"Failed to append history: {str(e)}") from e
 
-            result = await db.execute(stmt)
+    # ------------------------- Trim History -------------------------
+    async def trim(self, db: AsyncSession, conversations: Iterable[Tuple[uuid.UUID, uuid.UUID]]) -> int:
+        """
+        Delete all but the newest HISTORY_MAX_MESSAGES messages of each
+        (user_id, project_id) conversation. Returns the number of rows deleted.
+        """
+        conversations = list(conversations)
+        if not conversations:
+            return 0
+        try:
+            ranked = (
+                select(
+                    HistoryMessage.id,
+                    func.row_number().over(
+                        partition_by=(HistoryMessage.user_id, HistoryMessage.project_id),
+                        order_by=HistoryMessage.seq.desc(),
+                    ).label("position"),
+                )
+                .where(tuple_(HistoryMessage.user_id, HistoryMessage.project_id).in_(conversations))
+                .subquery()
+            )
+            result = await db.execute(
+                delete(HistoryMessage).where(
+                    HistoryMessage.id.in_(select(ranked.c.id).where(ranked.c.position > settings.HISTORY_MAX_MESSAGES))
+                )
+            )
             await db.commit()
-            updated_record = result.scalar_one_or_none()
-            logger.info(f"Successfully updated history [user={user_id}, project={project_id}]")
-            return updated_record
+            if result.rowcount:
+                logger.info(f"Trimmed {result.rowcount} history message(s) from {len(conversations)} conversation(s)")
+            return result.rowcount
 
         except Exception as e:
             await db.rollback()
-            logger.error(f"Failed to update history [user={user_id}, project={project_id}] - {str(e)}")
-            raise DatabaseError(f"Failed to update history: {str(e)}") from e
+            logger.error(f"Failed to trim history of {len(conversations)} conversation(s) - {str(e)}")
+            raise DatabaseError(f"Failed to trim history: {str(e)}") from e
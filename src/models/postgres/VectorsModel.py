@@ -1,22 +1,324 @@
 # src/models/vector_model.py
 import logging
-from typing import List
+import math
+import re
+import time
+from typing import Dict, List, Optional, Tuple
 from uuid import UUID
 
-from sqlalchemy import Float, insert, select, delete
+from pgvector.sqlalchemy import BIT, HALFVEC, Vector
+from sqlalchemy import ARRAY, Float, Text, and_, cast, insert, literal, literal_column, select, delete, func, text
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.exc import IntegrityError
 
 from .BaseModel import BaseModel
-from models.postgres.tables_schema.tables import VectorEmbedding, Chunk
-from models.postgres.operations_schema import VectorInsertItems, VectorOut
+from .ChunksModel import live_at
+from models.postgres.tables_schema.tables import (
+    VectorEmbedding, Chunk, Document, EMBEDDING_DIM, VECTOR_STORAGES, vector_index_options, vector_partition_name
+)
+from models.postgres.operations_schema import VectorInsertItems, VectorOut, VectorSearchResult
+from routes.exceptions import DatabaseError
+from helpers.config import settings
+from helpers.db_connection import engine
 
 logger = logging.getLogger("VectorModel")
 
+# Recall target -> (hnsw.ef_search, share of ivfflat lists probed). Starting
+# points from pgvector's tuning guidance (probes ~ sqrt(lists) at 0.95);
+# calibrate against real data with benchmarks/vector_index.py.
+RECALL_PROFILE = [
+    (0.90, 40, 0.05),
+    (0.95, 80, 0.10),
+    (0.98, 160, 0.20),
+    (0.99, 320, 0.30),
+    (1.00, 1000, 1.00),
+]
+
+
+def search_params(recall_target: Optional[float], top_k: int, method: str = None, lists: int = None) -> dict:
+    """
+    Per-query ANN settings for an index of type `method` with `lists` lists
+    (the configured VECTOR_INDEX_TYPE / IVFFLAT_LISTS by default). `ef_search`
+    never drops below `top_k`, otherwise HNSW returns fewer than `top_k` rows.
+    """
+    method = method or settings.VECTOR_INDEX_TYPE
+    lists = lists or settings.IVFFLAT_LISTS
+    recall_target = recall_target or settings.VECTOR_RECALL_TARGET
+    ef_search, probe_share = next(
+        ((ef, share) for target, ef, share in RECALL_PROFILE if recall_target <= target), RECALL_PROFILE[-1][1:]
+    )
+    if method == "hnsw":
+        return {"hnsw.ef_search": min(max(ef_search, top_k), 1000)}
+    return {"ivfflat.probes": max(1, min(lists, math.ceil(lists * probe_share)))}
+
+
+# The ANN index a partition actually has, whatever VECTOR_INDEX_TYPE says now;
+# projects without their own partition live in the default one.
+PARTITION_INDEX = text("""
+    SELECT am.amname, c.reloptions
+    FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indexrelid
+    JOIN pg_am am ON am.oid = c.relam
+    WHERE i.indrelid = coalesce(to_regclass(:partition), 'vector_embeddings_default'::regclass)
+      AND am.amname IN ('hnsw', 'ivfflat')
+    ORDER BY c.oid DESC
+    LIMIT 1
+""")
+_partition_indexes: Dict[UUID, Tuple[float, Optional[str], Optional[int]]] = {}
+
+
+async def partition_index(db, project_id: UUID) -> Tuple[Optional[str], Optional[int]]:
+    """
+    Access method ('hnsw' / 'ivfflat', None without an ANN index) and IVFFlat
+    list count of the index on the project's partition, read from pg_index /
+    pg_am and cached per process for VECTOR_PARTITION_CACHE_SECONDS.
+    """
+    cached = _partition_indexes.get(project_id)
+    if cached and cached[0] > time.monotonic():
+        return cached[1], cached[2]
+    row = (await db.execute(PARTITION_INDEX, {"partition": vector_partition_name(project_id)})).first()
+    method, lists = None, None
+    if row:
+        method = row.amname
+        options = dict(option.split("=", 1) for option in row.reloptions or [])
+        if method == "ivfflat":
+            lists = int(options.get("lists", 100))
+    _partition_indexes[project_id] = (time.monotonic() + settings.VECTOR_PARTITION_CACHE_SECONDS, method, lists)
+    return method, lists
+
+
+def forget_partition_index(project_id: UUID) -> None:
+    """Drop the cached index of a partition whose index this process just changed."""
+    _partition_indexes.pop(project_id, None)
+
+
+_project_sizes: Dict[UUID, Tuple[float, int]] = {}
+
+
+# Iterative index scans (`hnsw.iterative_scan` / `ivfflat.iterative_scan`)
+# arrived in pgvector 0.8; older versions reject the settings.
+ITERATIVE_SCAN_MIN_VERSION = (0, 8)
+# halfvec and binary_quantize arrived in pgvector 0.7
+QUANTIZED_STORAGE_MIN_VERSION = (0, 7)
+_pgvector_version: Optional[tuple] = None
+
+
+async def pgvector_version(db) -> tuple:
+    """Installed pgvector version as a tuple, read once per process."""
+    global _pgvector_version
+    if _pgvector_version is None:
+        version = await db.scalar(text("SELECT extversion FROM pg_extension WHERE extname = 'vector'"))
+        _pgvector_version = tuple(int(part) for part in re.findall(r"\d+", version or "0")[:3])
+    return _pgvector_version
+
+
+def iterative_scan_params(method: str = None) -> dict:
+    """
+    Settings that let an index of type `method` keep scanning until `top_k`
+    rows survive the project / generation filters, bounded by
+    VECTOR_MAX_SCAN_TUPLES (HNSW) or IVFFLAT_MAX_PROBES (IVFFlat).
+    """
+    if (method or settings.VECTOR_INDEX_TYPE) == "hnsw":
+        return {
+            "hnsw.iterative_scan": settings.VECTOR_ITERATIVE_SCAN,
+            "hnsw.max_scan_tuples": settings.VECTOR_MAX_SCAN_TUPLES,
+        }
+    # IVFFlat only supports relaxed ordering
+    params = {"ivfflat.iterative_scan": "relaxed_order"}
+    if settings.IVFFLAT_MAX_PROBES:
+        params["ivfflat.max_probes"] = settings.IVFFLAT_MAX_PROBES
+    return params
+
+
+async def set_local(db, params: dict) -> None:
+    """
+    Set `params` for the rest of the current transaction only
+    (`set_config(..., is_local => true)`, the function form of `SET LOCAL`).
+    """
+    for name, value in params.items():
+        await db.execute(select(func.set_config(name, str(value), True)))
+
+
+async def apply_search_params(db, recall_target: Optional[float], top_k: int) -> dict:
+    """Set the ANN settings for `recall_target` for the current transaction."""
+    params = search_params(recall_target, top_k)
+    await set_local(db, params)
+    return params
+
+
+# Postgres ships no Arabic stop-word list, so the commonest function words are
+# dropped here; English stop words are dropped by `_lexical` through 'english_stem'.
+ARABIC_STOP_WORDS = frozenset(
+    "في من على الى إلى عن مع ما ماذا هل هو هي هم هذا هذه ذلك تلك التي الذي الذين "
+    "ان أن إن او أو كان كانت لا لم لن قد ثم كل بين عند حتى".split()
+)
+
+
+def lexical_terms(query_text: str) -> List[str]:
+    """
+    Words of a query for full-text matching. Punctuation (websearch syntax
+    such as quotes and '-'), the literal word "or" (the terms are joined with
+    OR) and Arabic stop words are dropped.
+    """
+    return [
+        term for term in re.findall(r"\w+", query_text)
+        if term.lower() != "or" and term not in ARABIC_STOP_WORDS
+    ]
+
+
+def partition_index_ddl(table: str, index_type: str = None, storage: str = "full",
+                        name: str = None, concurrently: bool = False) -> str:
+    """
+    `CREATE INDEX` for the ANN index of one `vector_embeddings` partition,
+    named `<table>_ann` unless `name` is given.
+    """
+    options = vector_index_options(index_type)
+    params = ", ".join(f"{key} = {value}" for key, value in options["postgresql_with"].items())
+    expression, opclass = VECTOR_STORAGES[storage]
+    return (
+        f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {name or table + '_ann'} ON {table} "
+        f"USING {options['postgresql_using']} ({expression} {opclass}) WITH ({params})"
+    )
+
+
+def index_distance(query_vector: List[float], storage: str):
+    """
+    Distance the partition's ANN index orders by: the same expression the index
+    was built over (see VECTOR_STORAGES), compared with the quantized query.
+    """
+    if storage == "halfvec":
+        return cast(VectorEmbedding.embedding, HALFVEC(EMBEDDING_DIM)).op("<=>", return_type=Float)(
+            cast(query_vector, HALFVEC(EMBEDDING_DIM))
+        )
+    if storage == "binary":
+        return cast(func.binary_quantize(VectorEmbedding.embedding), BIT(EMBEDDING_DIM)).op("<~>", return_type=Float)(
+            func.binary_quantize(cast(query_vector, Vector(EMBEDDING_DIM)))
+        )
+    return VectorEmbedding.embedding.op("<=>", return_type=Float)(query_vector)
+
+
+def rescore_candidates(limit: int, storage: str) -> int:
+    """How many rows a quantized index search fetches for re-scoring to return `limit`."""
+    if storage == "halfvec":
+        return limit * settings.VECTOR_RESCORE_FACTOR_HALFVEC
+    if storage == "binary":
+        return limit * settings.VECTOR_RESCORE_FACTOR_BINARY
+    return limit
+
 
 class VectorModel(BaseModel):
     def __init__(self):
         super().__init__()
 
+    # -------------------------------------------------------------------------
+    # ✅ Per-project partitions
+    # -------------------------------------------------------------------------
+    async def supports_storage(self, db, storage: str) -> bool:
+        return storage == "full" or await pgvector_version(db) >= QUANTIZED_STORAGE_MIN_VERSION
+
+    async def create_partition(self, db, project_id: UUID, storage: str = "full") -> str:
+        """
+        Create the project's `vector_embeddings` partition and its ANN index,
+        so its searches never scan or share an index with other projects.
+        IVFFlat trains its lists on the rows present when it is built, so with
+        VECTOR_INDEX_TYPE=ivfflat the index is left to `ensure_partition_index`.
+        """
+        table = vector_partition_name(project_id)
+        try:
+            logger.info(f"Creating vector partition {table} for project {project_id} ({storage})")
+            await db.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {table} PARTITION OF vector_embeddings FOR VALUES IN ('{project_id}')"
+            ))
+            if settings.VECTOR_INDEX_TYPE == "hnsw":
+                await db.execute(text(partition_index_ddl(table, storage=storage)))
+            await db.commit()
+            forget_partition_index(project_id)
+            return table
+        except SQLAlchemyError as e:
+            await db.rollback()
+            logger.error(f"Failed to create vector partition for project {project_id}: {e}")
+            raise DatabaseError(f"Failed to create vector partition: {str(e)}") from e
+
+    async def ensure_partition_index(self, db, project_id: UUID, storage: str = "full") -> bool:
+        """
+        Build the ANN index of a partition created without one (see
+        `create_partition`) once it holds more than VECTOR_EXACT_SEARCH_MAX_ROWS
+        vectors; until then its searches are exact anyway. Returns whether an
+        index was built.
+        """
+        method, _ = await partition_index(db, project_id)
+        size_cap = settings.VECTOR_EXACT_SEARCH_MAX_ROWS
+        if method is not None or await self.count_project_vectors(db, project_id, size_cap) <= size_cap:
+            return False
+        table = vector_partition_name(project_id)
+        try:
+            if await db.scalar(text("SELECT to_regclass(:partition)"), {"partition": table}) is None:
+                return False
+            logger.info(f"Building ANN index of {table} ({storage}) now that it holds data")
+            await db.execute(text(partition_index_ddl(table, storage=storage)))
+            await db.commit()
+            forget_partition_index(project_id)
+            return True
+        except SQLAlchemyError as e:
+            await db.rollback()
+            logger.error(f"Failed to build ANN index for project {project_id}: {e}")
+            raise DatabaseError(f"Failed to build vector index: {str(e)}") from e
+
+    async def rebuild_partition_index(self, project_id: UUID, storage: str) -> Optional[str]:
+        """
+        Replace the partition's ANN index with one of the same type over
+        `storage`, before the project's vector storage changes. The new index is
+        built with CREATE INDEX CONCURRENTLY under a temporary name, so writes
+        go on meanwhile, then swapped in for the old one in a short transaction.
+        If the build fails the old index stays as it was. Partitions without an
+        index (see `ensure_partition_index`) are left alone; returns None then.
+        """
+        table = vector_partition_name(project_id)
+        staged = f"{table}_ann_new"
+        forget_partition_index(project_id)
+        try:
+            # CONCURRENTLY cannot run inside a transaction block
+            async with engine.connect() as conn:
+                conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+                if await conn.scalar(text("SELECT to_regclass(:index)"), {"index": f"{table}_ann"}) is None:
+                    return None
+                method, _ = await partition_index(conn, project_id)
+                logger.info(f"Building {method} index of {table} for {storage} storage")
+                # An interrupted earlier build leaves an invalid index behind
+                await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {staged}"))
+                try:
+                    await conn.execute(text(partition_index_ddl(table, method, storage, name=staged, concurrently=True)))
+                except SQLAlchemyError:
+                    await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {staged}"))
+                    raise
+            async with engine.begin() as conn:
+                await conn.execute(text(f"DROP INDEX {table}_ann"))
+                await conn.execute(text(f"ALTER INDEX {staged} RENAME TO {table}_ann"))
+            return table
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to rebuild ANN index for project {project_id}: {e}")
+            raise DatabaseError(f"Failed to rebuild vector index: {str(e)}") from e
+        finally:
+            forget_partition_index(project_id)
+
+    async def drop_partition(self, db, project_id: UUID) -> bool:
+        """
+        Drop the project's partition (and its index) in one statement instead
+        of cascading a row-by-row delete through the shared table.
+        """
+        table = vector_partition_name(project_id)
+        try:
+            logger.info(f"Dropping vector partition {table} for project {project_id}")
+            await db.execute(text(f"DROP TABLE IF EXISTS {table}"))
+            await db.commit()
+            forget_partition_index(project_id)
+            _project_sizes.pop(project_id, None)
+            return True
+        except SQLAlchemyError as e:
+            await db.rollback()
+            logger.error(f"Failed to drop vector partition for project {project_id}: {e}")
+            raise DatabaseError(f"Failed to drop vector partition: {str(e)}") from e
+
     # -------------------------------------------------------------------------
     # ✅ Insert multiple vectors in batches
     # -------------------------------------------------------------------------
@@ -87,33 +389,281 @@ class VectorModel(BaseModel):
     # -------------------------------------------------------------------------
     # ✅ Retrieve top-k similar chunks (with text + distance)
     # -------------------------------------------------------------------------
-    async def top_k_similar_vector_text(
+    async def count_project_vectors(self, db, project_id: UUID, cap: int) -> int:
+        """Number of the project's vectors, counting no further than `cap + 1`."""
+        rows = select(VectorEmbedding.id).where(VectorEmbedding.project_id == project_id).limit(cap + 1).subquery()
+        return await db.scalar(select(func.count()).select_from(rows))
+
+    async def _project_size(self, db, project_id: UUID, cap: int) -> int:
+        """
+        `count_project_vectors`, cached per process for VECTOR_PARTITION_CACHE_SECONDS
+        so queries do not pay a round trip for it. A stale count only delays
+        the switch between exact and ANN search.
+        """
+        cached = _project_sizes.get(project_id)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        size = await self.count_project_vectors(db, project_id, cap)
+        _project_sizes[project_id] = (time.monotonic() + settings.VECTOR_PARTITION_CACHE_SECONDS, size)
+        return size
+
+    async def _choose_strategy(self, db, project_id: UUID, top_k: int, recall_target: Optional[float]):
+        """
+        Pick the vector search strategy and the settings it needs:
+          * exact          - projects of at most VECTOR_EXACT_SEARCH_MAX_ROWS vectors
+                             (or whose partition has no ANN index yet) are
+                             scored in full and sorted (exact, and cheaper than
+                             the index; see `_nearest`)
+          * ann_iterative  - ANN index with iterative scans (pgvector >= 0.8), so
+                             rows dropped by the project / generation filters are
+                             replaced instead of returning fewer than `top_k`
+          * ann            - plain ANN index scan (older pgvector, or
+                             VECTOR_ITERATIVE_SCAN=off)
+        The ANN settings follow the index the partition actually has (see
+        `partition_index`), not VECTOR_INDEX_TYPE.
+        """
+        size_cap = settings.VECTOR_EXACT_SEARCH_MAX_ROWS
+        if await self._project_size(db, project_id, size_cap) <= size_cap:
+            return "exact", {}
+        method, lists = await partition_index(db, project_id)
+        if method is None:
+            return "exact", {}
+        params = search_params(recall_target, top_k, method, lists)
+        if settings.VECTOR_ITERATIVE_SCAN != "off" and await pgvector_version(db) >= ITERATIVE_SCAN_MIN_VERSION:
+            params.update(iterative_scan_params(method))
+            return "ann_iterative", params
+        return "ann", params
+
+    def _nearest(self, query_vector: List[float], project_id: UUID, limit: int, strategy: str,
+                 with_embeddings: bool = False, storage: str = "full"):
+        """
+        Nearest live chunks of the project as (id, text, distance[, embedding]),
+        closest first. Only chunks live at their document's active generation are
+        considered, so staged changes stay invisible. With quantized storage the
+        index returns `rescore_candidates` rows, re-ranked by full-precision distance.
+
+        The exact strategy scores every live vector in a MATERIALIZED CTE and
+        sorts outside it, so the ORDER BY cannot be served by the ANN index while
+        the joins to chunks and documents still use their indexes. Texts and
+        embeddings are only fetched for the rows kept.
+        """
+        def live_vectors(*columns):
+            return (
+                select(*columns)
+                .join(Chunk, Chunk.id == VectorEmbedding.chunk_id)
+                .join(Document, Document.id == VectorEmbedding.document_id)
+                .where(
+                    VectorEmbedding.project_id == project_id,
+                    live_at(Document.active_generation),
+                )
+            )
+
+        if strategy == "exact":
+            distance_expr = VectorEmbedding.embedding.op("<=>")(query_vector).cast(Float).label("distance")
+            scored = (
+                live_vectors(Chunk.id, VectorEmbedding.document_id, distance_expr)
+                .cte("exact_distances")
+                .prefix_with("MATERIALIZED")
+            )
+            top = select(scored).order_by(scored.c.distance).limit(limit).subquery()
+            columns = [Chunk.id, Chunk.text, top.c.distance] + ([VectorEmbedding.embedding] if with_embeddings else [])
+            stmt = select(*columns).join(Chunk, Chunk.id == top.c.id)
+            if with_embeddings:
+                stmt = stmt.join(VectorEmbedding, and_(
+                    VectorEmbedding.project_id == project_id,
+                    VectorEmbedding.document_id == top.c.document_id,
+                    VectorEmbedding.chunk_id == top.c.id,
+                ))
+            return stmt.order_by(top.c.distance)
+
+        if storage == "full":
+            distance_expr = VectorEmbedding.embedding.op("<=>")(query_vector).cast(Float).label("distance")
+            columns = [Chunk.id, Chunk.text, distance_expr] + ([VectorEmbedding.embedding] if with_embeddings else [])
+            stmt = live_vectors(*columns).order_by(distance_expr).limit(limit)
+            if strategy == "ann_iterative":
+                # Relaxed ordering may return rows slightly out of order
+                nearest = stmt.subquery()
+                stmt = select(nearest).order_by(nearest.c.distance)
+            return stmt
+
+        candidates = (
+            live_vectors(Chunk.id, Chunk.text, VectorEmbedding.embedding)
+            .order_by(index_distance(query_vector, storage))
+            .limit(rescore_candidates(limit, storage))
+            .subquery()
+        )
+        distance_expr = candidates.c.embedding.op("<=>")(query_vector).cast(Float).label("distance")
+        columns = [candidates.c.id, candidates.c.text, distance_expr] + ([candidates.c.embedding] if with_embeddings else [])
+        return select(*columns).order_by(distance_expr).limit(limit)
+
+    def _lexical(self, query_text: str, project_id: UUID, limit: int):
+        """
+        Best full-text matches among the project's live chunks as (id, lexical_score).
+        The query is OR-ed over its terms in both configurations of
+        `chunks.text_search`, so one exact course code or formula token is
+        enough to match, and chunks matching more terms rank higher. Stop words
+        are left out: with OR, "the" or "في" alone would match nearly every chunk.
+        """
+        words = func.unnest(literal(lexical_terms(query_text), ARRAY(Text))).table_valued("word").render_derived()
+        terms = (
+            select(func.coalesce(func.string_agg(words.c.word, " or "), ""))
+            .where(func.cardinality(func.ts_lexize(literal_column("'english_stem'::regdictionary"), words.c.word)) > 0)
+            .scalar_subquery()
+        )
+        ts_query = func.websearch_to_tsquery("simple", terms).op("||")(func.websearch_to_tsquery("arabic", terms))
+        score_expr = func.ts_rank_cd(Chunk.text_search, ts_query).label("lexical_score")
+        return (
+            select(Chunk.id, score_expr)
+            .join(Document, Document.id == Chunk.document_id)
+            .where(
+                Document.project_id == project_id,
+                live_at(Document.active_generation),
+                Chunk.text_search.op("@@")(ts_query),
+            )
+            .order_by(score_expr.desc())
+            .limit(limit)
+        )
+
+    async def search(
         self,
         db,
         query_vector: List[float],
         project_id: UUID,
         top_k: int,
-    ) -> list[VectorOut]:
+        recall_target: Optional[float] = None,
+        with_embeddings: bool = False,
+        storage: str = "full",
+    ) -> VectorSearchResult:
         """
-        Return the most similar chunks (with their text) and similarity distance.
-        Uses cosine similarity via pgvector's '<=>' operator.
+        Return the most similar live chunks by cosine distance (pgvector's '<=>'),
+        with the strategy used (see `_choose_strategy`), the settings applied and
+        the elapsed time. `with_embeddings` also returns each chunk's vector;
+        `storage` is the project's vector storage. A failed query raises
+        DatabaseError and leaves rolling back the session to the caller.
         """
+        started = time.perf_counter()
+        strategy = "ann"
         try:
-            logger.info(f"Querying top {top_k} similar vectors for project {project_id}")
-            distance_expr = VectorEmbedding.embedding.op("<=>")(query_vector).cast(Float).label("distance")
+            strategy, params = await self._choose_strategy(
+                db, project_id, rescore_candidates(top_k, storage), recall_target
+            )
+            await set_local(db, params)
+            stmt = self._nearest(query_vector, project_id, top_k, strategy, with_embeddings, storage)
+            rows = (await db.execute(stmt)).fetchall()
+            results = [
+                VectorOut(text=row.text, distance=row.distance, embedding=row.embedding if with_embeddings else None)
+                for row in rows
+            ]
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to retrieve top-k vectors for project {project_id} ({strategy}): {e}")
+            raise DatabaseError(f"Vector retrieval failed: {str(e)}") from e
+        return self._search_result("vector", strategy, params, results, top_k, project_id, started, storage)
 
-            stmt = (
-                select(Chunk.text, distance_expr)
-                .join(Chunk, Chunk.id == VectorEmbedding.chunk_id)
-                .where(VectorEmbedding.project_id == project_id)
-                .order_by(distance_expr)
+    async def hybrid_search(
+        self,
+        db,
+        query_text: str,
+        query_vector: List[float],
+        project_id: UUID,
+        top_k: int,
+        recall_target: Optional[float] = None,
+        with_embeddings: bool = False,
+        storage: str = "full",
+    ) -> VectorSearchResult:
+        """
+        Fuse vector and full-text retrieval with reciprocal rank fusion in one
+        statement: each side ranks its HYBRID_CANDIDATES * top_k best chunks and a
+        chunk scores sum(1 / (RRF_K + rank)) over the sides that found it. Every
+        result carries its distance (also for chunks only found by full-text
+        search), vector rank, lexical rank and score, and fused score.
+        `with_embeddings` also returns each chunk's vector.
+        """
+        started = time.perf_counter()
+        strategy = "ann"
+        candidates = max(top_k * settings.HYBRID_CANDIDATES, top_k)
+        try:
+            strategy, params = await self._choose_strategy(
+                db, project_id, rescore_candidates(candidates, storage), recall_target
+            )
+            await set_local(db, params)
+
+            nearest = self._nearest(query_vector, project_id, candidates, strategy, storage=storage).subquery()
+            vector_ranked = select(
+                nearest.c.id, nearest.c.distance,
+                func.row_number().over(order_by=nearest.c.distance).label("rank"),
+            ).cte("vector_ranked")
+            lexical = self._lexical(query_text, project_id, candidates).subquery()
+            lexical_ranked = select(
+                lexical.c.id, lexical.c.lexical_score,
+                func.row_number().over(order_by=lexical.c.lexical_score.desc()).label("rank"),
+            ).cte("lexical_ranked")
+
+            rrf_score = (
+                func.coalesce(1.0 / (settings.RRF_K + vector_ranked.c.rank), 0.0)
+                + func.coalesce(1.0 / (settings.RRF_K + lexical_ranked.c.rank), 0.0)
+            ).cast(Float).label("score")
+            fused = (
+                select(
+                    func.coalesce(vector_ranked.c.id, lexical_ranked.c.id).label("id"),
+                    vector_ranked.c.rank.label("vector_rank"),
+                    lexical_ranked.c.lexical_score,
+                    lexical_ranked.c.rank.label("lexical_rank"),
+                    rrf_score,
+                )
+                .select_from(vector_ranked.join(lexical_ranked, vector_ranked.c.id == lexical_ranked.c.id, full=True))
+                .order_by(rrf_score.desc())
                 .limit(top_k)
+                .subquery()
+            )
+            distance_expr = VectorEmbedding.embedding.op("<=>")(query_vector).cast(Float).label("distance")
+            columns = [Chunk.text, distance_expr, fused] + ([VectorEmbedding.embedding] if with_embeddings else [])
+            stmt = (
+                select(*columns)
+                .join(fused, fused.c.id == Chunk.id)
+                .join(VectorEmbedding, and_(
+                    VectorEmbedding.project_id == project_id,
+                    VectorEmbedding.document_id == Chunk.document_id,
+                    VectorEmbedding.chunk_id == Chunk.id,
+                ))
+                .order_by(fused.c.score.desc())
             )
 
-            result = await db.execute(stmt)
-            rows = result.fetchall()
-            logger.info(f"Retrieved {len(rows)} similar vectors for project {project_id}")
-            return [VectorOut(text=row.text, distance=row.distance) for row in rows]
-        except Exception as e:
-            logger.error(f"Failed to retrieve top-k vectors for project {project_id}: {e}")
-            return []
+            rows = (await db.execute(stmt)).fetchall()
+            results = [
+                VectorOut(
+                    text=row.text, distance=row.distance, score=row.score,
+                    vector_rank=row.vector_rank, lexical_rank=row.lexical_rank, lexical_score=row.lexical_score,
+                    embedding=row.embedding if with_embeddings else None,
+                )
+                for row in rows
+            ]
+        except SQLAlchemyError as e:
+            logger.error(f"Failed hybrid retrieval for project {project_id} ({strategy}): {e}")
+            raise DatabaseError(f"Hybrid retrieval failed: {str(e)}") from e
+        return self._search_result("hybrid", strategy, params, results, top_k, project_id, started, storage)
+
+    def _search_result(self, mode: str, strategy: str, params: dict, results: List[VectorOut],
+                       top_k: int, project_id: UUID, started: float, storage: str = "full") -> VectorSearchResult:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logger.info(
+            f"Retrieved {len(results)}/{top_k} chunks for project {project_id} "
+            f"({mode}, {strategy}, {storage}) in {elapsed_ms:.1f}ms ({params})"
+        )
+        return VectorSearchResult(
+            results=results, mode=mode, strategy=strategy, storage=storage, elapsed_ms=round(elapsed_ms, 2),
+            params={name: str(value) for name, value in params.items()},
+        )
+
+    async def top_k_similar_vector_text(
+        self,
+        db,
+        query_vector: List[float],
+        project_id: UUID,
+        top_k: int,
+        recall_target: Optional[float] = None,
+    ) -> list[VectorOut]:
+        """
+        Return the most similar chunks (with their text) and similarity distance.
+        See `search` for how the strategy is chosen.
+        """
+        return (await self.search(db, query_vector, project_id, top_k, recall_target)).results
@@ -10,6 +10,8 @@ class ChunkInsert(BaseModel):
     document_id: UUID
     text: str
     metadata_json: Optional[dict] = None
+    chunk_order: Optional[int] = None
+    content_hash: Optional[str] = None
 
     model_config = {"from_attributes": True}
 
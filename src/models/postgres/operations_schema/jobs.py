@@ -0,0 +1,29 @@
+from pydantic import BaseModel
+from typing import Optional
+from uuid import UUID
+from datetime import datetime
+
+class JobInsert(BaseModel):
+    project_id: UUID
+    user_id: Optional[UUID] = None
+    params: dict
+    files: dict
+
+    model_config = {"from_attributes": True}
+
+class JobOut(BaseModel):
+    id: UUID
+    project_id: UUID
+    user_id: Optional[UUID] = None
+    status: str
+    params: dict
+    files: dict
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    attempts: int
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    updated_at: datetime
+
+    model_config = {"from_attributes": True}
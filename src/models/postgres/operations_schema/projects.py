@@ -1,11 +1,17 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, List, Literal, Optional
 from uuid import UUID
 from datetime import datetime
 
+VectorStorage = Literal["full", "halfvec", "binary"]
+RetrievalBackend = Literal["postgres", "memmap"]
+
 class ProjectInsert(BaseModel):
     name: str
     description: Optional[str]
+    recall_target: Optional[float] = None
+    vector_storage: Optional[VectorStorage] = None
+    retrieval_backend: Optional[RetrievalBackend] = None
 
     model_config = {"from_attributes": True}
 
@@ -29,6 +35,9 @@ class ProjectUpdate(BaseModel):
     old_name: str
     new_name: Optional[str] = None 
     description: Optional[str] = None
+    recall_target: Optional[float] = None
+    vector_storage: Optional[VectorStorage] = None
+    retrieval_backend: Optional[RetrievalBackend] = None
 
     model_config = {"from_attributes": True}
 
@@ -36,6 +45,14 @@ class ProjectOut(BaseModel):
     id: UUID
     name: str
     description: Optional[str]
+    recall_target: Optional[float] = None
+    vector_storage: VectorStorage = "full"
+    retrieval_backend: RetrievalBackend = "postgres"
     created_at: datetime
 
     model_config = {"from_attributes": True}
+
+class ProjectQueryContext(BaseModel):
+    project: ProjectOut
+    has_access: bool
+    history: List[Dict] = []
@@ -1,6 +1,6 @@
 # src/models/postgres/operations_schema.py
 from pydantic import BaseModel, Field
-from typing import List
+from typing import Any, Dict, List
 from uuid import UUID
 from typing import Optional
 
@@ -14,6 +14,19 @@ class VectorInsertItems(BaseModel):
 
 class VectorOut(BaseModel):
     text: str
-    distance: float
+    distance: Optional[float] = None
+    score: Optional[float] = None  # reciprocal rank fusion score (hybrid retrieval)
+    vector_rank: Optional[int] = None
+    lexical_rank: Optional[int] = None
+    lexical_score: Optional[float] = None
+    embedding: Optional[Any] = Field(None, exclude=True, repr=False)  # only when requested, for context selection
 
 
+
+class VectorSearchResult(BaseModel):
+    results: List[VectorOut]
+    mode: str = "vector"  # "vector" or "hybrid"
+    strategy: str  # "exact", "ann_iterative" or "ann"
+    storage: str = "full"  # "full", "halfvec" or "binary"
+    elapsed_ms: float
+    params: Dict[str, str] = {}
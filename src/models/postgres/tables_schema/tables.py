@@ -4,13 +4,15 @@ from datetime import datetime
 from typing import Optional
 
 from sqlalchemy import (
-    MetaData, Column, String, Boolean, DateTime, Text, Integer,
-    ForeignKey, Index, UniqueConstraint, func, Table, text
+    MetaData, Column, String, Boolean, DateTime, Text, Integer, BigInteger, Float,
+    ForeignKey, Index, UniqueConstraint, Sequence, func, Table, text, Computed, Identity
 )
-from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR
 from sqlalchemy.orm import declarative_base, relationship, Mapped, mapped_column
 from pgvector.sqlalchemy import Vector
 
+from helpers.config import settings
+
 # ============================================================
 # NAMING CONVENTION (ensures consistent constraint/index names)
 # ============================================================
@@ -25,6 +27,11 @@ metadata = MetaData(
 
 Base = declarative_base(metadata=metadata)
 
+# Ingest generations: every (re)processing run stages its changes under a fresh
+# number. A chunk is live from `generation` until `retired_generation`, and
+# readers only see the chunks live at their document's active generation.
+ingest_generation_seq = Sequence("ingest_generation_seq", metadata=metadata)
+
 
 # ============================================================
 # USERS TABLE
@@ -58,6 +65,11 @@ class Project(Base):
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name: Mapped[str] = mapped_column(String(100), unique=True, nullable=False)
     description: Mapped[Optional[str]] = mapped_column(Text)
+    recall_target: Mapped[Optional[float]] = mapped_column(Float)
+    # What the project's ANN index is built over: "full", "halfvec" or "binary" (see VECTOR_STORAGES)
+    vector_storage: Mapped[str] = mapped_column(String(16), server_default="full", nullable=False)
+    # Where vector search runs: "postgres" (ANN index) or "memmap" (in-process matrix)
+    retrieval_backend: Mapped[str] = mapped_column(String(16), server_default="postgres", nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
@@ -108,6 +120,8 @@ class Document(Base):
     metadata_json: Mapped[Optional[dict]] = mapped_column(JSONB)
     is_processed: Mapped[bool] = mapped_column(Boolean, server_default="FALSE", nullable=False)
     is_flushed: Mapped[bool] = mapped_column(Boolean, server_default="FALSE", nullable=False)
+    active_generation: Mapped[int] = mapped_column(BigInteger, server_default="0", nullable=False)
+    staging_generation: Mapped[int] = mapped_column(BigInteger, server_default="0", nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
@@ -125,6 +139,9 @@ class Document(Base):
 # ============================================================
 # CHUNKS TABLE
 # ============================================================
+CHUNK_TEXT_SEARCH = "to_tsvector('simple'::regconfig, text) || to_tsvector('arabic'::regconfig, text)"
+
+
 class Chunk(Base):
     """
     Represents a chunk of a document, used for embeddings and retrieval.
@@ -137,39 +154,53 @@ class Chunk(Base):
     )
     text: Mapped[str] = mapped_column(Text, nullable=False)
     metadata_json: Mapped[Optional[dict]] = mapped_column(JSONB)
+    content_hash: Mapped[Optional[str]] = mapped_column(String(64))
+    chunk_order: Mapped[Optional[int]] = mapped_column(Integer)
+    generation: Mapped[int] = mapped_column(BigInteger, server_default="0", nullable=False)
+    retired_generation: Mapped[Optional[int]] = mapped_column(BigInteger)
+    # Full-text search: 'simple' keeps course codes and formula tokens verbatim,
+    # 'arabic' adds Arabic stemming and stop words. Never loaded by ORM queries.
+    text_search: Mapped[str] = mapped_column(
+        TSVECTOR, Computed(CHUNK_TEXT_SEARCH, persisted=True), deferred=True
+    )
 
     # Relationships
     document = relationship("Document", back_populates="chunks")
     vectors = relationship("VectorEmbedding", back_populates="chunk", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("idx_chunks_document_generation", "document_id", "generation"),
+        Index("idx_chunks_text_search", "text_search", postgresql_using="gin"),
+    )
+
 
 # ============================================================
-# USER HISTORY TABLE
+# HISTORY MESSAGES TABLE
 # ============================================================
-class UserHistory(Base):
+class HistoryMessage(Base):
     """
-    Stores history per user per project.
+    One message of a user's chat history in a project. Append-only: each
+    answer inserts its question and answer, and the history writer trims every
+    conversation to its newest HISTORY_MAX_MESSAGES in the background.
     """
-    __tablename__ = "user_history"
+    __tablename__ = "history_messages"
 
+    # Assigned when the message is buffered, so unflushed messages can be told apart from stored ones
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # Insertion order within a conversation
+    seq: Mapped[int] = mapped_column(BigInteger, Identity(), nullable=False)
     user_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False
     )
     project_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False
     )
-    history: Mapped[list] = mapped_column(JSONB, nullable=False, server_default=text("'[]'::jsonb"))
-    updated_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True),
-        server_default=func.now(),
-        onupdate=func.now(),
-        nullable=False
-    )
+    role: Mapped[str] = mapped_column(String(16), nullable=False)
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     __table_args__ = (
-        UniqueConstraint("user_id", "project_id", name="uq_user_project_history"),
-        Index("ix_user_history_user_project", "user_id", "project_id"),
+        Index("ix_history_messages_user_project_seq", "user_id", "project_id", "seq"),
     )
 
 
@@ -194,36 +225,117 @@ class RefreshToken(Base):
     user = relationship("User", back_populates="refresh_tokens")
 
 
+def vector_index_options(index_type: str = None) -> dict:
+    """
+    `postgresql_using` / `postgresql_with` for the ANN index picked by
+    `VECTOR_INDEX_TYPE`, built with the HNSW or IVFFlat settings.
+    """
+    index_type = index_type or settings.VECTOR_INDEX_TYPE
+    if index_type == "hnsw":
+        params = {"m": str(settings.HNSW_M), "ef_construction": str(settings.HNSW_EF_CONSTRUCTION)}
+    else:
+        params = {"lists": str(settings.IVFFLAT_LISTS)}
+    return {"postgresql_using": index_type, "postgresql_with": params}
+
+
+def vector_partition_name(project_id: uuid.UUID) -> str:
+    return f"vector_embeddings_{project_id.hex}"
+
+
+EMBEDDING_DIM = 768
+
+# Per-project vector storage: the expression and operator class the partition's
+# ANN index is built over. Rows always keep the float32 vector, which re-scores
+# the candidates of a quantized index. halfvec / binary need pgvector >= 0.7.
+VECTOR_STORAGES = {
+    "full": ("embedding", "vector_cosine_ops"),
+    "halfvec": (f"(embedding::halfvec({EMBEDDING_DIM}))", "halfvec_cosine_ops"),
+    "binary": (f"(binary_quantize(embedding)::bit({EMBEDDING_DIM}))", "bit_hamming_ops"),
+}
+
+
 # ============================================================
-# VECTORS TABLE (single table for all projects)
+# VECTORS TABLE (list-partitioned by project)
 # ============================================================
 class VectorEmbedding(Base):
     """
-    Stores vector embeddings for all projects in a single table.
+    Stores vector embeddings, LIST-partitioned by project. Each project gets
+    its own partition and ANN index (see `VectorModel.create_partition`);
+    rows of projects without one land in `vector_embeddings_default`.
     """
     __tablename__ = "vector_embeddings"
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    id: Mapped[int] = mapped_column(Integer, Sequence("vector_embeddings_id_seq", metadata=metadata), primary_key=True)
     project_id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False
+        UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True
     )
     document_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("documents.id", ondelete="CASCADE"), nullable=False
     )
     chunk_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True),ForeignKey("chunks.id", ondelete="CASCADE"),  nullable=False)
-    embedding: Mapped[list] = mapped_column(Vector(768), nullable=False)
-    
-    __table_args__ = (
-            Index(
-        "idx_vectors_embedding","embedding",
-        postgresql_using="ivfflat",
-        postgresql_with={"lists": "100"},
-        postgresql_ops={"embedding": "vector_cosine_ops"}),
-    UniqueConstraint("project_id", "document_id", "chunk_id", name="uq_project_document_chunk"),
+    embedding: Mapped[list] = mapped_column(Vector(EMBEDDING_DIM), nullable=False)
+    generation: Mapped[int] = mapped_column(BigInteger, server_default="0", nullable=False)
 
+    __table_args__ = (
+        UniqueConstraint("project_id", "document_id", "chunk_id", name="uq_project_document_chunk"),
+        {"postgresql_partition_by": "LIST (project_id)"},
     )
 
     # Relationships
     project = relationship("Project")
     document = relationship("Document", back_populates="vectors")
     chunk = relationship("Chunk", back_populates="vectors")
+
+
+# ============================================================
+# EMBEDDING CACHE TABLE
+# ============================================================
+class EmbeddingCache(Base):
+    """
+    Caches embeddings by (embedding model, sha256 of the normalized chunk text)
+    so re-processing a document does not re-embed unchanged chunks.
+    """
+    __tablename__ = "embedding_cache"
+
+    model_name: Mapped[str] = mapped_column(String(255), primary_key=True)
+    content_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    embedding: Mapped[list] = mapped_column(Vector(EMBEDDING_DIM), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
+# ============================================================
+# INGESTION JOBS TABLE
+# ============================================================
+class IngestionJob(Base):
+    """
+    Background document-processing job with per-file progress.
+    `files` maps each filename to its status, current stage, timings and error.
+    """
+    __tablename__ = "ingestion_jobs"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    project_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False
+    )
+    user_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+    )
+    status: Mapped[str] = mapped_column(String(20), nullable=False, server_default="queued")
+    params: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    files: Mapped[dict] = mapped_column(JSONB, nullable=False, server_default=text("'{}'::jsonb"))
+    result: Mapped[Optional[dict]] = mapped_column(JSONB)
+    error: Mapped[Optional[str]] = mapped_column(Text)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False
+    )
+
+    __table_args__ = (
+        Index("idx_ingestion_jobs_status_created", "status", "created_at"),
+    )
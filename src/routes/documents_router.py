@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Request, UploadFile, File, Depends
 from typing import List
+from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from controllers.DocumentsController import DocumentsController
+from controllers.JobsController import JobsController
 from helpers.deps import get_current_user
 from helpers.handle_exceptions import handle_exceptions
 from helpers.db_connection import get_db
@@ -10,6 +12,7 @@ from routes.schemes.documents import DocumentFlushRequest, DocumentProcessReques
 
 documents_router = APIRouter(prefix="/documents", tags=["Documents"])
 doc_controller = DocumentsController()
+jobs_controller = JobsController()
 
 @documents_router.post("/upload/{project_name}")
 @handle_exceptions
@@ -19,10 +22,16 @@ async def upload_documents(project_name: str, files: List[UploadFile] = File(...
 @documents_router.post("/process")
 @handle_exceptions
 async def process_documents(request:Request, data: DocumentProcessRequest, db: AsyncSession = Depends(get_db), current_user=Depends(get_current_user)):
-    client = request.app.state.embedding_client
-    if not client:
-        raise ValueError("Embedding client not initialized")
-    return await doc_controller.process_docs(db, client=client, project_name=data.project_name, file_names=data.file_names, chunk_size=data.chunk_size, chunk_overlap=data.chunk_overlap)
+    job = await jobs_controller.create_process_job(db, data, current_user)
+    workers = getattr(request.app.state, "ingestion_workers", None)
+    if workers:
+        workers.notify()
+    return job
+
+@documents_router.get("/jobs/{job_id}")
+@handle_exceptions
+async def get_job_status(job_id: UUID, db: AsyncSession = Depends(get_db), current_user=Depends(get_current_user)):
+    return await jobs_controller.get_job(db, job_id, current_user)
 
 @documents_router.post("/flush")
 @handle_exceptions
@@ -21,4 +21,10 @@ class ProjectNotFound(Exception):
     pass
 
 class ProjectExists(Exception):
+    pass
+
+class JobNotFound(Exception):
+    pass
+
+class ServiceBusy(Exception):
     pass
\ No newline at end of file
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 
 from helpers.deps import get_current_user
 from helpers.db_connection import get_db
@@ -35,7 +36,35 @@ async def answer_question(
         project_name=data.project_name,
         query=data.query,
         voice=data.voice,
-        k=data.k
+        k=data.k,
+        history_writer=request.app.state.history_writer
     )
 
     return {"data": answer, "message": f"Answered query for project '{data.project_name}'"}
+
+
+@query_router.post("/stream")
+@handle_exceptions
+async def stream_answer(
+    request: Request,
+    data: QueryRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    # Same preamble as /query, then tokens are pushed as Server-Sent Events
+    events = await query_controller.stream_top_k(
+        db=db,
+        user_id=current_user["id"],
+        embed_client=request.app.state.embedding_client,
+        gen_client=request.app.state.generation_client,
+        project_name=data.project_name,
+        query=data.query,
+        k=data.k,
+        history_writer=request.app.state.history_writer
+    )
+
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
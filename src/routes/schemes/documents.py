@@ -11,6 +11,7 @@ class DocumentProcessRequest(BaseModel):
     chunk_size: int
     chunk_overlap: int
     file_names: List[str]
+    concurrency: Optional[int] = Field(None, ge=1, le=32, description="Files processed concurrently per stage; defaults to PROCESS_CONCURRENCY")
 
     model_config = {"from_attributes": True}
 
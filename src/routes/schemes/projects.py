@@ -1,11 +1,18 @@
 from pydantic import BaseModel, Field, model_validator
-from typing import Optional
+from typing import Literal, Optional
 from uuid import UUID
 from datetime import datetime
 
 class ProjectCreateRequest(BaseModel):
     name: str = Field(..., min_length=3, max_length=50)
     description: Optional[str]
+    recall_target: Optional[float] = Field(None, gt=0, le=1, description="Vector search recall target; defaults to VECTOR_RECALL_TARGET")
+    vector_storage: Optional[Literal["full", "halfvec", "binary"]] = Field(
+        None, description="What the ANN index is built over; quantized indexes are re-scored at full precision. Defaults to full"
+    )
+    retrieval_backend: Optional[Literal["postgres", "memmap"]] = Field(
+        None, description="postgres (ANN index) or memmap (in-process matrix, for small projects). Defaults to postgres"
+    )
 
     model_config = {"from_attributes": True}
 
@@ -29,13 +36,20 @@ class ProjectUpdateRequest(BaseModel):
     old_name: str = Field(..., min_length=3, max_length=50)
     new_name: Optional[str] = Field(None, min_length=3, max_length=50)
     description: Optional[str] = None
+    recall_target: Optional[float] = Field(None, gt=0, le=1)
+    vector_storage: Optional[Literal["full", "halfvec", "binary"]] = None
+    retrieval_backend: Optional[Literal["postgres", "memmap"]] = None
 
     model_config = {"from_attributes": True}
 
     @model_validator(mode="after")
     def validate_update_fields(self):
-        if not self.new_name and not self.description:
-            raise ValueError("At least one of 'new_name' or 'description' must be provided.")
+        if (not self.new_name and not self.description and self.recall_target is None
+                and self.vector_storage is None and self.retrieval_backend is None):
+            raise ValueError(
+                "At least one of 'new_name', 'description', 'recall_target', 'vector_storage' "
+                "or 'retrieval_backend' must be provided."
+            )
         return self
 
 
@@ -43,6 +57,9 @@ class ProjectOut(BaseModel):
     id: UUID
     name: str
     description: Optional[str]
+    recall_target: Optional[float] = None
+    vector_storage: str = "full"
+    retrieval_backend: str = "postgres"
     created_at: datetime
 
     model_config = {"from_attributes": True}
@@ -1,8 +1,17 @@
 # routes/system.py
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from controllers.SystemController import SystemController
+from helpers.deps import get_current_user
+from helpers.handle_exceptions import handle_exceptions
 
 system_router = APIRouter()
+system_controller = SystemController()
 
 @system_router.post("/reset")
 async def reset_system():
     pass
+
+@system_router.get("/metrics")
+@handle_exceptions
+async def get_metrics(current_user = Depends(get_current_user)):
+    return await system_controller.get_metrics(current_user)
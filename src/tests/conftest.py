@@ -0,0 +1,29 @@
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Settings required by helpers.config; the unit tests never reach a server or database
+for key, value in {
+    "MAX_FILE_SIZE_MB": "10",
+    "ALLOWED_MIME_TYPES": '["application/pdf"]',
+    "POSTGRES_USER": "postgres",
+    "POSTGRES_PASSWORD": "postgres",
+    "POSTGRES_DB": "rag",
+    "POSTGRES_HOST": "localhost",
+    "POSTGRES_PORT": "5432",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "15",
+    "REFRESH_TOKEN_EXPIRE_DAYS": "7",
+    "SECRET_KEY": "test",
+    "ALGORITHM": "HS256",
+    "GROQ_API_KEY": "test",
+    "GROQ_BASE_URL": "http://localhost",
+    "GROQ_MODEL": "test",
+    "OLLAMA_API_KEY": "test",
+    "OLLAMA_BASE_URL": "http://localhost",
+    "OLLAMA_MODEL": "test",
+}.items():
+    os.environ.setdefault(key, value)
+
+import routes  # noqa: F401,E402  (resolves the models <-> routes import cycle)
@@ -0,0 +1,59 @@
+import uuid
+from collections import namedtuple
+
+from models.postgres.BulkLoadModel import diff_chunks
+from models.postgres.operations_schema import ChunkInsert
+
+Row = namedtuple("Row", "id content_hash chunk_order")
+
+DOCUMENT_ID = uuid.uuid4()
+
+
+def rows(*hashes):
+    return [Row(uuid.uuid4(), h, order) for order, h in enumerate(hashes)]
+
+
+def chunks(*hashes):
+    return [
+        ChunkInsert(document_id=DOCUMENT_ID, text=h, chunk_order=order, content_hash=h)
+        for order, h in enumerate(hashes)
+    ]
+
+
+def test_unchanged_document_keeps_every_row():
+    existing = rows("h1", "h2")
+    diff = diff_chunks(existing, chunks("h1", "h2"))
+    assert diff["kept"] == [row.id for row in existing]
+    assert diff["moved"] == diff["inserted"] == diff["retired"] == []
+
+
+def test_repeated_hash_is_inserted_once_more():
+    existing = rows("h1", "h2")
+    diff = diff_chunks(existing, chunks("h1", "h2", "h1"))
+    assert diff["kept"] == [row.id for row in existing]
+    assert [(c.content_hash, c.chunk_order) for c in diff["inserted"]] == [("h1", 2)]
+    assert diff["moved"] == diff["retired"] == []
+
+
+def test_repeated_hash_removed_retires_one_row():
+    existing = rows("h1", "h2", "h1")
+    diff = diff_chunks(existing, chunks("h1", "h2"))
+    assert diff["kept"] == [existing[0].id, existing[1].id]
+    assert diff["retired"] == [existing[2].id]
+    assert diff["moved"] == diff["inserted"] == []
+
+
+def test_reordered_chunks_are_moved():
+    existing = rows("h1", "h2")
+    diff = diff_chunks(existing, chunks("h2", "h1"))
+    assert [(row_id, c.chunk_order) for row_id, c in diff["moved"]] == [(existing[1].id, 0), (existing[0].id, 1)]
+    assert diff["kept"] == diff["inserted"] == diff["retired"] == []
+
+
+def test_repeated_hash_matches_each_row_once():
+    existing = rows("h1", "h1")
+    diff = diff_chunks(existing, chunks("h2", "h1", "h1", "h1"))
+    assert diff["kept"] == [existing[1].id]
+    assert [(row_id, c.chunk_order) for row_id, c in diff["moved"]] == [(existing[0].id, 2)]
+    assert [(c.content_hash, c.chunk_order) for c in diff["inserted"]] == [("h2", 0), ("h1", 3)]
+    assert diff["retired"] == []
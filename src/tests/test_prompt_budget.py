@@ -0,0 +1,38 @@
+from llm.LLMClient import INSTRUCTIONS
+from llm.PromptBudget import PromptBudget, count_tokens
+
+
+def history(n):
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"message {i} " * 50}
+        for i in range(n)
+    ]
+
+
+def context(n):
+    return [f"context chunk {i} " * 80 for i in range(n)]
+
+
+def prompt_tokens(messages, instructions):
+    # What the provider receives: the client's instructions plus every message
+    return count_tokens(instructions) + sum(count_tokens(m["content"]) for m in messages)
+
+
+def test_client_instructions_count_against_the_budget():
+    budget = PromptBudget(max_tokens=1000)
+    messages, stats = budget.assemble(history(20), context(20), "What is photosynthesis?")
+    assert stats["system"] >= count_tokens(INSTRUCTIONS)
+    assert stats["total"] <= 1000
+    assert prompt_tokens(messages, INSTRUCTIONS) <= stats["total"]
+
+
+def test_instructions_are_not_repeated_in_the_messages():
+    messages, _ = PromptBudget(max_tokens=1000).assemble([], context(1), "question")
+    assert all(INSTRUCTIONS not in m["content"] for m in messages)
+
+
+def test_longer_instructions_leave_less_room_for_context():
+    _, short = PromptBudget(max_tokens=1000, client_instructions="").assemble([], context(20), "question")
+    _, long = PromptBudget(max_tokens=1000).assemble([], context(20), "question")
+    assert long["context"] < short["context"]
+    assert long["total"] <= 1000 and short["total"] <= 1000
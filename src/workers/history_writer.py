@@ -0,0 +1,136 @@
+# workers/history_writer.py
+import asyncio
+import uuid
+from typing import Dict, List, Optional, Set, Tuple
+
+import routes  # noqa: F401 - import routers first, as main does, to avoid the models<->routes import cycle
+from models.postgres.UserHistoryModel import UserHistoryModel
+from helpers.config import settings
+from helpers.db_connection import async_session
+from helpers.logger import get_logger
+
+logger = get_logger("HistoryWriter")
+
+history_model = UserHistoryModel()
+
+
+class HistoryWriter:
+    """
+    Write-behind buffer for chat history, started from `main.lifespan`.
+
+    Answers hand their messages to `append` and return without touching the
+    database. A background task inserts everything buffered in one statement
+    every HISTORY_FLUSH_INTERVAL_SECONDS (sooner once HISTORY_FLUSH_BATCH_SIZE
+    messages are waiting), then trims the conversations it wrote to.
+
+    Durability: buffered messages are lost if the process dies before the next
+    flush; `stop` flushes what is left on a clean shutdown. A failed flush is
+    retried on the next tick; messages of a conversation that can no longer be
+    written (its user or project was deleted) are dropped. Past HISTORY_MAX_PENDING buffered messages,
+    `append` flushes inline, which bounds both memory and the loss window.
+    HISTORY_WRITE_MODE=sync bypasses the buffer, and
+    HISTORY_SYNCHRONOUS_COMMIT=false relaxes the commits themselves.
+    """
+
+    def __init__(self, flush_interval: float = None, batch_size: int = None, max_pending: int = None):
+        self.flush_interval = flush_interval or settings.HISTORY_FLUSH_INTERVAL_SECONDS
+        self.batch_size = batch_size or settings.HISTORY_FLUSH_BATCH_SIZE
+        self.max_pending = max_pending or settings.HISTORY_MAX_PENDING
+        self.pending: List[Dict] = []
+        self.in_flight: List[Dict] = []
+        self.to_trim: Set[Tuple[uuid.UUID, uuid.UUID]] = set()
+        self.lock = asyncio.Lock()
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.stopping = False
+        self.stats = {"flushes": 0, "messages": 0, "failures": 0, "dropped": 0, "inline_flushes": 0}
+
+    async def start(self):
+        self.task = asyncio.create_task(self._run())
+        logger.info(f"History writer started (flush every {self.flush_interval}s or {self.batch_size} messages)")
+
+    async def stop(self):
+        # Let a flush in progress finish rather than cancelling it mid-write
+        self.stopping = True
+        self.wakeup.set()
+        if self.task:
+            await self.task
+            self.task = None
+        await self.flush()
+        if self.pending:
+            logger.error(f"History writer stopped with {len(self.pending)} unsaved message(s)")
+        logger.info("History writer stopped")
+
+    async def append(self, messages: List[Dict]):
+        """Buffer `messages` (rows from `UserHistoryModel.new_message`) for the next flush."""
+        self.pending.extend(messages)
+        if len(self.pending) >= self.max_pending:
+            self.stats["inline_flushes"] += 1
+            await self.flush()
+        elif len(self.pending) >= self.batch_size:
+            self.wakeup.set()
+
+    def schedule_trim(self, user_id: uuid.UUID, project_id: uuid.UUID):
+        """Trim a conversation written outside the buffer on the next flush."""
+        self.to_trim.add((user_id, project_id))
+
+    def unflushed(self, user_id: uuid.UUID) -> List[Dict]:
+        """The user's buffered messages that may not be stored yet, oldest first."""
+        return [m for m in self.in_flight + self.pending if m["user_id"] == user_id]
+
+    async def flush(self):
+        async with self.lock:
+            if not self.pending and not self.to_trim:
+                return
+            self.in_flight, self.pending = self.pending, []
+            batch = self.in_flight
+            conversations = self.to_trim | {(m["user_id"], m["project_id"]) for m in batch}
+            self.to_trim = set()
+            dropped = 0
+            try:
+                if batch and not await self._write(batch):
+                    # Retry conversation by conversation, so one that can no longer
+                    # be written (e.g. its project was deleted) does not hold up the rest
+                    groups: Dict[Tuple[uuid.UUID, uuid.UUID], List[Dict]] = {}
+                    for message in batch:
+                        groups.setdefault((message["user_id"], message["project_id"]), []).append(message)
+                    failed = [messages for messages in groups.values() if not await self._write(messages)]
+                    if len(failed) == len(groups):
+                        # Nothing got through, most likely the database itself:
+                        # keep the batch, ahead of anything buffered meanwhile
+                        self.stats["failures"] += 1
+                        self.pending = batch + self.pending
+                        self.to_trim |= conversations
+                        return
+                    dropped = sum(len(messages) for messages in failed)
+                    self.stats["dropped"] += dropped
+                    logger.error(f"Dropped {dropped} history message(s) of {len(failed)} conversation(s) that could not be written")
+                self.stats["flushes"] += 1
+                self.stats["messages"] += len(batch) - dropped
+            finally:
+                self.in_flight = []
+
+            try:
+                async with async_session() as db:
+                    await history_model.trim(db, conversations)
+            except Exception as e:
+                self.to_trim |= conversations
+                logger.error(f"Failed to trim {len(conversations)} conversation(s), will retry: {e}")
+
+    async def _write(self, messages: List[Dict]) -> bool:
+        try:
+            async with async_session() as db:
+                await history_model.append_messages(db, messages, synchronous_commit=settings.HISTORY_SYNCHRONOUS_COMMIT)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to write {len(messages)} history message(s): {e}")
+            return False
+
+    async def _run(self):
+        while not self.stopping:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            await self.flush()
@@ -0,0 +1,172 @@
+# workers/ingestion_worker.py
+import asyncio
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+
+import routes  # noqa: F401 - import routers first, as main does, to avoid the models<->routes import cycle
+from controllers.DocumentsController import DocumentsController
+from models.postgres.JobsModel import JobsModel
+from models.postgres.operations_schema.jobs import JobOut
+from helpers.config import settings
+from helpers.db_connection import async_session
+from helpers.process_pool import shutdown_process_pool
+from helpers.logger import get_logger
+
+logger = get_logger("IngestionWorker")
+
+jobs_model = JobsModel()
+doc_controller = DocumentsController()
+
+
+class IngestionWorkerPool:
+    """
+    Bounded pool of asyncio workers that drain the `ingestion_jobs` queue.
+
+    Workers claim jobs from Postgres, so the pool can run inside the API
+    process (started from `main.lifespan`) or standalone:
+
+        python -m workers.ingestion_worker
+    """
+
+    def __init__(self, embedding_client, concurrency: int = None, poll_interval: float = None):
+        self.client = embedding_client
+        self.concurrency = concurrency or settings.INGESTION_WORKERS
+        self.poll_interval = poll_interval or settings.INGESTION_POLL_SECONDS
+        self.wakeup = asyncio.Event()
+        self.tasks: List[asyncio.Task] = []
+
+    async def start(self):
+        async with async_session() as db:
+            await jobs_model.requeue_stale_jobs(db, settings.INGESTION_STALE_SECONDS)
+        self.tasks = [asyncio.create_task(self._worker(i)) for i in range(self.concurrency)]
+        self.tasks.append(asyncio.create_task(self._requeue_stale()))
+        logger.info(f"Started {self.concurrency} ingestion worker(s)")
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        logger.info("Ingestion workers stopped")
+
+    def notify(self):
+        """Wake idle workers right away instead of waiting for the next poll."""
+        self.wakeup.set()
+
+    async def _worker(self, index: int):
+        while True:
+            try:
+                async with async_session() as db:
+                    job = await jobs_model.claim_next_job(db)
+            except Exception as e:
+                logger.error(f"Worker {index} failed to claim a job: {e}")
+                job = None
+
+            if job is None:
+                self.wakeup.clear()
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self.run_job(job)
+            except Exception as e:
+                # Keep the worker alive; the job is requeued once its heartbeat goes stale
+                logger.exception(f"Worker {index} failed to record the outcome of job {job.id}: {e}")
+
+    async def _requeue_stale(self):
+        """
+        Requeue jobs whose heartbeat went stale, at the heartbeat interval.
+        Startup alone is not enough: a worker that crashes and comes back
+        before `INGESTION_STALE_SECONDS` would leave its job `running` forever.
+        """
+        interval = max(1.0, settings.INGESTION_STALE_SECONDS / 3)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with async_session() as db:
+                    if await jobs_model.requeue_stale_jobs(db, settings.INGESTION_STALE_SECONDS):
+                        self.notify()
+            except Exception as e:
+                logger.warning(f"Requeuing stale jobs failed: {e}")
+
+    async def _heartbeat(self, job: JobOut):
+        """
+        Keep the job's heartbeat fresh while it runs, so a long stage is not
+        mistaken for a dead worker and requeued by another process.
+        """
+        interval = max(1.0, settings.INGESTION_STALE_SECONDS / 3)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with async_session() as db:
+                    await jobs_model.heartbeat(db, job.id)
+            except Exception as e:
+                logger.warning(f"Heartbeat of job {job.id} failed: {e}")
+
+    async def run_job(self, job: JobOut):
+        params = job.params
+        logger.info(f"Running ingestion job {job.id} for project '{params['project_name']}'")
+
+        async def progress(file_name: str, patch: dict):
+            async with async_session() as db:
+                await jobs_model.update_file_progress(db, job.id, file_name, jsonable_encoder(patch))
+
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        status, result, error = "failed", None, None
+        try:
+            async with async_session() as db:
+                outcome = await doc_controller.process_docs(
+                    db,
+                    client=self.client,
+                    project_name=params["project_name"],
+                    file_names=params["file_names"],
+                    chunk_size=params["chunk_size"],
+                    chunk_overlap=params["chunk_overlap"],
+                    progress=progress,
+                    continue_on_error=True,
+                    concurrency=params.get("concurrency"),
+                )
+            result = jsonable_encoder(outcome["data"])
+            if not result["failed"]:
+                status = "succeeded"
+            elif result["documents"]:
+                status = "partial"
+        except Exception as e:
+            logger.exception(f"Ingestion job {job.id} failed: {e}")
+            error = str(e)
+        finally:
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+
+        async with async_session() as db:
+            await jobs_model.finish_job(db, job.id, status, result=result, error=error)
+
+
+async def main():
+    from helpers.http_client import create_http_client
+    from llm.LLMClient import LLMClient
+
+    http_client = create_http_client()
+    client = LLMClient(base_url=settings.OLLAMA_BASE_URL,
+                       api_key=settings.OLLAMA_API_KEY,
+                       model_name=settings.OLLAMA_MODEL,
+                       http_client=http_client,
+                       timeout=settings.EMBEDDING_TIMEOUT_SECONDS,
+                       max_concurrency=settings.EMBEDDING_MAX_CONCURRENCY,
+                       tokens_per_minute=settings.EMBEDDING_TOKENS_PER_MINUTE)
+    pool = IngestionWorkerPool(client)
+    await pool.start()
+    try:
+        await asyncio.gather(*pool.tasks)
+    finally:
+        await pool.stop()
+        await http_client.aclose()
+        shutdown_process_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())